@@ -12,6 +12,8 @@ PAWN_PADDING_LEFT = 8
 PAWN_PADDING_TOP = 3
 
 MENU_FPS = 20
+MOVE_CACHE_SIZE = 1024  # number of positions for which legal moves are cached during a game
+BOOK_PATH = 'assets/book.bin'  # polyglot opening book used by the engine side (optional, see lib/book.py)
 
 FILE_CHAR = dict(zip(range(ROWS), ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h']))
 FILE_INT = {v: k for k, v in FILE_CHAR.items()}  # inverting above dict so we can get int from char
@@ -1,4 +1,7 @@
+import os
 import sys
+import queue
+import random
 import logging
 
 import grpc
@@ -8,7 +11,12 @@ import protos.adapter_pb2_grpc
 
 from app.defines import *
 from app.helpers import Helpers
+from engine.position import PositionTracker
+from engine.session import EngineSession
+from lib import instrument
 from lib.board import Board
+from lib.book import OpeningBook
+from lib.movecache import MoveCache
 
 
 logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
@@ -28,13 +36,25 @@ class Game:
         self.square_loc = self.helpers.compute_square_locations(self.revesed_board)
 
         # --- Board related vars
+        # legal moves are asked for every frame & every click, cache them (the cache is kept between games)
+        self.move_cache = MoveCache(MOVE_CACHE_SIZE)
         self.board = Board()
+        self.board.set_move_cache(self.move_cache)
         self.board.parse_fen(START_FEN)  # mate in two '3k4/8/8/3K4/8/8/1Q6/8 w --'
-        self.move_history = []
         # --- Engine process
         self.stub = None
+        self.channels = {}  # port -> channel, kept open between games
+        self.session = None  # streaming session with the engine, one per game
+        self.unary_engine = False  # the adapter has no EngineSession rpc, every command is its own call
+        self.engine_moves = queue.Queue()  # moves of the engine, received on grpc threads and made on the ui thread
+        self.engine_error = None  # why the engine cannot play, shown in the info banner
         self.engine_info = None
+        self.pending_engine_info = {}  # id lines received before uciok
+        self.position_tracker = PositionTracker()  # position the engine knows, only changes are sent to it
         self.movetime = '1500'  # default engine move time in ms
+        # --- Opening book, answers book positions locally without asking the engine
+        self.book = OpeningBook(BOOK_PATH) if os.path.isfile(BOOK_PATH) else None
+        self.book_rng = random.Random()
         # --
 
         self.highlighted_moves = []
@@ -68,8 +88,8 @@ class Game:
 
     def reset_board(self):
         self.board = Board()
+        self.board.set_move_cache(self.move_cache)
         self.board.parse_fen(START_FEN)
-        self.move_history = []
         self.movetime = '1500'
 
         self.reset_highlighted_moves()
@@ -86,33 +106,75 @@ class Game:
         self.promotion_moves = []
         self.promotion_choices = {}
 
-    def parse_engine_info(self, call_future):  # todo use info from here to display engine info
-        response = call_future.result()
-        out = response.text
+    def handle_engine_line(self, line):  # todo use info from here to display engine info
+        """Called from the session thread for every line the engine prints"""
+        if line.startswith('bestmove'):
+            logging.info(line)
+            self.engine_moves.put(self.parse_engine_response(line))
+        elif line.startswith('id name'):
+            self.pending_engine_info['name'] = line[len('id name'):].strip()
+        elif line.startswith('id author'):
+            self.pending_engine_info['author'] = line[len('id author'):].strip()
+        elif line == 'uciok':
+            self.engine_info = self.pending_engine_info  # engine is initialized
+        else:
+            self.position_tracker.parse_uci_line(line)
+            logging.debug(line)
 
-        engine_info = {}
-        for line in out.split('\n'):
-            if 'id name' in line:
-                _, name = line.split('id name', maxsplit=1)
-                engine_info['name'] = name.strip()
-            elif 'id author' in line:
-                _, author = line.split('id author', maxsplit=1)
-                engine_info['author'] = author.strip()
+    def handle_engine_error(self, error):
+        """Called from the session thread when the stream fails. Adapters without the EngineSession rpc (like the
+        Go adapter before it was regenerated) answer UNIMPLEMENTED, the game then goes on with unary calls.
+        """
+        if isinstance(error, grpc.RpcError) and error.code() == grpc.StatusCode.UNIMPLEMENTED:
+            logging.warning('Adapter does not support engine sessions, falling back to ExecuteEngineCommand')
+            self.unary_engine = True
+            self.init_engine_uci()
+            return
 
-        self.engine_info = engine_info
+        logging.error(f'Engine failed: {error}')
+        self.engine_error = f'Engine failed: {error.code().name}' if isinstance(error, grpc.RpcError) else str(error)
 
     def connect_to_engine(self, port):
-        # --- Connect to engine process
-        channel = grpc.insecure_channel(f'localhost:{port}')
-        self.stub = protos.adapter_pb2_grpc.AdapterStub(channel)
-        self.init_engine_uci()
+        # --- Connect to engine process, one stream is kept open for the whole game
+        self.disconnect_engine()
+        if port not in self.channels:
+            self.channels[port] = grpc.insecure_channel(f'localhost:{port}')
+        self.stub = protos.adapter_pb2_grpc.AdapterStub(self.channels[port])
+        self.unary_engine = False
+        self.engine_moves = queue.Queue()
+        self.engine_error = None
         self.engine_info = None
+        self.pending_engine_info = {}
+        self.position_tracker = PositionTracker()
+        self.session = EngineSession(self.stub, on_line=self.handle_engine_line, on_error=self.handle_engine_error)
+        self.init_engine_uci()
         # --
 
+    def disconnect_engine(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
     def init_engine_uci(self):
-        message = protos.adapter_pb2.Request(text="uci\n", timeout=1)  # todo move engine command definitions to their own class
+        if not self.unary_engine:
+            self.session.send('uci')  # todo move engine command definitions to their own class
+            return
+
+        message = protos.adapter_pb2.Request(text="uci\n", timeout=1)
         call_future = self.stub.ExecuteEngineCommand.future(message)
-        call_future.add_done_callback(self.parse_engine_info)
+        call_future.add_done_callback(self.parse_engine_output)
+
+    def parse_engine_output(self, call_future):
+        """Done callback of the unary calls, hands every line of the response to handle_engine_line"""
+        try:
+            response = call_future.result()
+        except grpc.RpcError as e:
+            self.handle_engine_error(e)
+            return
+
+        for line in response.text.splitlines():
+            if line.strip():
+                self.handle_engine_line(line.strip())
 
     def play_game(self, engine_options, settings):
         self.reset_board()
@@ -146,21 +208,29 @@ class Game:
 
             self.user_name = settings['player_name']
 
-        self.run()
+        try:
+            self.run()
+        finally:
+            self.disconnect_engine()
 
     def run(self):
         done = False
         while not done:
             # check for game result:
-            if self.board.get_result(self.board.playerJustMoved):
+            if self.board.game_state() != GAME_ONGOING:
                 self.draw_board()  # draw last board state before game over
                 return self.game_over()  # return back to main menu
 
+            # moves of the engine arrive on grpc threads, the board is only changed here on the ui thread
+            while not self.engine_moves.empty():
+                self.make_engine_response_move(self.engine_moves.get_nowait())
+
             # If it is the opposite side's turn and the engine hasn't been triggered already
             # and the engine has been initialized i.e. engine_info is available
             if self.user_side ^ 1 == self.board.side and self.engine_triggered is False and self.engine_info:
-                self.make_engine_move()
-                self.engine_triggered = True
+                if not self.make_book_move():
+                    self.make_engine_move()
+                    self.engine_triggered = True
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -246,7 +316,7 @@ class Game:
 
     def move_piece(self, move_str):
         self.last_move = move_str
-        self.board.make_move(self.board.parse_move(move_str))
+        self.board.push_uci(move_str)
 
         in_check = self.board.is_square_attacked(self.board.kingSquare[self.board.side],
                                                  self.board.side ^ 1)
@@ -254,32 +324,32 @@ class Game:
         sq = self.get_draw_square(self.board.kingSquare[self.board.side])
         self.in_check_sq = sq if in_check else None
 
-        # this is used to track evey move since starting position
-        self.move_history.append(move_str)
+    @staticmethod
+    def parse_engine_response(line):
+        """Returns the move of a 'bestmove <move> [ponder <move>]' line, NO_MOVE for 'bestmove (none)' (the engine is
+        mated or stalemated) and for lines without a move
+        """
+        parts = line.split()
+        if len(parts) < 2 or parts[1] == '(none)':
+            logging.warning(f'No move in engine response: {line!r}')
+            return NO_MOVE
+
+        logging.info(f'Received move: {parts[1]}')
+        return parts[1]
+
+    def make_engine_response_move(self, move_):
+        if move_ == NO_MOVE:
+            self.engine_error = 'Engine has no move'  # engine_triggered stays set, the engine is not asked again
+            return
+
+        try:
+            self.board.push_uci(move_)
+        except ValueError as e:
+            logging.error(f'Engine played an illegal move: {e}')
+            self.engine_error = f'Engine played an illegal move: {move_}'
+            return
 
-    def get_position_string(self):
-        command = "position"
-        if self.fen:
-            command = ' '.join([command, 'fen', self.fen])
-        else:
-            command = ' '.join([command, 'startpos'])
-
-        if self.move_history:
-            command = ' '.join([command, 'moves', *self.move_history])
-        return ''.join([command, '\n'])
-
-    def parse_engine_response(self, call_future):
-        response = call_future.result()
-        out = response.text
-        logging.info(out)
-        move_ = out.split('bestmove ')[-1]  # todo make this nicer
-        move_ = move_.split(' ')[0]  # take the first word after bestmove
-        move_ = move_.strip()
-        logging.info(f'Received move: {move_}')
-        self.board.parse_move(move_)
-        self.board.make_move(self.board.parse_move(move_))
         self.last_move = move_
-        self.move_history.append(self.last_move)
 
         in_check = self.board.is_square_attacked(self.board.kingSquare[self.board.side], self.board.side ^ 1)
         # if we are in check get square that should be highlighted
@@ -287,41 +357,67 @@ class Game:
         self.in_check_sq = sq if in_check else None
 
         self.engine_triggered = False  # reset to default value
+        self.log_instrumentation('engine turn')
 
-    def parse_isready_and_set_position(self, call_future):
-        response = call_future.result()
-        out = response.text
-        logging.info(f'Response to isready: {out}')
-        assert 'readyok' in out
-
-        # set position
-        command = self.get_position_string()
-        message = protos.adapter_pb2.Request(text=command, timeout=1)
-        logging.info(f'Sending: {message}')
-        call_future = self.stub.ExecuteEngineCommand.future(message)  # no response is expected
-        call_future.add_done_callback(self.send_go_command)
-
-    def send_go_command(self, _):
-        """This method is called from parse_isready_and_set_position. Setting position command
-        does not return any response so here we simply send GO command to engine with
-        predefined parameters.
-        """
+    def make_book_move(self) -> bool:
+        """Plays a move from the opening book if the position is in it, returns False if the engine has to move"""
+        if self.book is None:
+            return False
 
-        # set parameters and start engine search
-        # 4 seconds timeout for a request that takes 3 seconds
-        message = protos.adapter_pb2.Request(text=f"go movetime {self.movetime}\n", timeout=2)
-        logging.info(f'Sending: {message}')
-        call_future = self.stub.ExecuteEngineCommand.future(message)
-        call_future.add_done_callback(self.parse_engine_response)
+        move_ = self.book.choose_move(self.board, self.book_rng)
+        if move_ == NO_MOVE:
+            return False
+
+        move_str = self.board.moveGenerator.print_move(move_)
+        logging.info(f'Book move: {move_str}')
+        self.move_piece(move_str)
+        return True
+
+    @staticmethod
+    def log_instrumentation(turn: str):
+        """Logs the board hot path calls made since the last turn if instrumentation is enabled (SLINKY_INSTRUMENT)"""
+        if instrument.is_enabled():
+            logging.info(f'Hot path calls during the {turn}:\n{instrument.counters.report()}')
+            instrument.counters.reset()
 
     def make_engine_move(self):
-        """This starts a callback chain that asks engine if it is ready then sends the engine
-        the position to search and then sends GO command and parses response of engine analysis.
+        """Sends the position and the go command in one go over the session, the engine's bestmove line is
+        handled by parse_engine_response when it arrives.
         """
+        self.log_instrumentation('user turn')
+        commands = [f'go movetime {self.movetime}']
+        position = self.position_tracker.command(self.board)  # None if the engine already has the position
+        if position is not None:
+            commands.insert(0, position)
+        logging.info(f'Sending: {" / ".join(commands)}')
+        if self.unary_engine:
+            self.send_unary_commands(commands)
+        else:
+            self.session.send(*commands)
+
+    def send_unary_commands(self, commands):
+        """Fallback of make_engine_move for adapters without engine sessions: a callback chain that asks the engine
+        if it is ready and then sends the commands one call at a time, the output of the last one is parsed.
+        """
+        def send_next(call_future, remaining):
+            try:
+                call_future.result()
+            except grpc.RpcError as e:
+                self.handle_engine_error(e)
+                return
+
+            # go gets a 2 seconds longer timeout than its search takes
+            timeout = int(self.movetime) // 1000 + 2 if remaining[0].startswith('go') else 1
+            message = protos.adapter_pb2.Request(text=f'{remaining[0]}\n', timeout=timeout)
+            call_future = self.stub.ExecuteEngineCommand.future(message)
+            if len(remaining) > 1:
+                call_future.add_done_callback(lambda future: send_next(future, remaining[1:]))
+            else:
+                call_future.add_done_callback(self.parse_engine_output)
+
         message = protos.adapter_pb2.Request(text="isready\n", timeout=1)
-        logging.info(f'Sending: {message}')
         call_future = self.stub.ExecuteEngineCommand.future(message)
-        call_future.add_done_callback(self.parse_isready_and_set_position)
+        call_future.add_done_callback(lambda future: send_next(future, commands))
 
     def get_allowed_moves(self, sq):
         def is_start_square(move_):
@@ -377,11 +473,15 @@ class Game:
         side_highlight.fill(color=highlight_colour)
         self.canvas.blit(side_highlight, highlight_location)
 
-        if self.engine_info:  # give some time for engine to load before displaying names
+        x_padding = y_padding = 10
+        white_location = (x_padding, banner_y + y_padding)
+        black_location = (self.screen_width // 2 + separator_thickness // 2 + x_padding, banner_y + y_padding)
+        if self.engine_error:  # show why the engine does not play on its side of the banner
+            error_location = black_location if self.user_side == WHITE else white_location
+            self.helpers.display_text(text=self.engine_error, font_type="sans", font_size=20, canvas=self.canvas,
+                                      location=error_location, bold=True, color='red')
+        elif self.engine_info:  # give some time for engine to load before displaying names
             # add player names
-            x_padding = y_padding = 10
-            white_location = (x_padding, banner_y + y_padding)
-            black_location = (self.screen_width // 2 + separator_thickness // 2 + x_padding, banner_y + y_padding)
             white_name = self.user_name if self.user_side == WHITE else self.engine_info['name']
             black_name = self.user_name if self.user_side == BLACK else self.engine_info['name']
 
@@ -401,12 +501,12 @@ class Game:
                 self.canvas.blit(self.dark_square, self.square_loc[i])
 
     def draw_pos(self):
-        for idx, piece in enumerate(self.board.pieces):
-            if piece != EMPTY and piece != OFF_BOARD:
-                idx = self.get_draw_square(idx)
+        for piece in IMAGE_PATHS:
+            image_w, image_h = IMAGE_SIZES[piece]
+            padding_w, padding_h = (SQUARE_SIZE - image_w) // 2, (SQUARE_SIZE - image_h) // 2
+            for sq in self.board.pieceList[piece]:
+                idx = self.get_draw_square(sq)
                 w, h = self.square_loc[idx]
-                image_w, image_h = IMAGE_SIZES[piece]
-                padding_w, padding_h = (SQUARE_SIZE - image_w) // 2, (SQUARE_SIZE - image_h) // 2
                 self.canvas.blit(self.piece_images[piece], (w + padding_w, h + padding_h))
 
     def draw_clicked_square(self):
@@ -0,0 +1,82 @@
+"""Compares incrementally maintained attack maps against the ray walking is_square_attacked.
+
+Usage:
+    python -m benchmarks.attack_maps --depth 3 --games 20
+"""
+import argparse
+import json
+import random
+import time
+
+from lib.board import Board
+from lib.constants import START_FEN, MAILBOX_BACKEND, BITBOARD_BACKEND
+from lib.perft import PERFT_POSITIONS, perft
+
+
+def random_playouts(board: Board, games: int, max_plies: int, seed: int) -> int:
+    """Plays random games from the start position asking for the game result after every move (like the GUI
+    does) and returns the number of moves made.
+    """
+    rng = random.Random(seed)
+    moves_made = 0
+    for _ in range(games):
+        board.parse_fen(START_FEN)
+        for _ in range(max_plies):
+            if board.get_result(board.playerJustMoved) is not None:
+                break
+
+            board.make_move(rng.choice(board.generate_moves()))
+            moves_made += 1
+
+    return moves_made
+
+
+def bench(backend: str, attack_maps: bool, depth: int, games: int, max_plies: int, seed: int) -> dict:
+    board = Board(backend)
+    board.set_attack_maps(attack_maps)
+
+    nodes = 0
+    start = time.perf_counter()
+    for position in PERFT_POSITIONS[:3]:
+        board.parse_fen(position["fen"])
+        nodes += perft(board, depth)
+    perft_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    moves_made = random_playouts(board, games, max_plies, seed)
+    playout_seconds = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "attack_maps": attack_maps,
+        "perft_nodes": nodes,
+        "perft_nps": nodes / perft_seconds,
+        "playout_moves": moves_made,
+        "playout_moves_per_second": moves_made / playout_seconds,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks attack maps against ray walking attack detection")
+    parser.add_argument("--depth", type=int, default=3, help="perft depth")
+    parser.add_argument("--games", type=int, default=20, help="number of random playouts")
+    parser.add_argument("--max-plies", type=int, default=200, help="maximum length of a random playout")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the random playouts")
+    parser.add_argument("--output", help="write results as json to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for backend in (MAILBOX_BACKEND, BITBOARD_BACKEND):
+        for attack_maps in (False, True):
+            result = bench(backend, attack_maps, args.depth, args.games, args.max_plies, args.seed)
+            results.append(result)
+            print("{:<9} attack maps {:<5}: perft {:>8.0f} nps, playouts {:>7.0f} moves/s".format(
+                backend, str(attack_maps), result["perft_nps"], result["playout_moves_per_second"]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Compares bulk material, draw and check tests done with the scalar Board against the numpy BoardBatch.
+
+Usage:
+    python -m benchmarks.batch --positions 20000
+"""
+import argparse
+import json
+import random
+import time
+
+from lib.batch import BoardBatch
+from lib.board import Board
+from lib.constants import START_FEN
+
+
+def random_boards(count: int, seed: int):
+    """Returns boards reached by playing random games of random length from the start position"""
+    rng = random.Random(seed)
+    board = Board()
+    boards = []
+    while len(boards) < count:
+        board.parse_fen(START_FEN)
+        for _ in range(rng.randint(0, 120)):
+            moves = board.generate_moves()
+            if not moves:
+                break
+            board.make_move(rng.choice(moves))
+        boards.append(board.clone())
+
+    return boards
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks scalar Board against vectorized BoardBatch operations")
+    parser.add_argument("--positions", type=int, default=20000, help="number of positions")
+    parser.add_argument("--distinct", type=int, default=500, help="number of distinct random positions generated")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the random games")
+    parser.add_argument("--output", help="write results as json to this file")
+    args = parser.parse_args(argv)
+
+    # playing random games is much slower than what is measured, so the distinct positions are repeated
+    distinct = random_boards(args.distinct, args.seed)
+    boards = [distinct[index % len(distinct)] for index in range(args.positions)]
+
+    build = timed(lambda: BoardBatch.from_boards(boards))
+    batch = BoardBatch.from_boards(boards)
+    counts = batch.piece_counts()
+
+    operations = {
+        "piece_counts": (lambda: [sum(board.pieces[sq] == piece for sq in board.conversion.Sq64ToSq120)
+                                  for board in boards for piece in range(1, 13)],
+                         batch.piece_counts),
+        # Board keeps pieceNumber up to date while moves are made, so only the draw rules themselves are compared
+        "is_position_draw": (lambda: [board.is_position_draw() for board in boards],
+                             lambda: batch.is_position_draw(counts)),
+        "in_check": (lambda: [board.is_square_attacked(board.kingSquare[board.side], board.side ^ 1)
+                              for board in boards],
+                     batch.in_check),
+    }
+
+    results = {"positions": len(boards), "from_boards": build, "operations": []}
+    print("{} positions, BoardBatch.from_boards {:.3f}s".format(len(boards), build))
+    for name, (scalar, vectorized) in operations.items():
+        scalar_seconds = timed(scalar)
+        batch_seconds = timed(vectorized)
+        results["operations"].append({"name": name, "board": scalar_seconds, "batch": batch_seconds,
+                                      "speedup": scalar_seconds / batch_seconds})
+        print("{:<17} Board {:8.4f}s  BoardBatch {:8.4f}s  ({:.1f}x)".format(
+            name, scalar_seconds, batch_seconds, scalar_seconds / batch_seconds))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
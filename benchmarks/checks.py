@@ -0,0 +1,64 @@
+"""Compares the speed of the board core in debug mode (all asserts) and release mode (asserts stripped).
+
+Usage:
+    python -m benchmarks.checks --depth 3 --repeat 3 --output checks.json
+"""
+import argparse
+import json
+import time
+
+from lib import checks
+from lib.board import Board
+from lib.constants import MAILBOX_BACKEND, BITBOARD_BACKEND
+from lib.perft import PERFT_POSITIONS, perft
+
+
+def time_perft(backend: str, depth: int, repeat: int, debug: bool):
+    """Returns the nodes and the best time of perft over the reference positions in given mode"""
+    board = Board(backend)
+    best = float("inf")
+    nodes = 0
+    with checks.debug_checks(debug):
+        for _ in range(repeat):
+            nodes = 0
+            start = time.perf_counter()
+            for position in PERFT_POSITIONS:
+                board.parse_fen(position["fen"])
+                nodes += perft(board, depth)
+            best = min(best, time.perf_counter() - start)
+
+    return nodes, best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the board core with and without asserts")
+    parser.add_argument("--depth", type=int, default=3, help="perft depth of every reference position")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per mode, the fastest one is reported")
+    parser.add_argument("--output", help="write results as json to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for backend in (MAILBOX_BACKEND, BITBOARD_BACKEND):
+        nodes, debug_time = time_perft(backend, args.depth, args.repeat, debug=True)
+        release_nodes, release_time = time_perft(backend, args.depth, args.repeat, debug=False)
+        assert nodes == release_nodes
+
+        result = {
+            "backend": backend,
+            "nodes": nodes,
+            "debug": debug_time,
+            "release": release_time,
+            "speedup": debug_time / release_time,
+        }
+        results.append(result)
+
+        print("{:<9} {} nodes  debug {:7.3f}s ({:8.0f} nps)  release {:7.3f}s ({:8.0f} nps)  {:.2f}x".format(
+            backend, nodes, debug_time, nodes / debug_time, release_time, nodes / release_time, result["speedup"]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Compares the cost of copying a board with deepcopy, clone() and snapshot()/from_snapshot().
+
+Usage:
+    python -m benchmarks.clone --plies 40 --repeat 200
+"""
+import argparse
+import json
+import random
+import time
+from copy import deepcopy
+
+from lib.board import Board
+from lib.constants import START_FEN, MAILBOX_BACKEND, BITBOARD_BACKEND
+
+
+def setup_board(backend: str, plies: int, seed: int) -> Board:
+    """Returns a board with a random game of given length played on it"""
+    rng = random.Random(seed)
+    board = Board(backend)
+    board.parse_fen(START_FEN)
+    for _ in range(plies):
+        moves = board.generate_moves()
+        if not moves:
+            break
+        board.make_move(rng.choice(moves))
+
+    return board
+
+
+def time_per_call(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks board copying")
+    parser.add_argument("--plies", type=int, default=40, help="number of random moves played before copying")
+    parser.add_argument("--repeat", type=int, default=200, help="number of copies per method")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the random game")
+    parser.add_argument("--output", help="write results as json to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for backend in (MAILBOX_BACKEND, BITBOARD_BACKEND):
+        board = setup_board(backend, args.plies, args.seed)
+        snapshot = board.snapshot()
+
+        result = {
+            "backend": backend,
+            "deepcopy": time_per_call(lambda: deepcopy(board), args.repeat),
+            "clone": time_per_call(board.clone, args.repeat),
+            "snapshot": time_per_call(board.snapshot, args.repeat),
+            "from_snapshot": time_per_call(lambda: Board.from_snapshot(snapshot, backend), args.repeat),
+        }
+        results.append(result)
+
+        print("{:<9} deepcopy {:8.1f}us  clone {:6.1f}us ({:.0f}x)  snapshot {:6.1f}us  from_snapshot {:6.1f}us".format(
+            backend, result["deepcopy"] * 1e6, result["clone"] * 1e6, result["deepcopy"] / result["clone"],
+            result["snapshot"] * 1e6, result["from_snapshot"] * 1e6))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Load test of the GUI/engine pipeline against in-process Python adapters with fake engines (engine/adapter.py).
+
+Measures the overhead per engine move of the old chain of unary calls (isready, position, go) and of one streaming
+session (EngineClient), with searches that take no time, and the throughput of an EnginePool over 1..N adapters
+with searches of a fixed length.
+
+Usage:
+    python -m benchmarks.engine_pipeline --moves 200 --adapters 4 --searches 64 --search-time 0.02
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import grpc
+import protos.adapter_pb2
+import protos.adapter_pb2_grpc
+
+from engine.adapter import FakeEngine, start_server
+from engine.client import EngineClient
+from engine.pool import EnginePool
+from lib.board import Board
+from lib.constants import START_FEN
+
+
+async def unary_moves(target: str, moves: int) -> float:
+    """Plays moves with the isready / position / go unary chain the GUI used to make, returns seconds per move"""
+    board = Board()
+    board.parse_fen(START_FEN)
+    played = []
+    async with grpc.aio.insecure_channel(target) as channel:
+        stub = protos.adapter_pb2_grpc.AdapterStub(channel)
+
+        async def execute(text):
+            return (await stub.ExecuteEngineCommand(protos.adapter_pb2.Request(text=text, timeout=5))).text
+
+        await execute('uci\n')
+        start = time.perf_counter()
+        for _ in range(moves):
+            await execute('isready\n')
+            await execute(' '.join(['position startpos moves', *played]) + '\n')
+            move_str = (await execute('go movetime 0\n')).split('bestmove ')[-1].split()[0]
+            if move_str == '(none)':
+                board.parse_fen(START_FEN)
+                played = []
+                continue
+            board.push_uci(move_str)
+            played.append(move_str)
+
+        return (time.perf_counter() - start) / moves
+
+
+async def session_moves(target: str, moves: int) -> float:
+    """Plays moves over one streaming session with position deltas, returns seconds per move"""
+    board = Board()
+    board.parse_fen(START_FEN)
+    async with EngineClient(target) as engine:
+        await engine.uci()
+        start = time.perf_counter()
+        for _ in range(moves):
+            await engine.update_position(board)
+            result = await engine.go(movetime=0)
+            if result.move == '(none)':
+                board.parse_fen(START_FEN)
+                continue
+            board.push_uci(result.move)
+
+        return (time.perf_counter() - start) / moves
+
+
+async def pool_throughput(targets, searches: int) -> float:
+    """Runs searches concurrently on a pool over targets, returns searches per second"""
+    board = Board()
+    board.parse_fen(START_FEN)
+    async with EnginePool(targets, health_interval=0) as pool:
+        start = time.perf_counter()
+        await asyncio.gather(*(pool.search(board, movetime=0) for _ in range(searches)))
+        return searches / (time.perf_counter() - start)
+
+
+async def run(args) -> dict:
+    servers = []
+    targets = []
+    for _ in range(args.adapters):
+        server, servicer, port = await start_server(lambda: FakeEngine(search_time=args.search_time, seed=1))
+        servers.append((server, servicer))
+        targets.append(f'localhost:{port}')
+
+    # the per move overhead is measured with searches that take no time
+    overhead_server, overhead_servicer, port = await start_server(lambda: FakeEngine(search_time=0.0, seed=1))
+    servers.append((overhead_server, overhead_servicer))
+
+    try:
+        results = {
+            "unary_per_move": await unary_moves(f'localhost:{port}', args.moves),
+            "session_per_move": await session_moves(f'localhost:{port}', args.moves),
+            "pool": [],
+        }
+        print("per move overhead: unary chain {:.3f}ms  session {:.3f}ms".format(
+            results["unary_per_move"] * 1e3, results["session_per_move"] * 1e3))
+
+        adapters = 1
+        while adapters <= args.adapters:
+            throughput = await pool_throughput(targets[:adapters], args.searches)
+            results["pool"].append({"adapters": adapters, "searches_per_second": throughput})
+            print("pool of {} adapters: {:7.1f} searches/s ({:.0f}ms searches)".format(
+                adapters, throughput, args.search_time * 1e3))
+            adapters *= 2
+    finally:
+        for server, servicer in servers:
+            await servicer.close()
+            await server.stop(None)
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load tests the engine pipeline against fake engines")
+    parser.add_argument("--moves", type=int, default=200, help="moves played to measure the per move overhead")
+    parser.add_argument("--adapters", type=int, default=4, help="maximum number of adapters in the pool")
+    parser.add_argument("--searches", type=int, default=64, help="searches run on the pool per adapter count")
+    parser.add_argument("--search-time", type=float, default=0.02, help="seconds every pooled search takes")
+    parser.add_argument("--output", help="write results as json to this file")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
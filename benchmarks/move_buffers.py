@@ -0,0 +1,94 @@
+"""Compares move generation into fresh lists against the preallocated per-ply move buffers.
+
+Memory is measured with tracemalloc: the peak of traced memory during a single move generation and during a
+whole perft run (all move lists of the current line are alive at the same time when lists are used).
+
+Usage:
+    python -m benchmarks.move_buffers --depth 3
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from lib.board import Board
+from lib.constants import MAILBOX_BACKEND, BITBOARD_BACKEND
+from lib.perft import PERFT_POSITIONS, perft
+
+
+def perft_lists(board: Board, depth: int) -> int:
+    """perft as it was written before the move buffers: every node allocates its own move list"""
+    if depth == 0:
+        return 1
+
+    nodes = 0
+    for move_ in board.moveGenerator.generate_legal_moves():
+        board.make_move(move_)
+        nodes += perft_lists(board, depth - 1)
+        board.take_move()
+
+    return nodes
+
+
+def traced_peak(func) -> int:
+    """Returns the peak of traced memory (in bytes) allocated while running func"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - base
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks move lists against preallocated move buffers")
+    parser.add_argument("--depth", type=int, default=3, help="perft depth")
+    parser.add_argument("--output", help="write results as json to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for backend in (MAILBOX_BACKEND, BITBOARD_BACKEND):
+        board = Board(backend)
+        generator = board.moveGenerator
+        for position in PERFT_POSITIONS[:2]:
+            board.parse_fen(position["fen"])
+            buffer = generator.move_buffer(0)
+
+            start = time.perf_counter()
+            nodes_lists = perft_lists(board, args.depth)
+            seconds_lists = time.perf_counter() - start
+            start = time.perf_counter()
+            nodes_buffers = perft(board, args.depth)
+            seconds_buffers = time.perf_counter() - start
+            assert nodes_lists == nodes_buffers
+
+            result = {
+                "backend": backend,
+                "name": position["name"],
+                "nodes": nodes_buffers,
+                "lists": {
+                    "generate_peak_bytes": traced_peak(generator.generate_legal_moves),
+                    "perft_peak_bytes": traced_peak(lambda: perft_lists(board, args.depth)),
+                    "perft_seconds": seconds_lists,
+                },
+                "buffers": {
+                    "generate_peak_bytes": traced_peak(lambda: generator.generate_legal_moves_into(buffer)),
+                    "perft_peak_bytes": traced_peak(lambda: perft(board, args.depth)),
+                    "perft_seconds": seconds_buffers,
+                },
+            }
+            results.append(result)
+
+            for name in ("lists", "buffers"):
+                print("{:<9} {:<14} {:<8} generation peak {:6d} bytes  perft peak {:7d} bytes  perft {:.3f}s".format(
+                    backend, position["name"], name, result[name]["generate_peak_bytes"],
+                    result[name]["perft_peak_bytes"], result[name]["perft_seconds"]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Measures how parallel perft and position jobs scale with the number of worker processes.
+
+Usage:
+    python -m benchmarks.parallel --depth 4 --workers 1 2 4 8
+"""
+import argparse
+import json
+import time
+
+from lib.constants import START_FEN, MAILBOX_BACKEND, BITBOARD_BACKEND
+from lib.perft import PERFT_POSITIONS
+from lib.parallel import parallel_perft, map_positions, default_workers
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks multi-process perft and position analysis")
+    parser.add_argument("--fen", default=START_FEN, help="position to run perft for")
+    parser.add_argument("--depth", type=int, default=4, help="perft depth")
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts to measure (default: 1..cpu count)")
+    parser.add_argument("--positions", type=int, default=0,
+                        help="also classify this many positions given as fens (0 to skip)")
+    parser.add_argument("--backend", default=MAILBOX_BACKEND, choices=[MAILBOX_BACKEND, BITBOARD_BACKEND])
+    parser.add_argument("--output", help="write results as json to this file")
+    args = parser.parse_args(argv)
+
+    worker_counts = args.workers
+    if not worker_counts:
+        worker_counts = sorted({1, 2, 4, 8, default_workers()} & set(range(1, default_workers() + 1)))
+    results = []
+
+    base = None
+    for workers in worker_counts:
+        nodes, seconds = timed(lambda: parallel_perft(args.fen, args.depth, workers, args.backend))
+        base = base or seconds
+        result = {"job": "perft", "workers": workers, "nodes": nodes, "seconds": seconds, "speedup": base / seconds,
+                  "efficiency": base / seconds / workers}
+        results.append(result)
+        print("perft    workers {:>3}: {} nodes in {:.3f}s  speed-up {:.2f}x  efficiency {:.0%}".format(
+            workers, nodes, seconds, result["speedup"], result["efficiency"]))
+
+    if args.positions:
+        # the reference perft positions are cycled to get the requested amount
+        fens = [PERFT_POSITIONS[index % len(PERFT_POSITIONS)]["fen"] for index in range(args.positions)]
+
+        base = None
+        for workers in worker_counts:
+            _, seconds = timed(lambda: map_positions(fens, "game_state", workers, backend=args.backend))
+            base = base or seconds
+            result = {"job": "game_state", "workers": workers, "positions": len(fens), "seconds": seconds,
+                      "speedup": base / seconds, "efficiency": base / seconds / workers}
+            results.append(result)
+            print("classify workers {:>3}: {} positions in {:.3f}s  speed-up {:.2f}x  efficiency {:.0%}".format(
+                workers, len(fens), seconds, result["speedup"], result["efficiency"]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Compares the cost of telling the engine the current position on every turn of long games:
+
+    history   'position fen <start fen> moves <all moves of the game>' (what the GUI used to send)
+    bounded   'position fen <fen after the last irreversible move> moves <moves since>' (plain uci engines)
+    delta     'position delta <moves since the last turn>' (adapters announcing AdapterPositionDelta)
+
+For every strategy the bytes sent, the time to build the commands and the time the engine side needs to replay them
+(apply_position_command on a board) are summed over all turns.
+
+Usage:
+    python -m benchmarks.position_updates --games 5 --plies 240 --output position_updates.json
+"""
+import argparse
+import json
+import random
+import time
+
+from engine.position import PositionTracker, apply_position_command, history_moves
+from lib.board import Board
+from lib.constants import START_FEN
+
+
+def random_game(plies: int, rng: random.Random) -> list:
+    """Returns the uci moves of a random game with given number of plies (retrying games that end earlier)"""
+    board = Board()
+    while True:
+        board.parse_fen(START_FEN)
+        moves = []
+        while len(moves) < plies:
+            legal_moves = board.generate_moves()
+            if not legal_moves:
+                break
+            move_ = rng.choice(legal_moves)
+            moves.append(board.moveGenerator.print_move(move_))
+            board.make_move(move_)
+
+        if len(moves) == plies:
+            return moves
+
+
+def history_command(board: Board) -> str:
+    return ' '.join(['position', 'fen', START_FEN, 'moves', *history_moves(board)])
+
+
+def run_strategy(games: list, strategy: str) -> dict:
+    board = Board()
+    engine_board = Board()
+    sent_bytes = 0
+    last_bytes = 0
+    build_time = 0.0
+    replay_time = 0.0
+    turns = 0
+
+    for game in games:
+        board.parse_fen(START_FEN)
+        tracker = PositionTracker(incremental=strategy == 'delta')
+        for move_str in game:
+            board.push_uci(move_str)
+
+            start = time.perf_counter()
+            command = history_command(board) if strategy == 'history' else tracker.command(board)
+            build_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            apply_position_command(engine_board, command)
+            replay_time += time.perf_counter() - start
+
+            assert engine_board.posKey == board.posKey
+            last_bytes = len(command) + 1
+            sent_bytes += last_bytes
+            turns += 1
+
+    return {
+        "strategy": strategy,
+        "turns": turns,
+        "bytes": sent_bytes,
+        "bytes_per_turn": sent_bytes / turns,
+        "last_turn_bytes": last_bytes,
+        "build": build_time,
+        "replay": replay_time,
+        "per_turn": (build_time + replay_time) / turns,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks sending the position to the engine on every turn")
+    parser.add_argument("--games", type=int, default=5, help="number of random games")
+    parser.add_argument("--plies", type=int, default=240, help="length of every game")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the random games")
+    parser.add_argument("--output", help="write results as json to this file")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    games = [random_game(args.plies, rng) for _ in range(args.games)]
+
+    results = []
+    for strategy in ("history", "bounded", "delta"):
+        result = run_strategy(games, strategy)
+        results.append(result)
+        print("{:<8} {:9d} bytes ({:6.0f}/turn, last turn {:5d})  build {:6.3f}s  replay {:6.3f}s  {:7.1f}us/turn"
+              .format(strategy, result["bytes"], result["bytes_per_turn"], result["last_turn_bytes"], result["build"],
+                      result["replay"], result["per_turn"] * 1e6))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+"""Python stand-in for the Go adapter service.
+
+Implements the Adapter service of protos/adapter.proto on grpc.aio in front of either a UCI engine subprocess or a
+built-in scripted fake engine, so the GUI/engine pipeline can be tested and benchmarked without external binaries:
+
+    ExecuteEngineCommand  writes the request to one engine shared by all calls and returns the output up to the
+                          answer of the command (uciok, readyok, bestmove), or whatever arrived within the timeout
+    EngineSession         starts an engine per stream, pipes every request to it and streams back every line. The
+                          session also accepts 'position delta <moves>' (see engine/position.py) and announces it
+
+Usage:
+    python -m engine.adapter --port 50051 --fake --search-time 0.05
+    python -m engine.adapter --port 50051 --engine "/usr/bin/stockfish"
+    python -m engine.adapter --uci              # the fake engine itself, speaking uci on stdin/stdout
+"""
+import argparse
+import asyncio
+import logging
+import random
+import shlex
+import sys
+import threading
+from typing import Callable, List, Optional, Sequence
+
+import grpc
+import protos.adapter_pb2
+import protos.adapter_pb2_grpc
+
+from engine.position import ADAPTER_DELTA_OPTION, POSITION_DELTA_COMMAND, apply_position_command, \
+    full_position_command
+from lib.board import Board
+from lib.constants import START_FEN
+
+DEFAULT_PORT = 50051
+QUIT_TIMEOUT = 1.0  # seconds an engine subprocess gets to exit after quit before it is killed
+
+# line that ends the answer of a command, commands that are not listed have no answer
+ANSWERS = {'uci': 'uciok', 'isready': 'readyok', 'go': 'bestmove'}
+
+
+class FakeEngine:
+    """Scripted uci engine: answers every command after latency seconds, searches take search_time seconds (the
+    movetime of the go command if None, 'go infinite' runs until stop) and play a random legal move
+    """
+
+    def __init__(self, latency: float = 0.0, search_time: Optional[float] = None, seed: Optional[int] = None,
+                 name: str = 'Slinky fake engine'):
+        self.latency = latency
+        self.searchTime = search_time
+        self.rng = random.Random(seed)
+        self.name = name
+        self.board = Board()
+        self.board.parse_fen(START_FEN)
+        self.output: asyncio.Queue = asyncio.Queue()
+        self.stopEvent = asyncio.Event()
+        self.search: Optional[asyncio.Task] = None
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        if self.search is not None:
+            self.search.cancel()
+        self.output.put_nowait(None)
+
+    async def readline(self) -> Optional[str]:
+        """Returns the next output line, None once the engine has quit"""
+        line = await self.output.get()
+        if line is None:
+            self.output.put_nowait(None)  # every later read ends as well
+        return line
+
+    async def _print(self, *lines: str):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for line in lines:
+            self.output.put_nowait(line)
+
+    async def write(self, text: str):
+        for line in text.splitlines():
+            await self._command(line.split())
+
+    async def _command(self, tokens: List[str]):
+        command = tokens[0] if tokens else ''
+        if command == 'uci':
+            await self._print(f'id name {self.name}', 'id author pyslinky', 'uciok')
+        elif command == 'isready':
+            await self._print('readyok')
+        elif command == 'ucinewgame':
+            self.board.parse_fen(START_FEN)
+        elif command == 'position':
+            try:
+                apply_position_command(self.board, ' '.join(tokens))
+            except ValueError as e:
+                await self._print(f'info string {e}')
+        elif command == 'go':
+            self.stopEvent.clear()
+            self.search = asyncio.ensure_future(self._search(tokens))
+        elif command == 'stop':
+            self.stopEvent.set()
+        elif command == 'quit':
+            await self.close()
+        elif command:
+            await self._print(f'info string Unknown command: {" ".join(tokens)}')
+
+    async def _search(self, tokens: List[str]):
+        duration = self.searchTime
+        if duration is None:
+            if 'infinite' in tokens:
+                duration = float('inf')
+            elif 'movetime' in tokens:
+                duration = int(tokens[tokens.index('movetime') + 1]) / 1000
+            else:
+                duration = 0.0
+
+        try:
+            await asyncio.wait_for(self.stopEvent.wait(), None if duration == float('inf') else duration)
+        except asyncio.TimeoutError:
+            pass
+
+        moves = self.board.generate_moves()
+        if not moves:
+            await self._print('bestmove (none)')
+            return
+
+        move_str = self.board.moveGenerator.print_move(self.rng.choice(moves))
+        await self._print(f'info depth 1 score cp 0 nodes {len(moves)} pv {move_str}', f'bestmove {move_str}')
+
+
+class SubprocessEngine:
+    """Uci engine running as a subprocess, talking over its stdin/stdout"""
+
+    def __init__(self, command: Sequence[str], cwd: Optional[str] = None):
+        self.command = list(command)
+        self.cwd = cwd  # i.e. the directory of the engine's network files
+        self.process: Optional[asyncio.subprocess.Process] = None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(*self.command, stdin=asyncio.subprocess.PIPE,
+                                                            stdout=asyncio.subprocess.PIPE, cwd=self.cwd)
+
+    async def close(self):
+        if self.process is None or self.process.returncode is not None:
+            return
+        try:
+            await self.write('quit\n')
+            await asyncio.wait_for(self.process.wait(), QUIT_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError):
+            self.process.kill()
+            await self.process.wait()
+
+    async def readline(self) -> Optional[str]:
+        line = await self.process.stdout.readline()
+        return line.decode().rstrip('\r\n') if line else None
+
+    async def write(self, text: str):
+        self.process.stdin.write(text.encode())
+        await self.process.stdin.drain()
+
+
+async def _read_answer(engine, command: str, timeout: Optional[float]) -> List[str]:
+    """Reads engine output until the answer of command (or timeout seconds if given) and returns the lines"""
+    words = command.split()
+    answer = ANSWERS.get(words[0] if words else '')
+    lines = []
+    if answer is None:
+        return lines
+
+    async def read():
+        while True:
+            line = await engine.readline()
+            if line is None:
+                return
+            lines.append(line)
+            if line.startswith(answer):
+                return
+
+    try:
+        await asyncio.wait_for(read(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    return lines
+
+
+class AdapterServicer(protos.adapter_pb2_grpc.AdapterServicer):
+    def __init__(self, engine_factory: Callable[[], object]):
+        self.engineFactory = engine_factory
+        self.engine = None  # engine shared by the ExecuteEngineCommand calls
+        self.lock = asyncio.Lock()
+
+    async def close(self):
+        if self.engine is not None:
+            await self.engine.close()
+            self.engine = None
+
+    async def ExecuteEngineCommand(self, request, context):
+        async with self.lock:
+            if self.engine is None:
+                self.engine = self.engineFactory()
+                await self.engine.start()
+
+            await self.engine.write(request.text if request.text.endswith('\n') else request.text + '\n')
+            # the answer belongs to the last command of the request
+            commands = request.text.strip().splitlines() or ['']
+            lines = await _read_answer(self.engine, commands[-1], request.timeout or None)
+
+        return protos.adapter_pb2.Response(text='\n'.join(lines))
+
+    async def EngineSession(self, request_iterator, context):
+        engine = self.engineFactory()
+        await engine.start()
+        board = Board()  # position of the engine, needed to turn position deltas into full commands
+        board.parse_fen(START_FEN)  # like engines, start out in the start position
+        writing = asyncio.Lock()  # the pump and this loop both write, a stream takes one write at a time
+
+        async def write(text: str):
+            async with writing:
+                await context.write(protos.adapter_pb2.Response(text=text))
+
+        pump = asyncio.ensure_future(self._pump_output(engine, write))
+        try:
+            while True:
+                request = await context.read()
+                if request is grpc.aio.EOF:
+                    break
+
+                for line in request.text.splitlines():
+                    line = self._translate_position(board, line.strip())
+                    if line.startswith('info string'):
+                        await write(line)
+                    elif line:
+                        await engine.write(line + '\n')
+        finally:
+            await engine.close()
+            pump.cancel()
+            await asyncio.gather(pump, return_exceptions=True)
+
+    @staticmethod
+    def _translate_position(board: Board, line: str) -> str:
+        """Tracks the position commands of a session, expanding deltas into full uci position commands"""
+        if not line.startswith('position'):
+            return line
+
+        try:
+            apply_position_command(board, line)
+        except ValueError as e:
+            logging.warning(f'Invalid position command {line!r}: {e}')
+            return f'info string {e}' if line.startswith(POSITION_DELTA_COMMAND) else line
+
+        return full_position_command(board) if line.startswith(POSITION_DELTA_COMMAND) else line
+
+    @staticmethod
+    async def _pump_output(engine, write):
+        while True:
+            line = await engine.readline()
+            if line is None:
+                return
+            if line == 'uciok':
+                await write(ADAPTER_DELTA_OPTION)
+            await write(line)
+
+
+async def start_server(engine_factory: Callable[[], object], port: int = 0, host: str = 'localhost'):
+    """Starts an adapter server (on a free port if port is 0), returns the server, its servicer and the port"""
+    server = grpc.aio.server()
+    servicer = AdapterServicer(engine_factory)
+    protos.adapter_pb2_grpc.add_AdapterServicer_to_server(servicer, server)
+    port = server.add_insecure_port(f'{host}:{port}')
+    await server.start()
+    return server, servicer, port
+
+
+async def run_uci_on_stdio(engine_factory: Callable[[], FakeEngine]):
+    """Speaks uci over stdin/stdout with the fake engine, i.e. to test SubprocessEngine without external engines.
+    The engine is built here, so its queue and event belong to the running loop (on Python < 3.10 they bind to the
+    loop current when they are created)
+    """
+    engine = engine_factory()
+    loop = asyncio.get_event_loop()
+    lines: asyncio.Queue = asyncio.Queue()
+
+    def read_stdin():  # blocking reads run on a daemon thread, so they never keep the process alive
+        for line in sys.stdin:
+            loop.call_soon_threadsafe(lines.put_nowait, line)
+        loop.call_soon_threadsafe(lines.put_nowait, None)
+
+    async def print_output():
+        while True:
+            line = await engine.readline()
+            if line is None:  # the engine has quit
+                return
+            sys.stdout.write(line + '\n')
+            sys.stdout.flush()
+
+    threading.Thread(target=read_stdin, daemon=True).start()
+    printer = asyncio.ensure_future(print_output())
+    while not printer.done():
+        read = asyncio.ensure_future(lines.get())
+        await asyncio.wait([read, printer], return_when=asyncio.FIRST_COMPLETED)
+        if not read.done():
+            read.cancel()
+        elif read.result() is None:
+            await engine.close()
+        else:
+            await engine.write(read.result())
+    await printer
+
+
+async def serve(port: int, engine_factory: Callable[[], object]):
+    server, servicer, port = await start_server(engine_factory, port, host='[::]')
+    logging.info(f'Adapter listening on port {port}')
+    try:
+        await server.wait_for_termination()
+    finally:
+        await servicer.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Adapter service in front of a uci engine or a fake engine")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+    parser.add_argument("--engine", help="command line of a uci engine (default: the built-in fake engine)")
+    parser.add_argument("--fake", action="store_true", help="use the built-in fake engine")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the fake engine waits before answering")
+    parser.add_argument("--search-time", type=float, help="seconds every fake search takes (default: its movetime)")
+    parser.add_argument("--seed", type=int, help="seed of the fake engine's moves")
+    parser.add_argument("--uci", action="store_true", help="run the fake engine on stdin/stdout instead of serving")
+    args = parser.parse_args(argv)
+
+    def fake_engine():
+        return FakeEngine(args.latency, args.search_time, args.seed)
+
+    if args.uci:
+        asyncio.run(run_uci_on_stdio(fake_engine))
+        return 0
+
+    logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
+    if args.engine and not args.fake:
+        command = shlex.split(args.engine)
+        asyncio.run(serve(args.port, lambda: SubprocessEngine(command)))
+    else:
+        asyncio.run(serve(args.port, fake_engine))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
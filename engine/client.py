@@ -0,0 +1,238 @@
+"""asyncio client of the adapter, built on grpc.aio and the streaming EngineSession rpc.
+
+Every client owns one session stream. A background task reads the engine output into a queue, and the coroutines
+send their commands and wait for the line that ends the answer (uciok, readyok, bestmove) with a timeout. Nothing
+blocks the event loop, so one loop can drive hundreds of engine conversations at once.
+
+Usage:
+    async with EngineClient('localhost:50051') as engine:
+        info = await engine.uci()
+        await engine.isready()
+        await engine.set_position(moves=['e2e4'])
+        result = await engine.go(movetime=1000)
+        print(info['name'], result.move)
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Sequence
+
+import grpc
+import protos.adapter_pb2
+import protos.adapter_pb2_grpc
+from engine.position import PositionTracker
+from lib.board import Board
+
+DEFAULT_COMMAND_TIMEOUT = 5.0  # seconds to wait for uciok / readyok
+GO_TIMEOUT_MARGIN = 5.0  # seconds a search may take longer than its movetime before it is stopped
+STOP_TIMEOUT = 2.0  # seconds to wait for the bestmove after a stop
+
+_STREAM_END = None  # queued by the reader task when the session stream ends
+
+
+class EngineError(RuntimeError):
+    """The engine session failed or the engine did not answer in time"""
+
+
+class SearchResult:
+    """bestmove (and ponder move) of a search and the info lines printed during it"""
+
+    def __init__(self, move: str, ponder: Optional[str], info: List[str]):
+        self.move = move
+        self.ponder = ponder
+        self.info = info
+
+    def __repr__(self):
+        return f'SearchResult(move={self.move!r}, ponder={self.ponder!r}, info={len(self.info)} lines)'
+
+
+def position_command(fen: Optional[str] = None, moves: Sequence[str] = ()) -> str:
+    """Returns the uci position command for a fen (start position if None) and the moves played from it"""
+    command = f'position fen {fen}' if fen else 'position startpos'
+    if moves:
+        command = ' '.join([command, 'moves', *moves])
+    return command
+
+
+class EngineClient:
+    def __init__(self, target: str, timeout: float = DEFAULT_COMMAND_TIMEOUT,
+                 channel: Optional[grpc.aio.Channel] = None):
+        self.target = target
+        self.timeout = timeout
+        self.channel = channel
+        self.ownsChannel = channel is None
+        self.call = None
+        self.reader: Optional[asyncio.Task] = None
+        self.lines: asyncio.Queue = asyncio.Queue()
+        self.error: Optional[Exception] = None
+        # uci is a conversation, only one command waiting for an answer at a time (stop() does not wait)
+        self.lock = asyncio.Lock()
+        self.searching = False
+        # searches given up on after stop timed out, their late info / bestmove lines are dropped when they arrive
+        self.staleSearches = 0
+        self.position = PositionTracker()  # position the engine knows, see update_position()
+
+    async def __aenter__(self) -> 'EngineClient':
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *_):
+        await self.close()
+
+    async def connect(self):
+        if self.channel is None:
+            self.channel = grpc.aio.insecure_channel(self.target)
+        stub = protos.adapter_pb2_grpc.AdapterStub(self.channel)
+        self.call = stub.EngineSession()
+        self.reader = asyncio.ensure_future(self._read_lines())
+
+    async def close(self):
+        """Ends the session and, if the client created it, closes the channel"""
+        if self.call is not None:
+            self.call.cancel()
+            self.call = None
+        if self.reader is not None:
+            self.reader.cancel()
+            await asyncio.gather(self.reader, return_exceptions=True)
+            self.reader = None
+        if self.ownsChannel and self.channel is not None:
+            await self.channel.close()
+            self.channel = None
+
+    async def _read_lines(self):
+        try:
+            while True:
+                response = await self.call.read()
+                if response is grpc.aio.EOF:
+                    break
+                for line in response.text.splitlines():
+                    if line.strip():
+                        self.lines.put_nowait(line.strip())
+        except grpc.RpcError as e:
+            if e.code() != grpc.StatusCode.CANCELLED:
+                self.error = e
+                logging.error(f'Engine session with {self.target} failed: {e.code()} {e.details()}')
+        finally:
+            self.lines.put_nowait(_STREAM_END)
+
+    async def send(self, *commands: str):
+        """Writes uci commands to the engine without waiting for an answer"""
+        if self.call is None:
+            raise EngineError('Engine client is not connected')
+
+        try:
+            for command in commands:
+                await self.call.write(protos.adapter_pb2.Request(text=command.rstrip('\n') + '\n'))
+        except grpc.RpcError as e:
+            raise EngineError(f'Engine session with {self.target} failed: {e.code()}') from e
+        except asyncio.InvalidStateError as e:  # the stream already ended
+            raise EngineError(f'Engine session with {self.target} ended') from e
+
+    async def _read_line(self) -> str:
+        while True:
+            line = await self.lines.get()
+            if line is _STREAM_END:
+                self.lines.put_nowait(_STREAM_END)  # every later read fails as well
+                raise EngineError(f'Engine session with {self.target} ended') from self.error
+            if not self.staleSearches:
+                return line
+
+            # uci engines answer searches in order, output of an abandoned search comes before any newer one
+            if line.startswith('bestmove'):
+                self.staleSearches -= 1
+            elif not line.startswith('info'):
+                return line
+
+    async def _read_until(self, prefix: str, on_line: Optional[Callable[[str], None]] = None) -> List[str]:
+        """Returns the engine output up to and including the first line starting with prefix"""
+        lines = []
+        while True:
+            line = await self._read_line()
+            lines.append(line)
+            if line.startswith(prefix):
+                return lines
+            if on_line is not None:
+                on_line(line)
+
+    async def _command(self, command: str, answer: str, timeout: Optional[float]) -> List[str]:
+        async with self.lock:
+            await self.send(command)
+            try:
+                return await asyncio.wait_for(self._read_until(answer), timeout or self.timeout)
+            except asyncio.TimeoutError:
+                raise EngineError(f'No {answer} from {self.target} within {timeout or self.timeout}s') from None
+
+    async def uci(self, timeout: Optional[float] = None) -> Dict[str, str]:
+        """Initializes the engine, returns its id (name & author)"""
+        info = {}
+        self.position.reset()
+        for line in await self._command('uci', 'uciok', timeout):
+            self.position.parse_uci_line(line)
+            for key in ('name', 'author'):
+                if line.startswith(f'id {key} '):
+                    info[key] = line[len(f'id {key} '):].strip()
+        return info
+
+    async def isready(self, timeout: Optional[float] = None):
+        await self._command('isready', 'readyok', timeout)
+
+    async def set_position(self, fen: Optional[str] = None, moves: Sequence[str] = ()):
+        """Sets the position to search (the start position if fen is None), the engine does not answer"""
+        self.position.reset()
+        await self.send(position_command(fen, moves))
+
+    async def update_position(self, board: Board):
+        """Brings the engine to the position of board, sending only the moves played since the last update if the
+        adapter supports it (see engine/position.py)
+        """
+        command = self.position.command(board)
+        if command is not None:
+            await self.send(command)
+
+    async def go(self, movetime: Optional[int] = None, depth: Optional[int] = None, timeout: Optional[float] = None,
+                 on_info: Optional[Callable[[str], None]] = None) -> SearchResult:
+        """Searches the current position and returns the bestmove. movetime is in milliseconds; without a timeout
+        the search may run GO_TIMEOUT_MARGIN seconds longer than movetime before it is stopped. If the coroutine is
+        cancelled or times out, the search is stopped and its bestmove is consumed so the session stays usable.
+        """
+        command = ['go']
+        if movetime is not None:
+            command.append(f'movetime {movetime}')
+        if depth is not None:
+            command.append(f'depth {depth}')
+        if movetime is None and depth is None:
+            command.append('infinite')  # only ends with stop()
+        if timeout is None and movetime is not None:
+            timeout = movetime / 1000 + GO_TIMEOUT_MARGIN
+
+        async with self.lock:
+            await self.send(' '.join(command))
+            self.searching = True
+            read = asyncio.ensure_future(self._read_until('bestmove', on_info))
+            try:
+                lines = await asyncio.wait_for(asyncio.shield(read), timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                await self._stop_search(read)
+                if isinstance(e, asyncio.TimeoutError):
+                    raise EngineError(f'No bestmove from {self.target} within {timeout}s') from None
+                raise
+            finally:
+                self.searching = False
+
+        parts = lines[-1].split()
+        ponder = parts[3] if len(parts) >= 4 and parts[2] == 'ponder' else None
+        return SearchResult(parts[1] if len(parts) > 1 else '(none)', ponder, lines[:-1])
+
+    async def _stop_search(self, read: asyncio.Future):
+        """Stops a running search and waits (briefly) for its bestmove, a bestmove that comes later is discarded"""
+        try:
+            await self.send('stop')
+            await asyncio.wait_for(read, STOP_TIMEOUT)
+        except (asyncio.TimeoutError, EngineError):
+            read.cancel()
+            await asyncio.gather(read, return_exceptions=True)
+            self.staleSearches += 1
+
+    async def stop(self):
+        """Asks the engine to end the current search, the running go() returns its bestmove"""
+        if self.searching:
+            await self.send('stop')
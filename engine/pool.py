@@ -0,0 +1,176 @@
+"""Pool of engine sessions spread over several adapter endpoints.
+
+The pool keeps one warm grpc.aio channel per endpoint and sessions_per_endpoint initialized EngineClients on it
+(uci + isready are done once, not per game). Work is dispatched to the healthy session with the least load (running
+plus queued searches), and a background task checks idle sessions with isready and reconnects the ones that failed.
+An engine searches one position at a time, so throughput scales with the number of sessions.
+
+Usage:
+    async with EnginePool(['localhost:50051', 'localhost:50052']) as pool:
+        results = await asyncio.gather(*(pool.search(board, movetime=500) for board in boards))
+
+        async with pool.acquire() as engine:  # exclusive use of one session
+            await engine.set_position(moves=['e2e4'])
+            result = await engine.go(depth=10)
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Sequence
+
+import grpc
+
+from engine.client import DEFAULT_COMMAND_TIMEOUT, EngineClient, EngineError, SearchResult
+from lib.board import Board
+
+DEFAULT_HEALTH_INTERVAL = 5.0  # seconds between two health checks of a session
+
+
+class PooledEngine:
+    """One session of the pool and its bookkeeping"""
+
+    def __init__(self, endpoint: str, channel: grpc.aio.Channel, timeout: float):
+        self.endpoint = endpoint
+        self.channel = channel
+        self.timeout = timeout
+        self.client: Optional[EngineClient] = None
+        self.lock = asyncio.Lock()  # held by whoever uses the session
+        self.load: int = 0  # searches running or waiting for this session
+        self.healthy: bool = False
+        self.completed: int = 0
+        self.failures: int = 0
+        self.info: Dict[str, str] = {}
+
+    async def connect(self) -> bool:
+        """(Re)opens the session and initializes the engine, returns whether it is healthy"""
+        await self.disconnect()
+        self.client = EngineClient(self.endpoint, self.timeout, channel=self.channel)
+        try:
+            await self.client.connect()
+            self.info = await self.client.uci()
+            await self.client.isready()
+            self.healthy = True
+        except EngineError as e:
+            logging.warning(f'Engine at {self.endpoint} is not available: {e}')
+            self.healthy = False
+        return self.healthy
+
+    async def disconnect(self):
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+        self.healthy = False
+
+    async def check(self):
+        """Pings an idle session with isready and reconnects it if it does not answer"""
+        if self.lock.locked():
+            return  # busy sessions are evidently alive, failures of their work mark them unhealthy
+
+        async with self.lock:
+            if self.healthy:
+                try:
+                    await self.client.isready()
+                    return
+                except EngineError as e:
+                    logging.warning(f'Engine at {self.endpoint} failed its health check: {e}')
+                    self.failures += 1
+            await self.connect()
+
+
+class EnginePool:
+    def __init__(self, endpoints: Sequence[str], sessions_per_endpoint: int = 1,
+                 health_interval: float = DEFAULT_HEALTH_INTERVAL, timeout: float = DEFAULT_COMMAND_TIMEOUT):
+        if not endpoints or sessions_per_endpoint < 1:
+            raise ValueError('An engine pool needs at least one endpoint and session')
+
+        self.endpoints = list(endpoints)
+        self.sessionsPerEndpoint = sessions_per_endpoint
+        self.healthInterval = health_interval
+        self.timeout = timeout
+        self.channels: Dict[str, grpc.aio.Channel] = {}
+        self.engines: List[PooledEngine] = []
+        self.healthTask: Optional[asyncio.Task] = None
+        self.nextIndex = 0  # rotates the start of the least loaded search, so equal loads are spread evenly
+
+    async def __aenter__(self) -> 'EnginePool':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_):
+        await self.close()
+
+    async def start(self):
+        """Opens the channels and initializes all sessions concurrently, unreachable ones start out unhealthy"""
+        for endpoint in self.endpoints:
+            self.channels[endpoint] = grpc.aio.insecure_channel(endpoint)
+            for _ in range(self.sessionsPerEndpoint):
+                self.engines.append(PooledEngine(endpoint, self.channels[endpoint], self.timeout))
+
+        await asyncio.gather(*(engine.connect() for engine in self.engines))
+        if self.healthInterval:
+            self.healthTask = asyncio.ensure_future(self._check_health())
+
+    async def close(self):
+        if self.healthTask is not None:
+            self.healthTask.cancel()
+            await asyncio.gather(self.healthTask, return_exceptions=True)
+            self.healthTask = None
+
+        await asyncio.gather(*(engine.disconnect() for engine in self.engines))
+        await asyncio.gather(*(channel.close() for channel in self.channels.values()))
+        self.engines = []
+        self.channels = {}
+
+    async def _check_health(self):
+        while True:
+            await asyncio.sleep(self.healthInterval)
+            results = await asyncio.gather(*(engine.check() for engine in self.engines), return_exceptions=True)
+            for engine, result in zip(self.engines, results):
+                if isinstance(result, Exception):  # keep checking the other sessions
+                    logging.error(f'Health check of the engine at {engine.endpoint} failed: {result!r}')
+
+    def _least_loaded(self) -> PooledEngine:
+        count = len(self.engines)
+        candidates = [self.engines[(self.nextIndex + i) % count] for i in range(count)]
+        candidates = [engine for engine in candidates if engine.healthy]
+        if not candidates:
+            raise EngineError('No healthy engine in the pool')
+
+        self.nextIndex = (self.nextIndex + 1) % count
+        return min(candidates, key=lambda engine: engine.load)
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Gives exclusive use of the least loaded healthy session (waiting until it is free)"""
+        engine = self._least_loaded()
+        engine.load += 1
+        try:
+            async with engine.lock:
+                if not engine.healthy:
+                    raise EngineError(f'Engine at {engine.endpoint} became unhealthy')
+                try:
+                    yield engine.client
+                except EngineError:
+                    engine.healthy = False  # the health check reconnects it
+                    engine.failures += 1
+                    raise
+                engine.completed += 1
+        finally:
+            engine.load -= 1
+
+    async def search(self, board: Board, movetime: Optional[int] = None, depth: Optional[int] = None,
+                     timeout: Optional[float] = None) -> SearchResult:
+        """Searches the position of board on the least loaded session"""
+        async with self.acquire() as engine:
+            await engine.update_position(board)
+            return await engine.go(movetime=movetime, depth=depth, timeout=timeout)
+
+    def stats(self) -> List[dict]:
+        return [{
+            "endpoint": engine.endpoint,
+            "name": engine.info.get("name"),
+            "healthy": engine.healthy,
+            "load": engine.load,
+            "completed": engine.completed,
+            "failures": engine.failures,
+        } for engine in self.engines]
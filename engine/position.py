@@ -0,0 +1,119 @@
+"""Keeps track of the position the engine already knows, so every engine turn only sends what changed.
+
+UCI has no incremental position command: a plain engine always gets the fen after the last irreversible move (capture
+or pawn move) plus the moves played since, which it needs for repetition detection. That keeps the command bounded
+by the fifty move rule instead of growing with the game. Adapters that announce ADAPTER_DELTA_OPTION in their uci
+output keep the engine's position themselves and accept POSITION_DELTA_COMMAND with only the moves played since the
+last command. Whenever the game does not continue the known position (new game, take backs, a new fen) the full
+command is sent again.
+
+Usage:
+    tracker = PositionTracker()
+    for line in uci_output:
+        tracker.parse_uci_line(line)
+    ...
+    command = tracker.command(board)  # None if the engine already knows the position
+"""
+from typing import List, Optional
+
+from lib.board import Board
+from lib.constants import START_FEN
+
+ADAPTER_DELTA_OPTION = 'option name AdapterPositionDelta type check default true'
+POSITION_DELTA_COMMAND = 'position delta'
+
+
+def full_position_command(board: Board) -> str:
+    """Returns 'position fen <fen after the last irreversible move> [moves <moves played since>]'"""
+    # moves before the last capture or pawn move can't be repeated anymore -> the engine only needs the fen of the
+    # position after that move and the moves played since (it needs them to detect repetitions)
+    reversible_moves = min(board.fiftyMove, board.histPly)
+    moves = history_moves(board, board.histPly - reversible_moves)
+    root = board.clone()
+    for _ in range(reversible_moves):
+        root.take_move()
+
+    command = ' '.join(['position', 'fen', root.to_fen()])
+    if moves:
+        command = ' '.join([command, 'moves', *moves])
+    return command
+
+
+def history_moves(board: Board, start: int = 0) -> List[str]:
+    """Returns the uci moves played on board since parse_fen, starting with the move of ply start"""
+    print_move = board.moveGenerator.print_move
+    return [print_move(board.history[ply].move) for ply in range(start, board.histPly)]
+
+
+def apply_position_command(board: Board, command: str):
+    """Sets up board like an engine receiving command would: 'position startpos|fen <fen> [moves ...]' or
+    POSITION_DELTA_COMMAND with the moves to play on top of the current position. Raises ValueError for invalid
+    commands or illegal moves.
+    """
+    tokens = command.split()
+    if len(tokens) < 2 or tokens[0] != 'position':
+        raise ValueError(f'Invalid position command: {command!r}')
+
+    moves_index = tokens.index('moves') if 'moves' in tokens else len(tokens)
+    if tokens[1] == 'delta':
+        moves = tokens[2:]
+    elif tokens[1] == 'startpos':
+        board.parse_fen(START_FEN)
+        moves = tokens[moves_index + 1:]
+    elif tokens[1] == 'fen':
+        board.parse_fen(' '.join(tokens[2:moves_index]))
+        moves = tokens[moves_index + 1:]
+    else:
+        raise ValueError(f'Invalid position command: {command!r}')
+
+    for move_str in moves:
+        board.push_uci(move_str)
+
+
+class PositionTracker:
+    def __init__(self, incremental: bool = False):
+        self.incremental = incremental  # the adapter accepts POSITION_DELTA_COMMAND
+        # what the engine knows: key of the position the board was set up with, number of moves played from it and
+        # the key of the resulting position
+        self.rootKey: Optional[int] = None
+        self.knownPlies: int = 0
+        self.knownKey: Optional[int] = None
+
+    def reset(self):
+        """Forgets the engine position, i.e. after ucinewgame or a reconnect"""
+        self.rootKey = None
+        self.knownPlies = 0
+        self.knownKey = None
+
+    def parse_uci_line(self, line: str):
+        """Detects the delta capability in the output of the uci command"""
+        if line.strip() == ADAPTER_DELTA_OPTION:
+            self.incremental = True
+
+    def _is_known_prefix(self, board: Board, root_key: int) -> bool:
+        if root_key != self.rootKey or self.knownPlies > board.histPly:
+            return False
+        # history[ply].posKey is the key of the position before the move of that ply
+        key = board.posKey if self.knownPlies == board.histPly else board.history[self.knownPlies].posKey
+        return key == self.knownKey
+
+    def command(self, board: Board) -> Optional[str]:
+        """Returns the command that brings the engine to the position of board (which has to be set up with
+        parse_fen and make_move) and remembers it as known, or None if the engine is already there
+        """
+        root_key = board.history[0].posKey if board.histPly else board.posKey
+        if self._is_known_prefix(board, root_key):
+            if self.knownPlies == board.histPly:
+                return None
+            if self.incremental:
+                command = ' '.join([POSITION_DELTA_COMMAND, *history_moves(board, self.knownPlies)])
+                self._remember(board, root_key)
+                return command
+
+        self._remember(board, root_key)
+        return full_position_command(board)
+
+    def _remember(self, board: Board, root_key: int):
+        self.rootKey = root_key
+        self.knownPlies = board.histPly
+        self.knownKey = board.posKey
@@ -0,0 +1,73 @@
+"""Client of the streaming EngineSession rpc of the adapter.
+
+One session keeps a single bidirectional stream open for a whole game. Commands are queued and written to the stream
+without waiting for the previous command to be answered, so a turn like 'position ...' + 'go ...' costs no extra
+round trips. Every line the engine prints is passed to a callback (on a background thread) as soon as it arrives.
+
+Usage:
+    session = EngineSession(stub, on_line=print)
+    session.send('uci')
+    session.send('position startpos moves e2e4', 'go movetime 1000')
+    ...
+    session.close()
+"""
+import logging
+import queue
+import threading
+from typing import Callable, Optional
+
+import grpc
+import protos.adapter_pb2
+
+_CLOSE = None  # sentinel ending the request stream
+
+
+class EngineSession:
+    def __init__(self, stub, on_line: Callable[[str], None], on_error: Optional[Callable[[Exception], None]] = None):
+        self.on_line = on_line
+        self.on_error = on_error
+        self.closed = False
+        self.requests: queue.Queue = queue.Queue()
+        # grpc consumes the request iterator on its own thread, the stream stays open until the sentinel is queued
+        self.responses = stub.EngineSession(iter(self.requests.get, _CLOSE))
+        self.reader = threading.Thread(target=self._read_responses, name='engine-session', daemon=True)
+        self.reader.start()
+
+    def send(self, *commands: str):
+        """Queues uci commands (a trailing newline is added if missing), they are sent in order without waiting"""
+        if self.closed:
+            raise RuntimeError('Engine session is closed')
+
+        for command in commands:
+            text = command if command.endswith('\n') else command + '\n'
+            self.requests.put(protos.adapter_pb2.Request(text=text))
+
+    def _read_responses(self):
+        try:
+            for response in self.responses:
+                # the adapter sends one line per response, split anyway in case it batches them
+                for line in response.text.splitlines():
+                    if line.strip():
+                        self._handle_line(line.strip())
+        except grpc.RpcError as e:
+            if self.closed and e.code() == grpc.StatusCode.CANCELLED:
+                return
+            logging.error(f'Engine session failed: {e.code()} {e.details()}')
+            if self.on_error is not None:
+                self.on_error(e)
+
+    def _handle_line(self, line: str):
+        try:
+            self.on_line(line)
+        except Exception:  # a failing callback must not end the session
+            logging.exception(f'Handling engine output {line!r} failed')
+
+    def close(self, timeout: float = 1.0):
+        """Ends the request stream and stops reading responses"""
+        if self.closed:
+            return
+
+        self.closed = True
+        self.requests.put(_CLOSE)
+        self.responses.cancel()
+        self.reader.join(timeout)
@@ -0,0 +1,6 @@
+import os
+
+# the hot path instrumentation is opt-in, see lib/instrument.py
+if os.environ.get("SLINKY_INSTRUMENT"):
+    from lib.instrument import enable_from_environment
+    enable_from_environment()
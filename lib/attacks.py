@@ -0,0 +1,107 @@
+from lib.constants import *
+
+
+class AttackMap:
+    """Incrementally maintained count of attackers on every square for both sides.
+    counts[side][sq] holds the number of pieces of side that attack sq, so is_square_attacked becomes a single
+    list read. The board notifies the map every time a piece is added to or removed from a square. Besides the
+    attacks of the piece itself, this also extends or cuts the rays of all sliding pieces passing through it.
+    """
+
+    def __init__(self, board):
+        self.pos = board
+        self.counts: List[List[int]] = [[0] * BOARD_SQUARE_NUMBER, [0] * BOARD_SQUARE_NUMBER]
+        self.rebuild()
+
+    def copy(self, board) -> 'AttackMap':
+        """Returns a copy of the attack counts that is bound to (and updated by) another board"""
+        attack_map = AttackMap.__new__(AttackMap)
+        attack_map.pos = board
+        attack_map.counts = [list(self.counts[WHITE]), list(self.counts[BLACK])]
+        return attack_map
+
+    def rebuild(self):
+        """Recomputes the attack counts of both sides from scratch"""
+        for side in (WHITE, BLACK):
+            counts = self.counts[side]
+            for sq in range(BOARD_SQUARE_NUMBER):
+                counts[sq] = 0
+
+        for piece in PIECE_RANGE:
+            if piece == EMPTY:
+                continue
+
+            for sq in self.pos.pieceList[piece]:
+                self._update_piece_attacks(sq, piece, 1)
+
+    def is_square_attacked(self, sq: int, side: int) -> bool:
+        return self.counts[side][sq] != 0
+
+    def on_add_piece(self, sq: int, piece: int):
+        """Has to be called once piece is placed on sq"""
+        self._update_rays_through(sq, -1)  # sq now blocks sliding pieces that were attacking through it
+        self._update_piece_attacks(sq, piece, 1)
+
+    def on_remove_piece(self, sq: int, piece: int):
+        """Has to be called before piece is removed from sq"""
+        self._update_piece_attacks(sq, piece, -1)
+        self._update_rays_through(sq, 1)  # sliding pieces blocked by sq can now see past it
+
+    def _update_piece_attacks(self, sq: int, piece: int, delta: int):
+        """Adds (delta=1) or removes (delta=-1) the attacks of a piece standing on sq"""
+        pieces = self.pos.pieces
+        counts = self.counts[PIECE_COLOR_MAP[piece]]
+
+        if IS_PIECE_PAWN[piece]:
+            targets = (sq + 9, sq + 11) if piece == WHITE_PAWN else (sq - 9, sq - 11)
+            for to_sq in targets:
+                if pieces[to_sq] != OFF_BOARD:
+                    counts[to_sq] += delta
+
+        elif IS_PIECE_SLIDING[piece]:
+            for index in range(DIRECTIONS_OF_MOVEMENT[piece]):
+                dir_ = PIECE_MOVEMENT_INCREMENT[piece][index]
+                to_sq = sq + dir_
+                pce = pieces[to_sq]
+                while pce != OFF_BOARD:
+                    counts[to_sq] += delta
+                    if pce != EMPTY:
+                        break
+
+                    to_sq += dir_
+                    pce = pieces[to_sq]
+
+        else:
+            for index in range(DIRECTIONS_OF_MOVEMENT[piece]):
+                to_sq = sq + PIECE_MOVEMENT_INCREMENT[piece][index]
+                if pieces[to_sq] != OFF_BOARD:
+                    counts[to_sq] += delta
+
+    def _update_rays_through(self, sq: int, delta: int):
+        """Extends (delta=1) or cuts (delta=-1) the rays of all sliding pieces that attack sq, beyond sq"""
+        pieces = self.pos.pieces
+
+        for directions, is_slider in ((ROOK_MOVE_INCREMENT, IS_PIECE_ROOK_QUEEN),
+                                      (BISHOP_MOVE_INCREMENT, IS_PIECE_BISHOP_QUEEN)):
+            for dir_ in directions:
+                # find the first piece in this direction
+                slider_sq = sq + dir_
+                pce = pieces[slider_sq]
+                while pce == EMPTY:
+                    slider_sq += dir_
+                    pce = pieces[slider_sq]
+
+                if pce == OFF_BOARD or not is_slider[pce]:
+                    continue
+
+                # the slider attacks sq from the dir_ side -> its ray continues on the opposite side of sq
+                counts = self.counts[PIECE_COLOR_MAP[pce]]
+                to_sq = sq - dir_
+                pce = pieces[to_sq]
+                while pce != OFF_BOARD:
+                    counts[to_sq] += delta
+                    if pce != EMPTY:
+                        break
+
+                    to_sq -= dir_
+                    pce = pieces[to_sq]
@@ -0,0 +1,143 @@
+"""Vectorized operations over many positions at once.
+
+BoardBatch stores N positions as an (N, 120) int8 numpy array that uses exactly the same 120 square mailbox
+layout and piece values as Board.pieces (OFF_BOARD = 100 still fits into int8). Every operation works on all
+positions in one go, which makes bulk jobs like material counts, draw detection or check tests over millions of
+positions cheap compared to calling the scalar Board methods in a python loop.
+
+Requires numpy.
+"""
+from typing import Iterable, Union
+
+import numpy as np
+
+from lib.board import Board
+from lib.constants import *
+
+
+def _piece_table(pieces: Iterable[int]) -> np.ndarray:
+    """Returns a boolean lookup table indexed by piece value (including OFF_BOARD) that is set for given pieces"""
+    table = np.zeros(OFF_BOARD + 1, dtype=bool)
+    table[list(pieces)] = True
+    return table
+
+
+# Attacker lookup tables for each attacking side
+_KNIGHTS = [_piece_table([WHITE_KNIGHT]), _piece_table([BLACK_KNIGHT])]
+_KINGS = [_piece_table([WHITE_KING]), _piece_table([BLACK_KING])]
+_ROOKS_QUEENS = [_piece_table([WHITE_ROOK, WHITE_QUEEN]), _piece_table([BLACK_ROOK, BLACK_QUEEN])]
+_BISHOPS_QUEENS = [_piece_table([WHITE_BISHOP, WHITE_QUEEN]), _piece_table([BLACK_BISHOP, BLACK_QUEEN])]
+
+# Offsets (from the attacked square) at which a pawn of the attacking side stands
+_PAWN_ATTACKER_OFFSETS = [(-11, -9), (11, 9)]
+
+
+class BoardBatch:
+    """N positions stored as an (N, 120) int8 mailbox array plus the side to move of each of them"""
+
+    def __init__(self, pieces: np.ndarray, side: np.ndarray):
+        assert pieces.ndim == 2 and pieces.shape[1] == BOARD_SQUARE_NUMBER
+        assert side.shape == (pieces.shape[0],)
+
+        self.pieces = pieces.astype(np.int8, copy=False)
+        self.side = side.astype(np.int8, copy=False)
+
+    def __len__(self) -> int:
+        return len(self.pieces)
+
+    @classmethod
+    def from_boards(cls, boards: Iterable[Board]) -> 'BoardBatch':
+        boards = list(boards)
+        pieces = np.array([board.pieces for board in boards], dtype=np.int8).reshape(-1, BOARD_SQUARE_NUMBER)
+        side = np.array([board.side for board in boards], dtype=np.int8)
+        return cls(pieces, side)
+
+    @classmethod
+    def from_fens(cls, fens: Iterable[str]) -> 'BoardBatch':
+        board = Board()
+        pieces = []
+        side = []
+        for fen in fens:
+            board.parse_fen(fen)
+            pieces.append(list(board.pieces))
+            side.append(board.side)
+
+        return cls(np.array(pieces, dtype=np.int8).reshape(-1, BOARD_SQUARE_NUMBER), np.array(side, dtype=np.int8))
+
+    def piece_counts(self) -> np.ndarray:
+        """Returns an (N, 13) array with the same content as Board.pieceNumber for every position"""
+        counts = np.zeros((len(self), len(PIECE_RANGE)), dtype=np.int32)
+        for piece in PIECE_RANGE:
+            if piece != EMPTY:
+                counts[:, piece] = np.count_nonzero(self.pieces == piece, axis=1)
+
+        return counts
+
+    def king_squares(self, side: int) -> np.ndarray:
+        """Returns the square of the king of given side for every position (NO_SQUARE if there is none)"""
+        is_king = self.pieces == SIDE_PIECES[side][-1]
+        return np.where(is_king.any(axis=1), is_king.argmax(axis=1), NO_SQUARE)
+
+    def is_position_draw(self, counts: np.ndarray = None) -> np.ndarray:
+        """Vectorized Board.is_position_draw(): True for every position without enough material to mate.
+        Already computed piece_counts() can be passed in to avoid counting the pieces again.
+        """
+        if counts is None:
+            counts = self.piece_counts()
+
+        draw = (counts[:, [WHITE_PAWN, BLACK_PAWN, WHITE_ROOK, BLACK_ROOK, WHITE_QUEEN, BLACK_QUEEN]] == 0).all(axis=1)
+        draw &= (counts[:, [WHITE_BISHOP, BLACK_BISHOP, WHITE_KNIGHT, BLACK_KNIGHT]] <= 1).all(axis=1)
+        draw &= (counts[:, WHITE_KNIGHT] == 0) | (counts[:, WHITE_BISHOP] == 0)
+        draw &= (counts[:, BLACK_KNIGHT] == 0) | (counts[:, BLACK_BISHOP] == 0)
+        return draw
+
+    def is_square_attacked(self, sq: Union[int, np.ndarray], side: Union[int, np.ndarray]) -> np.ndarray:
+        """Vectorized Board.is_square_attacked(): sq and side (the attacking side) are either the same for all
+        positions or given per position. Returns a boolean array with one entry per position.
+        """
+        sq = np.broadcast_to(np.asarray(sq, dtype=np.int64), (len(self),))
+        side = np.broadcast_to(np.asarray(side, dtype=np.int64), (len(self),))
+
+        attacked = np.zeros(len(self), dtype=bool)
+        for attacking_side in (WHITE, BLACK):
+            rows = np.flatnonzero(side == attacking_side)
+            if len(rows):
+                attacked[rows] = self._is_attacked_by(rows, sq[rows], attacking_side)
+
+        return attacked
+
+    def in_check(self) -> np.ndarray:
+        """Returns True for every position where the side to move is in check"""
+        in_check = np.zeros(len(self), dtype=bool)
+        for side in (WHITE, BLACK):
+            rows = np.flatnonzero((self.side == side) & (self.king_squares(side) != NO_SQUARE))
+            if len(rows):
+                king_sq = self.king_squares(side)[rows]
+                in_check[rows] = self._is_attacked_by(rows, king_sq, side ^ 1)
+
+        return in_check
+
+    def _is_attacked_by(self, rows: np.ndarray, sq: np.ndarray, side: int) -> np.ndarray:
+        pieces = self.pieces
+
+        pawn = SIDE_PIECES[side][0]
+        attacked = np.zeros(len(rows), dtype=bool)
+        for offset in _PAWN_ATTACKER_OFFSETS[side]:
+            attacked |= pieces[rows, sq + offset] == pawn
+
+        for offsets, table in ((KNIGHT_MOVE_INCREMENT, _KNIGHTS[side]), (KING_MOVE_INCREMENT, _KINGS[side])):
+            for offset in offsets:
+                attacked |= table[pieces[rows, sq + offset]]
+
+        for directions, table in ((ROOK_MOVE_INCREMENT, _ROOKS_QUEENS[side]),
+                                  (BISHOP_MOVE_INCREMENT, _BISHOPS_QUEENS[side])):
+            for dir_ in directions:
+                to_sq = sq.copy()
+                active = np.ones(len(rows), dtype=bool)  # rays that have not hit a piece or the board edge yet
+                while active.any():
+                    to_sq += dir_
+                    pce = pieces[rows, np.clip(to_sq, 0, BOARD_SQUARE_NUMBER - 1)]
+                    attacked |= active & table[pce]
+                    active &= pce == EMPTY
+
+        return attacked
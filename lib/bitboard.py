@@ -0,0 +1,384 @@
+"""Bitboard backend for the Board.
+
+Every piece type of every colour is stored as a 64-bit int where bit N is set if the piece is on square N
+(a1 = 0, h1 = 7, a8 = 56, h8 = 63). Attack detection and move generation are done with shifts and masks
+over precomputed attack tables instead of walking rays square by square.
+
+The mailbox (120-square pieces list) is still kept up to date next to the bitboards since it is the fastest
+way to answer "what piece is on this square" and the rest of the code base (GUI, move ints, parse_move etc.)
+is built around 120-based squares. Generated move ints are therefore identical to the ones of the
+mailbox backend.
+"""
+from array import array
+from typing import List
+
+from lib.board import Board
+from lib.checks import release_variant
+from lib.constants import *
+from lib.movegenerator import MoveGenerator, get_move_int
+
+
+BB_ALL = (1 << 64) - 1
+BB_FILE_A = 0x0101010101010101
+BB_FILE_H = BB_FILE_A << 7
+BB_RANK_1 = 0xFF
+BB_RANK_3 = BB_RANK_1 << 16
+BB_RANK_6 = BB_RANK_1 << 40
+BB_RANK_8 = BB_RANK_1 << 56
+BB_NOT_FILE_A = BB_ALL ^ BB_FILE_A
+BB_NOT_FILE_H = BB_ALL ^ BB_FILE_H
+
+# Square conversions between the 120 and 64 square representation
+SQ64_TO_SQ120: List[int] = [(21 + sq % 8) + (sq // 8) * 10 for sq in range(64)]
+SQ120_TO_SQ64: List[int] = [64] * BOARD_SQUARE_NUMBER
+for _sq in range(64):
+    SQ120_TO_SQ64[SQ64_TO_SQ120[_sq]] = _sq
+
+# Ray directions as (file, rank) steps. The first four increase the square index, the last four decrease it
+NORTH, EAST, NORTH_EAST, NORTH_WEST, SOUTH, WEST, SOUTH_WEST, SOUTH_EAST = range(8)
+DIRECTION_STEPS = [(0, 1), (1, 0), (1, 1), (-1, 1), (0, -1), (-1, 0), (-1, -1), (1, -1)]
+ROOK_DIRECTIONS_POSITIVE = (NORTH, EAST)
+ROOK_DIRECTIONS_NEGATIVE = (SOUTH, WEST)
+BISHOP_DIRECTIONS_POSITIVE = (NORTH_EAST, NORTH_WEST)
+BISHOP_DIRECTIONS_NEGATIVE = (SOUTH_WEST, SOUTH_EAST)
+
+
+def _step_mask(sq: int, steps) -> int:
+    """Returns a mask of all squares reachable from sq with a single step of any of the given (file, rank) steps"""
+    file, rank = sq % 8, sq // 8
+    mask = 0
+    for file_step, rank_step in steps:
+        to_file, to_rank = file + file_step, rank + rank_step
+        if 0 <= to_file < 8 and 0 <= to_rank < 8:
+            mask |= 1 << (to_rank * 8 + to_file)
+    return mask
+
+
+def _ray_mask(sq: int, direction: int) -> int:
+    """Returns a mask of all squares from sq (excluded) to the edge of the board in a given direction"""
+    file_step, rank_step = DIRECTION_STEPS[direction]
+    file, rank = sq % 8 + file_step, sq // 8 + rank_step
+    mask = 0
+    while 0 <= file < 8 and 0 <= rank < 8:
+        mask |= 1 << (rank * 8 + file)
+        file, rank = file + file_step, rank + rank_step
+    return mask
+
+
+KNIGHT_ATTACKS: List[int] = [
+    _step_mask(sq, [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]) for sq in range(64)]
+KING_ATTACKS: List[int] = [_step_mask(sq, DIRECTION_STEPS) for sq in range(64)]
+# PAWN_ATTACKS[side][sq] squares attacked by a pawn of given side standing on sq
+PAWN_ATTACKS: List[List[int]] = [
+    [_step_mask(sq, [(-1, 1), (1, 1)]) for sq in range(64)],
+    [_step_mask(sq, [(-1, -1), (1, -1)]) for sq in range(64)],
+]
+RAYS: List[List[int]] = [[_ray_mask(sq, direction) for sq in range(64)] for direction in range(8)]
+# all squares on the same rank & file (diagonals) as sq, used to skip slider tests when no slider is aligned
+ROOK_LINES: List[int] = [RAYS[NORTH][sq] | RAYS[EAST][sq] | RAYS[SOUTH][sq] | RAYS[WEST][sq] for sq in range(64)]
+BISHOP_LINES: List[int] = [RAYS[NORTH_EAST][sq] | RAYS[NORTH_WEST][sq] | RAYS[SOUTH_WEST][sq] | RAYS[SOUTH_EAST][sq]
+                           for sq in range(64)]
+
+# rook from & to squares (120-based) for each castling move, keyed by the king destination square
+CASTLE_ROOK_SQUARES = {
+    G1: (H1, F1),
+    C1: (A1, D1),
+    G8: (H8, F8),
+    C8: (A8, D8),
+}
+
+
+def iter_squares(bb: int):
+    """Yields the (64-based) index of every set bit of the bitboard, from the least significant one"""
+    while bb:
+        lsb = bb & -bb
+        yield lsb.bit_length() - 1
+        bb ^= lsb
+
+
+def rook_attacks(sq: int, occupied: int) -> int:
+    """Squares attacked by a rook on sq, given the occupancy of the board. Blockers are included"""
+    attacks = 0
+    for direction in ROOK_DIRECTIONS_POSITIVE:
+        ray = RAYS[direction][sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= RAYS[direction][(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+
+    for direction in ROOK_DIRECTIONS_NEGATIVE:
+        ray = RAYS[direction][sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= RAYS[direction][blockers.bit_length() - 1]
+        attacks |= ray
+
+    return attacks
+
+
+def bishop_attacks(sq: int, occupied: int) -> int:
+    """Squares attacked by a bishop on sq, given the occupancy of the board. Blockers are included"""
+    attacks = 0
+    for direction in BISHOP_DIRECTIONS_POSITIVE:
+        ray = RAYS[direction][sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= RAYS[direction][(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+
+    for direction in BISHOP_DIRECTIONS_NEGATIVE:
+        ray = RAYS[direction][sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= RAYS[direction][blockers.bit_length() - 1]
+        attacks |= ray
+
+    return attacks
+
+
+@release_variant
+class BitboardBoard(Board):
+    """Board backed by per piece bitboards. Exposes exactly the same api as the mailbox Board"""
+
+    def __init__(self, backend: str = BITBOARD_BACKEND):
+        # bitboards[piece] - squares occupied by the given piece, occupancy[WHITE/BLACK/BOTH] - occupied squares
+        self.bitboards: List[int] = [0] * 13
+        self.occupancy: List[int] = [0] * 3
+        super().__init__(backend)
+        self.moveGenerator = BitboardMoveGenerator(self)
+
+    def reset(self):
+        super().reset()
+        self.update_bitboards()
+
+    def parse_fen(self, fen: str):
+        super().parse_fen(fen)
+        self.update_bitboards()
+
+    def update_material_lists(self):
+        super().update_material_lists()
+        self.update_bitboards()
+
+    def clone(self) -> 'BitboardBoard':
+        board = super().clone()
+        board.bitboards = list(self.bitboards)
+        board.occupancy = list(self.occupancy)
+        return board
+
+    def update_bitboards(self):
+        """Rebuilds all bitboards from the pieces list"""
+        for piece in PIECE_RANGE:
+            self.bitboards[piece] = 0
+
+        self.occupancy[WHITE] = self.occupancy[BLACK] = 0
+        for sq64, sq120 in enumerate(SQ64_TO_SQ120):
+            piece = self.pieces[sq120]
+            if piece != EMPTY:
+                bit = 1 << sq64
+                self.bitboards[piece] |= bit
+                self.occupancy[PIECE_COLOR_MAP[piece]] |= bit
+
+        self.occupancy[BOTH] = self.occupancy[WHITE] | self.occupancy[BLACK]
+
+    def clear_piece(self, sq: int):
+        piece = self.pieces[sq]
+        super().clear_piece(sq)
+
+        mask = BB_ALL ^ (1 << SQ120_TO_SQ64[sq])
+        self.bitboards[piece] &= mask
+        self.occupancy[PIECE_COLOR_MAP[piece]] &= mask
+        self.occupancy[BOTH] &= mask
+
+    def add_piece(self, sq: int, piece: int):
+        super().add_piece(sq, piece)
+
+        bit = 1 << SQ120_TO_SQ64[sq]
+        self.bitboards[piece] |= bit
+        self.occupancy[PIECE_COLOR_MAP[piece]] |= bit
+        self.occupancy[BOTH] |= bit
+
+    def move_piece(self, from_: int, to: int):
+        piece = self.pieces[from_]
+        super().move_piece(from_, to)
+
+        bits = (1 << SQ120_TO_SQ64[from_]) | (1 << SQ120_TO_SQ64[to])
+        self.bitboards[piece] ^= bits
+        self.occupancy[PIECE_COLOR_MAP[piece]] ^= bits
+        self.occupancy[BOTH] ^= bits
+
+    def is_square_attacked(self, sq: int, side: int) -> bool:
+        """Determines if a given square is attacked from the opponent.
+        NOTE: side here is the attacking side
+        """
+        assert self.is_square_on_board(sq)
+        assert self.is_side_valid(side)
+
+        if self.attackMap is not None:
+            return self.attackMap.counts[side][sq] != 0
+
+        return self.is_square_attacked_64(SQ120_TO_SQ64[sq], side, self.occupancy[BOTH])
+
+    def is_square_attacked_64(self, sq64: int, side: int, occupied: int, removed: int = 0) -> bool:
+        """Bitboard version of is_square_attacked that works on a 64-based square and a given board occupancy.
+        Pieces on the squares of the removed mask are ignored as attackers (i.e. they were just captured).
+        """
+        bitboards = self.bitboards
+        keep = BB_ALL ^ removed
+        pawn, knight, bishop, rook, queen, king = SIDE_PIECES[side]
+
+        # a pawn of the attacking side attacks sq if a pawn of the other side on sq would attack it back
+        if PAWN_ATTACKS[side ^ 1][sq64] & bitboards[pawn] & keep:
+            return True
+
+        if KNIGHT_ATTACKS[sq64] & bitboards[knight] & keep:
+            return True
+
+        if KING_ATTACKS[sq64] & bitboards[king]:
+            return True
+
+        rooks_queens = (bitboards[rook] | bitboards[queen]) & keep & ROOK_LINES[sq64]
+        if rooks_queens and rook_attacks(sq64, occupied) & rooks_queens:
+            return True
+
+        bishops_queens = (bitboards[bishop] | bitboards[queen]) & keep & BISHOP_LINES[sq64]
+        if bishops_queens and bishop_attacks(sq64, occupied) & bishops_queens:
+            return True
+
+        return False
+
+    def is_move_legal(self, move_: int) -> bool:
+        """Checks if the side to move is left in check after the move, without making it on the board.
+        The occupancy after the move is computed with a couple of masks and the king square is tested against it.
+        """
+        from_ = get_from_square(move_)
+        to = get_to_square(move_)
+
+        assert self.is_square_on_board(from_)
+        assert self.is_square_on_board(to)
+        assert self.is_side_valid(self.side)
+        assert self.is_piece_valid(self.pieces[from_])
+
+        from_bit = 1 << SQ120_TO_SQ64[from_]
+        to_bit = 1 << SQ120_TO_SQ64[to]
+        occupied = (self.occupancy[BOTH] ^ from_bit) | to_bit
+        removed = to_bit  # a piece that is captured on the destination square can not attack anymore
+
+        if move_ & MOVE_FLAG_ENPASS != 0:
+            captured_bit = 1 << SQ120_TO_SQ64[to - 10 if self.side == WHITE else to + 10]
+            occupied ^= captured_bit
+            removed |= captured_bit
+
+        elif move_ & MOVE_FLAG_CASTLE != 0:
+            rook_from, rook_to = CASTLE_ROOK_SQUARES[to]
+            occupied ^= (1 << SQ120_TO_SQ64[rook_from]) | (1 << SQ120_TO_SQ64[rook_to])
+
+        if IS_PIECE_KING[self.pieces[from_]]:
+            king_sq64 = SQ120_TO_SQ64[to]
+        else:
+            king_sq64 = SQ120_TO_SQ64[self.kingSquare[self.side]]
+
+        return not self.is_square_attacked_64(king_sq64, self.side ^ 1, occupied, removed)
+
+
+@release_variant
+class BitboardMoveGenerator(MoveGenerator):
+    """Generates the same move ints as MoveGenerator, using bitboards of the BitboardBoard"""
+
+    def generate_pawn_moves_bb(self, moves: array, count: int) -> int:
+        pos = self.pos
+        side = pos.side
+        pawns = pos.bitboards[WHITE_PAWN if side == WHITE else BLACK_PAWN]
+        empty = BB_ALL ^ pos.occupancy[BOTH]
+        enemy = pos.occupancy[side ^ 1]
+        promotion_pieces = PROMOTION_PIECES[side]
+
+        if side == WHITE:
+            forward, left, right = 8, 7, 9
+            single = (pawns << 8) & empty
+            double = ((single & BB_RANK_3) << 8) & empty
+            captures_left = ((pawns & BB_NOT_FILE_A) << 7) & enemy
+            captures_right = ((pawns & BB_NOT_FILE_H) << 9) & enemy
+            promotion_rank = BB_RANK_8
+        else:
+            forward, left, right = -8, -9, -7
+            single = (pawns >> 8) & empty
+            double = ((single & BB_RANK_6) >> 8) & empty
+            captures_left = ((pawns & BB_NOT_FILE_A) >> 9) & enemy
+            captures_right = ((pawns & BB_NOT_FILE_H) >> 7) & enemy
+            promotion_rank = BB_RANK_1
+
+        for to64 in iter_squares(single):
+            from_, to = SQ64_TO_SQ120[to64 - forward], SQ64_TO_SQ120[to64]
+            if (1 << to64) & promotion_rank:
+                for promoted in promotion_pieces:
+                    moves[count] = get_move_int(from_, to, EMPTY, promoted, 0)
+                    count += 1
+            else:
+                moves[count] = get_move_int(from_, to, EMPTY, EMPTY, 0)
+                count += 1
+
+        for to64 in iter_squares(double):
+            moves[count] = get_move_int(SQ64_TO_SQ120[to64 - 2 * forward], SQ64_TO_SQ120[to64], EMPTY, EMPTY,
+                                        MOVE_FLAG_PAWN_START)
+            count += 1
+
+        for shift, captures in ((left, captures_left), (right, captures_right)):
+            for to64 in iter_squares(captures):
+                from_, to = SQ64_TO_SQ120[to64 - shift], SQ64_TO_SQ120[to64]
+                captured = pos.pieces[to]
+                if (1 << to64) & promotion_rank:
+                    for promoted in promotion_pieces:
+                        moves[count] = get_move_int(from_, to, captured, promoted, 0)
+                        count += 1
+                else:
+                    moves[count] = get_move_int(from_, to, captured, EMPTY, 0)
+                    count += 1
+
+        if pos.enPassantSquare != NO_SQUARE:
+            ep64 = SQ120_TO_SQ64[pos.enPassantSquare]
+            # pawns that could capture on the en passant square are the ones an enemy pawn there would attack
+            for from64 in iter_squares(PAWN_ATTACKS[side ^ 1][ep64] & pawns):
+                moves[count] = get_move_int(SQ64_TO_SQ120[from64], pos.enPassantSquare, EMPTY, EMPTY,
+                                            MOVE_FLAG_ENPASS)
+                count += 1
+
+        return count
+
+    def add_piece_moves_bb(self, from64: int, targets: int, moves: array, count: int) -> int:
+        pieces = self.pos.pieces
+        from_ = SQ64_TO_SQ120[from64]
+        for to64 in iter_squares(targets):
+            to = SQ64_TO_SQ120[to64]
+            moves[count] = get_move_int(from_, to, pieces[to], EMPTY, 0)
+            count += 1
+
+        return count
+
+    def generate_all_moves_into(self, moves: array) -> int:
+        pos = self.pos
+        side = pos.side
+        bitboards = pos.bitboards
+        occupied = pos.occupancy[BOTH]
+        not_own = BB_ALL ^ pos.occupancy[side]
+        _, knight, bishop, rook, queen, king = SIDE_PIECES[side]
+
+        count = self.generate_castling_moves(moves, 0)
+        count = self.generate_pawn_moves_bb(moves, count)
+
+        for sq64 in iter_squares(bitboards[knight]):
+            count = self.add_piece_moves_bb(sq64, KNIGHT_ATTACKS[sq64] & not_own, moves, count)
+
+        for sq64 in iter_squares(bitboards[bishop]):
+            count = self.add_piece_moves_bb(sq64, bishop_attacks(sq64, occupied) & not_own, moves, count)
+
+        for sq64 in iter_squares(bitboards[rook]):
+            count = self.add_piece_moves_bb(sq64, rook_attacks(sq64, occupied) & not_own, moves, count)
+
+        for sq64 in iter_squares(bitboards[queen]):
+            count = self.add_piece_moves_bb(
+                sq64, (rook_attacks(sq64, occupied) | bishop_attacks(sq64, occupied)) & not_own, moves, count)
+
+        for sq64 in iter_squares(bitboards[king]):
+            count = self.add_piece_moves_bb(sq64, KING_ATTACKS[sq64] & not_own, moves, count)
+
+        return count
@@ -1,31 +1,60 @@
-from copy import deepcopy
-
 from lib.constants import *
+from lib.attacks import AttackMap
 from lib.conversion import Conversion, convert_file_rank_to_square
 from lib.movegenerator import MoveGenerator
 from lib.history import Undo
+from lib.movecache import MoveCache
+from lib.checks import release_variant
 
 
+@release_variant
 class Board:
-    def __init__(self):
+    def __new__(cls, backend: str = MAILBOX_BACKEND):
+        # Board(backend=BITBOARD_BACKEND) constructs the bitboard implementation of the same api
+        if cls is Board and backend == BITBOARD_BACKEND:
+            from lib.bitboard import BitboardBoard  # imported here since the bitboard module depends on this one
+            cls = BitboardBoard
+        elif backend not in (MAILBOX_BACKEND, BITBOARD_BACKEND):
+            raise ValueError("Unknown board backend: {}".format(backend))
+
+        return super().__new__(cls)
+
+    def __init__(self, backend: str = MAILBOX_BACKEND):
+        self.backend: str = backend
         self.pieces: List[int] = [0] * BOARD_SQUARE_NUMBER
         self.side: int = 0
         self.playerJustMoved: int = BLACK  # At the root pretend the player just moved is p2 - p1 has the first move
         self.castlePermissions: int = 0  # castle permissions
         # position key is a unique key stored for each position (used to keep track of 3fold repetition)
-        self.posKey: c_uint64 = c_uint64(0)
+        self.posKey: int = 0
         self.kingSquare: List[int] = [0] * 2  # White's & black's king position
         self.enPassantSquare: int = 0  # square in which en passant capture is possible
         self.fiftyMove: int = 0  # how many moves from the fifty move rule have been made
         self.histPly: int = 0  # how many half moves have been made
-        # Create fixed size list that stores current position and variables before a move is made
-        self.history: List[Undo] = [Undo() for _ in range(MAX_GAME_MOVES)]
+        self.startPly: int = 0  # how many half moves had been made in the game before the position given to parse_fen
+        # how many times each position key occurs in the history (positions before the current one)
+        self.positionCounts: Dict[int, int] = {}
+        # Stores current position and variables before a move is made, grows as moves are made
+        self.history: List[Undo] = []
 
         # The piece list below make it easier to determine drawn positions or insufficient material
         self.pieceNumber: List[int] = [0] * 13  # how many pieces of each type are there currently on the lib
+        # Squares occupied by each piece type, so that we don't have to scan the whole lib to find pieces
+        self.pieceList: List[List[int]] = [[] for _ in range(13)]
+
+        # Optional incrementally updated attack counts, see set_attack_maps()
+        self.attackMap: Optional[AttackMap] = None
+        # Optional cache of legal moves per position key, see set_move_cache()
+        self.moveCache: Optional[MoveCache] = None
+        # Position key & result of the last get_mate_state() call
+        self.mateStateKey: Optional[int] = None
+        self.mateState: int = GAME_ONGOING
+        # Position key & legal moves by uci key of the last get_move_index() call
+        self.moveIndexKey: Optional[int] = None
+        self.moveIndex: Dict[int, int] = {}
 
         # Create related objects
-        self.hashData = HashData()
+        self.hashData = HASH_DATA
         self.moveGenerator = MoveGenerator(self)
         self.conversion = Conversion()
 
@@ -72,7 +101,7 @@ class Board:
             b_qca = "q"
 
         board_rep.append("castle: {}{}{}{}\n".format(w_kca, w_qca, b_kca, b_qca))
-        board_rep.append("PosKey: {}\n".format(self.posKey))
+        board_rep.append("PosKey: {:016x}\n".format(self.posKey))
 
         return ''.join(board_rep)
 
@@ -89,7 +118,7 @@ class Board:
         if self.castlePermissions != other.castlePermissions:
             return False
 
-        if self.posKey.value != other.posKey.value:
+        if self.posKey != other.posKey:
             return False
 
         if not len(self.kingSquare) == sum([1 for i, j in zip(self.kingSquare, other.kingSquare) if i == j]):
@@ -111,7 +140,7 @@ class Board:
 
     def __hash__(self):
         """Generate a unique hashkey for a given position"""
-        final_key: c_uint64 = 0
+        final_key: int = 0
 
         for sq in range(BOARD_SQUARE_NUMBER):
             piece = self.pieces[sq]
@@ -136,10 +165,68 @@ class Board:
 
         final_key ^= self.hashData.castleKeys[self.castlePermissions]
 
-        return c_uint64(final_key)
+        return final_key & HASH_KEY_MASK
 
     def __copy__(self):
-        return deepcopy(self)
+        return self.clone()
+
+    def clone(self) -> 'Board':
+        """Returns an independent copy of the board. Immutable tables (hash keys, square conversions) are shared
+        with the original and only the mutable position state is copied, which is much cheaper than deepcopy.
+        """
+        board = object.__new__(type(self))
+        board.__dict__.update(self.__dict__)
+
+        board.pieces = list(self.pieces)
+        board.kingSquare = list(self.kingSquare)
+        board.history = [undo.copy() for undo in self.history[:self.histPly]]
+        board.positionCounts = dict(self.positionCounts)
+        board.pieceNumber = list(self.pieceNumber)
+        board.pieceList = [list(piece_list) for piece_list in self.pieceList]
+        board.moveGenerator = type(self.moveGenerator)(board)
+        if self.attackMap is not None:
+            board.attackMap = self.attackMap.copy(board)
+
+        return board
+
+    def snapshot(self) -> tuple:
+        """Returns the position (including the history of moves that lead to it) as an immutable & picklable tuple.
+        It can be turned back to a board with Board.from_snapshot() or restore().
+        """
+        history = tuple((undo.move, undo.castlePermissions, undo.enPassantSquare, undo.fiftyMove, undo.posKey)
+                        for undo in self.history[:self.histPly])
+
+        return (tuple(self.pieces), self.side, self.playerJustMoved, self.castlePermissions, self.enPassantSquare,
+                self.fiftyMove, self.histPly, self.startPly, self.posKey, history)
+
+    def restore(self, snapshot: tuple):
+        """Sets the board to the position of a snapshot created with snapshot()"""
+        (pieces, self.side, self.playerJustMoved, self.castlePermissions, self.enPassantSquare, self.fiftyMove,
+         self.histPly, self.startPly, self.posKey, history) = snapshot
+
+        self.reset_material_lists()
+        self.pieces[:] = pieces
+
+        self.history = []
+        self.positionCounts.clear()
+        for move_, castle_permissions, en_passant_square, fifty_move, pos_key in history:
+            undo = Undo()
+            undo.move, undo.castlePermissions, undo.enPassantSquare = move_, castle_permissions, en_passant_square
+            undo.fiftyMove, undo.posKey = fifty_move, pos_key
+            self.history.append(undo)
+            self.positionCounts[pos_key] = self.positionCounts.get(pos_key, 0) + 1
+
+        self.update_material_lists()
+
+        if self.attackMap is not None:
+            self.attackMap.rebuild()
+
+    @classmethod
+    def from_snapshot(cls, snapshot: tuple, backend: str = None) -> 'Board':
+        """Creates a new board from a snapshot created with snapshot()"""
+        board = cls() if backend is None else cls(backend)
+        board.restore(snapshot)
+        return board
 
     def reset(self):
         # Set all lib positions to OFF_BOARD
@@ -150,189 +237,207 @@ class Board:
         for i in range(64):
             self.pieces[self.conversion.Sq64ToSq120[i]] = EMPTY
 
-        # Reset piece number
-        for i in range(13):  # todo replace magical number
-            self.pieceNumber[i] = 0
-
-        self.kingSquare[WHITE] = NO_SQUARE
-        self.kingSquare[BLACK] = NO_SQUARE
+        self.reset_material_lists()
 
         self.side = BOTH
         self.enPassantSquare = NO_SQUARE
         self.fiftyMove = 0
         self.histPly = 0
+        self.startPly = 0
+        self.positionCounts.clear()
         self.castlePermissions = 0
         self.posKey = 0
 
-    def _parse_fen_pieces(self, fen) -> int:
-        """Parses fen piece & square information and return char index of fen string at end of parsing"""
+    def reset_material_lists(self):
+        """Resets piece numbers, piece lists and king squares, they are rebuilt by update_material_lists()"""
+        for i in range(13):  # todo replace magical number
+            self.pieceNumber[i] = 0
+            self.pieceList[i].clear()
+
+        self.kingSquare[WHITE] = NO_SQUARE
+        self.kingSquare[BLACK] = NO_SQUARE
 
-        rank = RANK_8  # we start from rank 8 since the notation starts from rank 8
-        file = FILE_A
-        char_idx = 0
+    def parse_fen(self, fen: str):
+        """parse fen position string and setup a position accordingly.
+        Everything (pieces, material lists, king squares & position key) is set up in a single pass over the fen.
+        The half move clock & full move number fields are optional, the compact "w --" form (no castling & no en
+        passant square) is accepted as well. Any trailing fields (i.e. EPD operations) are ignored.
+        """
 
-        while (rank >= RANK_1) and char_idx < len(fen):
-            count = 1
-            char = fen[char_idx]
+        assert (fen != "")
 
-            if char in PIECE_NOTATION_MAP:
-                # If we have a piece related char -> set the piece to corresponding value, i.e p -> BLACK_PAWN
-                piece = PIECE_NOTATION_MAP[char]
-            elif char in ("1", "2", "3", "4", "5", "6", "7", "8"):
-                # otherwise it must be a count of a number of empty squares
-                piece = EMPTY
-                count = int(char)  # get number of empty squares and store in count
-            elif char in ("/", " "):
-                # if we have / or space then we are either at the end of the rank or at the end of the piece list
-                # -> reset variables and continue the while loop
+        self.reset()  # resets lib
+
+        fields = fen.split()
+        if len(fields) < 2:
+            raise ValueError("Invalid fen, expected at least pieces and side to move: {!r}".format(fen))
+
+        options = fields[2:]
+        if options and options[0] == "--":
+            options = ["-", "-"] + options[1:]  # compact form without a space between castling and en passant
+
+        pieces = self.pieces
+        piece_keys = self.hashData.pieceKeys
+        sq64_to_sq120 = self.conversion.Sq64ToSq120
+        key = 0
+
+        rank = RANK_8  # we start from rank 8 since the notation starts from rank 8
+        file = FILE_A
+        for char in fields[0]:
+            if char == "/" and file == FILE_H + 1 and rank > RANK_1:  # every rank has to fill all 8 files
                 rank -= 1
                 file = FILE_A
-                char_idx += 1
-                continue
+            elif "1" <= char <= "8":
+                file += int(char)  # skip over given number of empty squares
+            elif char in PIECE_NOTATION_MAP and file <= FILE_H:
+                piece = PIECE_NOTATION_MAP[char]
+                sq = sq64_to_sq120[rank * 8 + file]
+                pieces[sq] = piece
+                self.pieceNumber[piece] += 1
+                self.pieceList[piece].append(sq)
+                key ^= piece_keys[piece][sq]
+                file += 1
             else:
-                raise ValueError("------------!!! --- FEN error --- !!!------------------")
+                raise ValueError("Invalid fen piece placement: {!r}".format(fields[0]))
 
-            # This loop, skips over all empty positions in a rank
-            # When it comes to a piece that is different that "1"-"8" it places it on the corresponding square
-            for i in range(count):
-                sq64 = rank * 8 + file
-                sq120 = self.conversion.Sq64ToSq120[sq64]
-                if piece != EMPTY:
-                    self.pieces[sq120] = piece
+        if rank != RANK_1 or file != FILE_H + 1:  # all 8 ranks are given
+            raise ValueError("Invalid fen piece placement: {!r}".format(fields[0]))
 
-                file += 1
+        for colour, king in ((WHITE, WHITE_KING), (BLACK, BLACK_KING)):
+            if self.pieceList[king]:
+                self.kingSquare[colour] = self.pieceList[king][0]
 
-            char_idx += 1
+        if fields[1] not in ("w", "b"):
+            raise ValueError("Invalid fen side to move: {!r}".format(fields[1]))
 
-        return char_idx
+        self.side = WHITE if fields[1] == "w" else BLACK
+        self.playerJustMoved = BLACK if self.side == WHITE else WHITE
+        if self.side == WHITE:
+            key ^= self.hashData.sideKey
 
-    def _parse_fen_options(self, fen, char_idx):
-        """Parses position information i.e. en passant square, castling permission etc. from fen str and starting
-        char index (index points to part of fen that starts listing position options)
-        """
-        # char should be set to the side to move part of the FEN string here
-        char = fen[char_idx]
-        assert (char == "w" or char == "b")
+        castling = options[0] if options else "-"
+        if castling != "-":
+            for char in castling:
+                if char not in CASTLE_NOTATION_MAP:
+                    raise ValueError("Invalid fen castling permissions: {!r}".format(castling))
 
-        self.side = WHITE if char == "w" else BLACK
-        self.playerJustMoved = BLACK if self.side == WHITE else WHITE
+                self.castlePermissions |= CASTLE_NOTATION_MAP[char]
 
-        # move character pointer 2 characters further and it should now point to
-        # the start of the castling permissions part of FEN
-        char_idx += 2
-
-        # Iterate over the next 4 chars-they show if white is allowed to castle king or queenside and the same for black
-        for i in range(4):
-            char = fen[char_idx]
-            if char == " ":
-                # when we hit a space, it means there are no more castling permissions => break
-                break
-
-            # Depending on the char, enable the corresponding castling permission related bit
-            if char is "K":
-                self.castlePermissions |= WHITE_KING_CASTLING
-            elif char is "Q":
-                self.castlePermissions |= WHITE_QUEEN_CASTLING
-            elif char is "k":
-                self.castlePermissions |= BLACK_KING_CASTLING
-            elif char is "q":
-                self.castlePermissions |= BLACK_QUEEN_CASTLING
-            else:
-                break
+        key ^= self.hashData.castleKeys[self.castlePermissions]
 
-            char_idx += 1
+        en_passant = options[1] if len(options) > 1 else "-"
+        if en_passant != "-":
+            if len(en_passant) != 2 or en_passant[0] not in FILE_NOTATION_MAP or not "1" <= en_passant[1] <= "8":
+                raise ValueError("Invalid fen en passant square: {!r}".format(en_passant))
 
-        assert 0 <= self.castlePermissions <= 15
-        # move to the en passant square related part of FEN
-        char_idx += 1
-        char = fen[char_idx]
+            self.enPassantSquare = convert_file_rank_to_square(FILE_NOTATION_MAP[en_passant[0]],
+                                                               int(en_passant[1]) - 1)
+            key ^= piece_keys[EMPTY][self.enPassantSquare]
 
-        if char != "-":
-            file = FILE_NOTATION_MAP[char]
-            char_idx += 1
-            rank = int(fen[char_idx])  # get rank number
-            rank -= 1  # decrement rank to match our indexes, i.e. Rank1 == 0
+        # half move clock & full move number
+        if len(options) > 3 and options[2].isdigit() and options[3].isdigit():
+            self.fiftyMove = int(options[2])
+            self.startPly = max(0, 2 * (int(options[3]) - 1)) + self.side
 
-            assert FILE_A <= file <= FILE_H
-            assert RANK_1 <= rank <= RANK_8
+        self.posKey = key
 
-            self.enPassantSquare = convert_file_rank_to_square(file, rank)
+        if self.attackMap is not None:
+            self.attackMap.rebuild()
 
-    def parse_fen(self, fen: str):
-        """parse fen position string and setup a position accordingly"""
+    def to_fen(self) -> str:
+        """Returns the fen string of the current position"""
+        ranks = []
+        for rank in reversed(range(RANK_8 + 1)):
+            rank_chars = []
+            empty = 0
+            for file in range(FILE_H + 1):
+                piece = self.pieces[convert_file_rank_to_square(file, rank)]
+                if piece == EMPTY:
+                    empty += 1
+                    continue
 
-        assert (fen != "")
+                if empty:
+                    rank_chars.append(str(empty))
+                    empty = 0
+                rank_chars.append(PIECE_CHARACTER_STRING[piece])
 
-        self.reset()  # resets lib
+            if empty:
+                rank_chars.append(str(empty))
+            ranks.append(''.join(rank_chars))
 
-        char_idx = self._parse_fen_pieces(fen)
-        self._parse_fen_options(fen, char_idx)
+        castling = ''.join(char for char, permission in CASTLE_NOTATION_MAP.items()
+                           if self.castlePermissions & permission) or "-"
 
-        self.posKey = self.__hash__()  # generate pos key for new position
-        self.update_material_lists()
+        en_passant = "-"
+        if self.enPassantSquare != NO_SQUARE:
+            en_passant = (chr(ord("a") + self.conversion.FilesBoard[self.enPassantSquare]) +
+                          chr(ord("1") + self.conversion.RanksBoard[self.enPassantSquare]))
+
+        full_move = (self.startPly + self.histPly) // 2 + 1
+        return "{} {} {} {} {} {}".format('/'.join(ranks), SIDE_CHAR[self.side], castling, en_passant, self.fiftyMove,
+                                          full_move)
+
+    def set_attack_maps(self, enabled: bool):
+        """Enables or disables incrementally maintained attack maps. When enabled, every piece that is added,
+        removed or moved updates the attack counts of both sides and is_square_attacked becomes a single lookup.
+        This makes moves more expensive, so it only pays off when many attack queries are made per move.
+        """
+        if enabled and self.attackMap is None:
+            self.attackMap = AttackMap(self)
+        elif not enabled:
+            self.attackMap = None
 
     def update_material_lists(self):  # todo why not do this while parsing fen pieces
         """updates all material related piece lists"""
-        for index in range(BOARD_SQUARE_NUMBER):
+        for index in self.conversion.Sq64ToSq120:
             piece = self.pieces[index]
-            if piece != OFF_BOARD and piece != EMPTY:
+            if piece != EMPTY:
                 colour = PIECE_COLOR_MAP[piece]
 
                 self.pieceNumber[piece] += 1  # increment piece number
+                self.pieceList[piece].append(index)
 
                 if piece == WHITE_KING or piece == BLACK_KING:
                     self.kingSquare[colour] = index
 
     def parse_move(self, move_str: str) -> int:
         """Parses user move and returns the MOVE int value from the GeneratedMoves for the
-        position, that matches the moveStr input. For example if moveStr = 'a2a3'
-        loops over all possible moves for the position, finds that move int i.e. 1451231 and returns it
+        position, that matches the moveStr input. For example if moveStr = 'a2a3' it returns that move int
+        i.e. 1451231 (NO_MOVE if the move is not legal in the position), see move_from_uci()
         """
-        # check if files for 'from' and 'to' squares are valid i.e. between 1-8
-        # todo fix this to use the same method in the gui
-        if move_str[1] > "8" or move_str[1] < "1":
-            return NO_MOVE
+        return self.move_from_uci(move_str)
 
-        if move_str[3] > "8" or move_str[3] < "1":
-            return NO_MOVE
+    def get_move_index(self) -> Dict[int, int]:
+        """Returns the legal moves of the position indexed by from square, to square & promoted piece (the bits of
+        MOVE_UCI_KEY_MASK). The index is built once per position, together with the legal moves.
+        """
+        if self.moveIndexKey != self.posKey:
+            self.moveIndex = {move_ & MOVE_UCI_KEY_MASK: move_ for move_ in self.generate_moves()}
+            self.moveIndexKey = self.posKey
 
-        # check if ranks for 'from' and 'to' squares are valid i.e. between a-h
-        if move_str[0] > "h" or move_str[0] < "a":
-            return NO_MOVE
+        return self.moveIndex
 
-        if move_str[2] > "h" or move_str[2] < "a":
+    def move_from_uci(self, move_str: str) -> int:
+        """Returns the legal move int for a move in uci notation, i.e. 'e2e4' or 'a7a8q' (NO_MOVE if there is none)"""
+        from_ = SQUARE_NOTATION_MAP.get(move_str[0:2])
+        to = SQUARE_NOTATION_MAP.get(move_str[2:4])
+        if from_ is None or to is None:
             return NO_MOVE
 
-        from_ = convert_file_rank_to_square((ord(move_str[0]) - ord("a")), (ord(move_str[1]) - ord("1")))
-        to = convert_file_rank_to_square((ord(move_str[2]) - ord("a")), (ord(move_str[3]) - ord("1")))
-
-        # print("Move string: {}, from: {} to: {}".format(move_str, from_, to))
+        promoted = EMPTY
+        if len(move_str) > 4:
+            promoted = PROMOTION_NOTATION_MAP[self.side].get(move_str[4], OFF_BOARD)
 
-        assert self.is_square_on_board(from_) and self.is_square_on_board(to)
+        return self.get_move_index().get(from_ | (to << 7) | (promoted << 20), NO_MOVE)
 
-        move_list = self.generate_moves()
-
-        for move_ in move_list:
-            # print('From: {}, to: {}'.format(FromSq(move), ToSq(move)))
-            if get_from_square(move_) == from_ and get_to_square(move_) == to:
-                prom_piece = get_promoted_bits(move_)
-                if prom_piece != EMPTY:
-                    if IS_PIECE_ROOK_QUEEN[prom_piece] and not IS_PIECE_BISHOP_QUEEN[prom_piece] and move_str[4] == "r":
-                        return move_
-                    elif not IS_PIECE_ROOK_QUEEN[prom_piece] and IS_PIECE_BISHOP_QUEEN[prom_piece] and (
-                            move_str[4] == "b"):
-                        return move_
-                    elif IS_PIECE_ROOK_QUEEN[prom_piece] and IS_PIECE_BISHOP_QUEEN[prom_piece] and move_str[4] == "q":
-                        return move_
-                    elif IS_PIECE_KNIGHT[prom_piece] and move_str[4] == "n":
-                        return move_
-
-                    continue
+    def push_uci(self, move_str: str) -> int:
+        """Makes a move given in uci notation and returns its move int. Raises ValueError for illegal moves."""
+        move_ = self.move_from_uci(move_str)
+        if move_ == NO_MOVE:
+            raise ValueError("Illegal move {!r} in position {}".format(move_str, self.to_fen()))
 
-                # must not be a promotion -> return move
-                return move_
-
-        return NO_MOVE
+        self.make_move(move_)
+        return move_
 
     def is_square_on_board(self, square) -> bool:
         return self.conversion.FilesBoard[square] != OFF_BOARD
@@ -356,6 +461,9 @@ class Board:
         assert self.is_square_on_board(sq)
         assert self.is_side_valid(side)
 
+        if self.attackMap is not None:
+            return self.attackMap.counts[side][sq] != 0
+
         # pawns
         # if attacking side is white and there are pawns infornt to the left and right of us, then we are attacked
         if side == WHITE:
@@ -414,8 +522,29 @@ class Board:
 
         return False
 
-    def generate_moves(self):
-        return filter(lambda move: self.is_move_legal(move), self.moveGenerator.generate_all_moves())
+    def generate_moves(self) -> List[int]:
+        """Returns all legal moves for the current position"""
+        if self.moveCache is None:
+            return self.moveGenerator.generate_legal_moves()
+
+        moves = self.moveCache.get(self.posKey)
+        if moves is None:
+            moves = tuple(self.moveGenerator.generate_legal_moves())
+            self.moveCache.put(self.posKey, moves)
+
+        return list(moves)
+
+    def set_move_cache(self, cache: Optional[MoveCache]):
+        """Sets the cache used by generate_moves() to store legal moves per position (None disables caching).
+        The same cache can be shared by several boards, clones share the cache of the original board.
+        """
+        self.moveCache = cache
+
+    def iter_moves(self, captures_only: bool = False):
+        """Lazily yields legal moves: castling first, then captures & promotions, then quiet moves.
+        Moves can be made while iterating, as long as they are taken back before the next move is requested.
+        """
+        return self.moveGenerator.filter_legal_moves(self.moveGenerator.iter_moves(captures_only))
 
     def get_moves(self):  # needed for uct simulation
         return list(self.generate_moves())
@@ -539,8 +668,11 @@ class Board:
         assert self.is_piece_valid(self.pieces[from_])
 
         # Store has value before we do any hashing in/out of pieces etc
+        if self.histPly == len(self.history):
+            self.history.append(Undo())
         history_element = self.history[self.histPly]  # get pointer to history element and update its values
         history_element.posKey = self.posKey
+        self.positionCounts[self.posKey] = self.positionCounts.get(self.posKey, 0) + 1
 
         # if this is an en passant move
         if move_ & MOVE_FLAG_ENPASS != 0:
@@ -644,6 +776,14 @@ class Board:
     def take_move(self):
         self.histPly -= 1
 
+        # the position we return to is no longer part of the history
+        key = self.history[self.histPly].posKey
+        count = self.positionCounts[key] - 1
+        if count:
+            self.positionCounts[key] = count
+        else:
+            del self.positionCounts[key]
+
         move_ = self.history[self.histPly].move
         from_ = get_from_square(move_)
         to = get_to_square(move_)
@@ -712,9 +852,13 @@ class Board:
         piece = self.pieces[sq]
         assert self.is_piece_valid(piece)
 
+        if self.attackMap is not None:
+            self.attackMap.on_remove_piece(sq, piece)
+
         self.hashData.hash_piece(piece, sq, self)
         self.pieces[sq] = EMPTY
         self.pieceNumber[piece] -= 1
+        self.pieceList[piece].remove(sq)
 
     def add_piece(self, sq: int, piece: int):
         assert self.is_piece_valid(piece)
@@ -724,6 +868,10 @@ class Board:
 
         self.pieces[sq] = piece
         self.pieceNumber[piece] += 1
+        self.pieceList[piece].append(sq)
+
+        if self.attackMap is not None:
+            self.attackMap.on_add_piece(sq, piece)
 
     def move_piece(self, from_: int, to: int):
         assert self.is_square_on_board(from_)
@@ -731,6 +879,9 @@ class Board:
 
         piece = self.pieces[from_]
 
+        if self.attackMap is not None:
+            self.attackMap.on_remove_piece(from_, piece)
+
         # hash the piece out of the from square and then later hash it back in to the new square
         self.hashData.hash_piece(piece, from_, self)
         self.pieces[from_] = EMPTY
@@ -738,15 +889,24 @@ class Board:
         self.hashData.hash_piece(piece, to, self)
         self.pieces[to] = piece
 
-    def get_threefold_repetition_count(self) -> int:
-        """Detects how many repetitions for a given position"""
-        repetition = 0
+        if self.attackMap is not None:
+            self.attackMap.on_add_piece(to, piece)
 
-        for i in range(self.histPly):
-            if self.history[i].posKey.value == self.posKey.value:
-                repetition += 1
+        # the piece keeps its place in the piece list, only its square changes
+        piece_list = self.pieceList[piece]
+        piece_list[piece_list.index(from_)] = to
 
-        return repetition
+    def get_threefold_repetition_count(self) -> int:
+        """Detects how many repetitions for a given position.
+        Position counts are maintained by make_move & take_move so this is a single dict lookup. Positions before
+        the last irreversible move (capture, pawn move, castling rights change) can never match the current
+        position key, so counting over the whole history gives the same result as counting since fiftyMove.
+        """
+        return self.positionCounts.get(self.posKey, 0)
+
+    def is_repetition(self) -> bool:
+        """Returns True if the current position already occurred in the game (i.e. to detect draws in search)"""
+        return self.posKey in self.positionCounts
 
     def is_position_draw(self) -> bool:
         """Determine if position is a draw"""
@@ -778,35 +938,57 @@ class Board:
     def get_result(self, player_jm):
         """is called every time a move is made this method is called to check if the game is ended"""
 
+        state = self.game_state()
+
+        if state == GAME_ONGOING:
+            return None
+
+        if state == GAME_CHECKMATE:
+            if self.side == player_jm:  # if i am the side in mate -> loss, else win
+                # print("0-1:black mates (claimed by Hugo)\n")
+                return LOSS
+
+            # print("1-0:white mates (claimed by Hugo)\n")
+            return WIN
+
+        # fifty move rule, 3-fold repetition, insufficient material or stalemate
+        return DRAW
+
+    def game_state(self) -> int:
+        """Returns the state of the game for the current position (GAME_ONGOING, GAME_CHECKMATE etc.)"""
         if self.fiftyMove > 100:
             # print("1/2-1/2:fifty move rule (claimed by Hugo)\n")
-            return DRAW
+            return GAME_DRAW_FIFTY_MOVES
 
         if self.get_threefold_repetition_count() >= 2:
             # print("1/2-1/2:3-fold repetition (claimed by Hugo)\n")
-            return DRAW
+            return GAME_DRAW_REPETITION
 
         if self.is_position_draw():
             # print("1/2-1/2:insufficient material (claimed by Hugo)\n")
-            return DRAW
+            return GAME_DRAW_MATERIAL
 
-        # we have legal moves -> game is not over
-        if len(list(self.generate_moves())) != 0:
-            return None
+        return self.get_mate_state()
 
-        in_check = self.is_square_attacked(self.kingSquare[self.side], self.side ^ 1)
+    def has_legal_move(self) -> bool:
+        """Returns True if the side to move has at least one legal move"""
+        return self.get_mate_state() == GAME_ONGOING
 
-        if in_check:
-            if self.side == player_jm:  # if i am the side in mate -> loss, else win
-                # print("0-1:black mates (claimed by Hugo)\n")
-                return LOSS
+    def get_mate_state(self) -> int:
+        """Returns GAME_CHECKMATE or GAME_STALEMATE if the side to move has no legal moves, GAME_ONGOING otherwise.
+        Move generation stops at the first legal move and the result is remembered for the position key, so asking
+        again for the same position (i.e. every frame of the GUI) costs a single comparison.
+        """
+        if self.mateStateKey == self.posKey:
+            return self.mateState
 
-            # print("1-0:white mates (claimed by Hugo)\n")
-            return WIN
+        state = GAME_ONGOING
+        if next(self.iter_moves(), NO_MOVE) == NO_MOVE:
+            in_check = self.is_square_attacked(self.kingSquare[self.side], self.side ^ 1)
+            state = GAME_CHECKMATE if in_check else GAME_STALEMATE
 
-        # not in check but no legal moves left -> stalemate
-        # print("\n1/2-1/2:stalemate (claimed by Hugo)\n")
-        return DRAW
+        self.mateStateKey, self.mateState = self.posKey, state
+        return state
 
 
 if __name__ == '__main__':
@@ -0,0 +1,191 @@
+"""Opening book in the Polyglot (.bin) format.
+
+A book is a file of 16 byte big endian records (key: u64, move: u16, weight: u16, learn: u32) sorted by key. The file
+is memory-mapped and the entries of a position are found by binary search on its polyglot key, so a probe touches
+only a handful of pages and takes microseconds. Books built by other polyglot compatible tools can be used as well.
+
+Usage:
+    with OpeningBook("book.bin") as book:
+        move_ = book.choose_move(board)
+
+    python -m lib.book build games.pgn --output book.bin --plies 20
+    python -m lib.book probe book.bin --fen "<fen>"
+"""
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lib.board import Board
+from lib.constants import *
+from lib.pgn import PgnGame, iter_games, move_from_san
+from lib.polyglot import polyglot_key, encode_move, decode_move
+
+BOOK_ENTRY = struct.Struct(">QHHI")
+BOOK_KEY = struct.Struct(">Q")
+DEFAULT_BOOK_PLIES = 20  # how many plies of every game are added to a book by build_book()
+MAX_BOOK_WEIGHT = 0xFFFF
+
+
+class OpeningBook:
+    """Read only, memory-mapped polyglot book"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        if size % BOOK_ENTRY.size != 0:
+            self.file.close()
+            raise ValueError("Invalid book file {}: size is not a multiple of {}".format(path, BOOK_ENTRY.size))
+
+        # an empty file can't be mapped
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.entryNumber = size // BOOK_ENTRY.size
+
+    def __len__(self) -> int:
+        return self.entryNumber
+
+    def __enter__(self) -> 'OpeningBook':
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def _first_index(self, key: int) -> int:
+        """Returns the index of the first entry with a key >= key"""
+        low, high = 0, self.entryNumber
+        while low < high:
+            middle = (low + high) // 2
+            if BOOK_KEY.unpack_from(self.data, middle * BOOK_ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def entries(self, key: int) -> List[Tuple[int, int, int, int]]:
+        """Returns all (key, move, weight, learn) entries of a polyglot key"""
+        result = []
+        for index in range(self._first_index(key), self.entryNumber):
+            entry = BOOK_ENTRY.unpack_from(self.data, index * BOOK_ENTRY.size)
+            if entry[0] != key:
+                break
+            result.append(entry)
+
+        return result
+
+    def get_moves(self, board: Board) -> List[Tuple[int, int]]:
+        """Returns (move int, weight) of all book moves of the position that are legal on board"""
+        moves = []
+        for _, raw_move, weight, _ in self.entries(polyglot_key(board)):
+            move_ = board.move_from_uci(decode_move(raw_move, board))
+            if move_ != NO_MOVE:
+                moves.append((move_, weight))
+
+        return moves
+
+    def choose_move(self, board: Board, rng: Optional[random.Random] = None) -> int:
+        """Returns a book move for the position (NO_MOVE if there is none). Without rng the move with the highest
+        weight is returned, otherwise moves are picked randomly in proportion to their weight.
+        """
+        moves = self.get_moves(board)
+        if not moves:
+            return NO_MOVE
+
+        if rng is None or sum(weight for _, weight in moves) == 0:
+            return max(moves, key=lambda move_weight: move_weight[1])[0]
+
+        return rng.choices([move_ for move_, _ in moves], weights=[weight for _, weight in moves])[0]
+
+
+def build_book(games: Iterable[PgnGame], path: str, max_plies: int = DEFAULT_BOOK_PLIES, min_games: int = 1,
+               board: Optional[Board] = None) -> int:
+    """Compiles the first max_plies moves of games into a polyglot book and returns the number of entries written.
+    Like polyglot, a move scores 2 for a win, 1 for a draw (or unknown result) and 0 for a loss of the side that
+    played it, the weight of an entry is the sum of its scores. Moves played in less than min_games games are left
+    out. Replay of a game stops at its first illegal move.
+    """
+    if board is None:
+        board = Board()
+
+    scores: Dict[Tuple[int, int], int] = {}
+    counts: Dict[Tuple[int, int], int] = {}
+    for game in games:
+        white_score = {"1-0": 2, "0-1": 0}.get(game.result, 1)
+        board.parse_fen(game.start_fen())
+
+        for san in game.moves[:max_plies]:
+            try:
+                move_ = move_from_san(board, san)
+            except ValueError:
+                break
+
+            entry = (polyglot_key(board), encode_move(board.moveGenerator.print_move(move_),
+                                                      move_ & MOVE_FLAG_CASTLE != 0))
+            scores[entry] = scores.get(entry, 0) + (white_score if board.side == WHITE else 2 - white_score)
+            counts[entry] = counts.get(entry, 0) + 1
+            board.make_move(move_)
+
+    entries = [(key, raw_move, score) for (key, raw_move), score in scores.items()
+               if counts[(key, raw_move)] >= min_games]
+
+    # weights have to fit into 16 bits
+    max_score = max((score for _, _, score in entries), default=0)
+    scale = MAX_BOOK_WEIGHT / max_score if max_score > MAX_BOOK_WEIGHT else 1
+    entries.sort(key=lambda entry: (entry[0], -entry[2], entry[1]))
+
+    with open(path, "wb") as f:
+        for key, raw_move, score in entries:
+            f.write(BOOK_ENTRY.pack(key, raw_move, int(score * scale), 0))
+
+    return len(entries)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Builds and probes polyglot opening books")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    build_parser = commands.add_parser("build", help="compile a book from pgn files")
+    build_parser.add_argument("pgn", nargs="+", help="pgn files (may be gzip compressed)")
+    build_parser.add_argument("--output", required=True, help="book file to write")
+    build_parser.add_argument("--plies", type=int, default=DEFAULT_BOOK_PLIES, help="plies of every game to add")
+    build_parser.add_argument("--min-games", type=int, default=1, help="minimum number of games of a book move")
+
+    probe_parser = commands.add_parser("probe", help="list the book moves of a position")
+    probe_parser.add_argument("book", help="book file")
+    probe_parser.add_argument("--fen", default=START_FEN, help="position to probe (default: start position)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == "build":
+        games = (game for path in args.pgn for game in iter_games(path))
+        entries = build_book(games, args.output, args.plies, args.min_games)
+        print("{} entries written to {} in {:.3f}s".format(entries, args.output, time.perf_counter() - start))
+        return 0
+
+    board = Board()
+    board.parse_fen(args.fen)
+    with OpeningBook(args.book) as book:
+        start = time.perf_counter()
+        moves = book.get_moves(board)
+        elapsed = time.perf_counter() - start
+
+    total = sum(weight for _, weight in moves) or 1
+    for move_, weight in sorted(moves, key=lambda move_weight: -move_weight[1]):
+        print("{:<6} weight {:5d} ({:.1%})".format(board.moveGenerator.print_move(move_), weight, weight / total))
+    print("{} book moves, probe took {:.1f}us".format(len(moves), elapsed * 1e6))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
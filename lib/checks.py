@@ -0,0 +1,104 @@
+"""Release and debug builds of the board core methods.
+
+The board and move generator validate squares and pieces with asserts on every move. Since the application is not
+run with `python -O`, classes decorated with @release_variant get a second copy of the code of each of their methods,
+compiled from the same source with the asserts stripped. The release code is used by default; debug mode swaps the
+checked code back in. Only the code objects of the methods are exchanged, so bound methods, subclasses, super() calls
+and wrappers (see lib/instrument.py) all follow the current mode. Without the source (.pyc only installs, frozen
+apps) the classes simply keep their checked code.
+
+Usage:
+    with debug_checks():
+        perft(board, 3)  # runs with all asserts
+
+    SLINKY_DEBUG=1 python main.py
+"""
+import ast
+import inspect
+import logging
+import os
+from contextlib import contextmanager
+from typing import List, Tuple
+
+DEBUG_ENV_VAR = "SLINKY_DEBUG"
+
+# (function, checked code, release code) of every method of the decorated classes
+_variants: List[Tuple[object, object, object]] = []
+_debug: bool = bool(os.environ.get(DEBUG_ENV_VAR, "")) and os.environ.get(DEBUG_ENV_VAR) != "0"
+
+
+def _class_functions(cls):
+    for name, attribute in cls.__dict__.items():
+        if isinstance(attribute, (staticmethod, classmethod)):
+            attribute = attribute.__func__
+        if inspect.isfunction(attribute):
+            yield name, attribute
+
+
+def _find_code(code, name: str):
+    """Returns the last code object named name among the constants of code (the one the class body binds last)"""
+    found = None
+    for const in code.co_consts:
+        if inspect.iscode(const) and const.co_name == name:
+            found = const
+    return found
+
+
+def _compile_release_class(cls):
+    """Returns the code of the class body compiled without asserts, None if the source of cls is not available"""
+    try:
+        lines, first_line = inspect.getsourcelines(cls)
+        tree = ast.parse("".join(lines))
+        ast.increment_lineno(tree, first_line - 1)  # tracebacks point to the real source lines
+        module_code = compile(tree, inspect.getsourcefile(cls) or "<unknown>", "exec", optimize=1)
+    except (OSError, TypeError, ValueError, SyntaxError) as e:
+        logging.info("No release variant of {}, keeping its checks: {}".format(cls.__qualname__, e))
+        return None
+
+    return _find_code(module_code, cls.__name__)
+
+
+def release_variant(cls):
+    """Class decorator compiling an assert free variant of all methods defined in the class body"""
+    class_code = _compile_release_class(cls)
+    if class_code is None:
+        return cls
+
+    for name, function in _class_functions(cls):
+        checked = function.__code__
+        release = _find_code(class_code, checked.co_name)
+        # the release code has to fit the closure of the function (i.e. the __class__ cell used by super()), it does
+        # not if the source changed since the module was compiled
+        if release is None or release.co_freevars != checked.co_freevars:
+            continue
+
+        if release.co_code != checked.co_code:  # leave methods without asserts alone
+            _variants.append((function, checked, release))
+            if not _debug:
+                function.__code__ = release
+
+    return cls
+
+
+def is_debug() -> bool:
+    return _debug
+
+
+def set_debug(enabled: bool) -> bool:
+    """Switches all decorated classes to the checked (enabled) or release code, returns the previous mode"""
+    global _debug
+    previous = _debug
+    _debug = enabled
+    for function, checked, release in _variants:
+        function.__code__ = checked if enabled else release
+    return previous
+
+
+@contextmanager
+def debug_checks(enabled: bool = True):
+    """Runs the with block with the asserts of the board core enabled (or disabled)"""
+    previous = set_debug(enabled)
+    try:
+        yield
+    finally:
+        set_debug(previous)
@@ -1,13 +1,17 @@
-from ctypes import c_uint64
-from random import getrandbits
-from typing import List, Dict
+from random import Random
+from typing import List, Dict, Optional
 
 BOARD_SQUARE_NUMBER = 120
 MAX_GAME_MOVES = 2048  # maximum number halfmoves allowed
+MAX_POSITION_MOVES = 256  # upper bound of the number of moves in a position (the known maximum is 218)
 PIECE_CHARACTER_STRING = ".PNBRQKpnbrqk"
 SIDE_CHAR = "wb-"
 START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
 
+# Board backends that can be selected when constructing a Board
+MAILBOX_BACKEND = "mailbox"  # 120-square list of pieces
+BITBOARD_BACKEND = "bitboard"  # 64-bit int per piece type and colour
+
 # These values are used for MC simulation
 PLAYER_WHITE = 1
 PLAYER_BLACK = -1
@@ -17,6 +21,10 @@ LOSS = 0.0
 DRAW = 0.5
 WIN = 1.0
 
+# Game states returned by Board.game_state()
+(GAME_ONGOING, GAME_CHECKMATE, GAME_STALEMATE,
+ GAME_DRAW_FIFTY_MOVES, GAME_DRAW_REPETITION, GAME_DRAW_MATERIAL) = range(6)
+
 PIECE_RANGE = range(13)
 
 (EMPTY,
@@ -72,6 +80,18 @@ FILE_NOTATION_MAP = {
     "h": FILE_H,
 }
 
+# SquareNotationMap maps square notations (i.e. 'e4') to 120-square lib indexes
+SQUARE_NOTATION_MAP: Dict[str, int] = {
+    file_char + rank_char: 21 + file + rank * 10
+    for rank, rank_char in enumerate("12345678") for file, file_char in enumerate("abcdefgh")
+}
+
+# PromotionNotationMap maps uci promotion notations to the promoted piece of each side
+PROMOTION_NOTATION_MAP: List[Dict[str, int]] = [
+    {"q": WHITE_QUEEN, "r": WHITE_ROOK, "b": WHITE_BISHOP, "n": WHITE_KNIGHT},
+    {"q": BLACK_QUEEN, "r": BLACK_ROOK, "b": BLACK_BISHOP, "n": BLACK_KNIGHT},
+]
+
 # A map used to identify a piece's colour
 PIECE_COLOR_MAP: Dict[int, int] = {
     EMPTY: BOTH,
@@ -89,6 +109,18 @@ PIECE_COLOR_MAP: Dict[int, int] = {
     BLACK_KING: BLACK,
 }
 
+# Pieces of each side ordered as pawn, knight, bishop, rook, queen, king
+SIDE_PIECES: List[List[int]] = [
+    [WHITE_PAWN, WHITE_KNIGHT, WHITE_BISHOP, WHITE_ROOK, WHITE_QUEEN, WHITE_KING],
+    [BLACK_PAWN, BLACK_KNIGHT, BLACK_BISHOP, BLACK_ROOK, BLACK_QUEEN, BLACK_KING],
+]
+
+# Pieces a pawn of each side can promote to
+PROMOTION_PIECES: List[List[int]] = [
+    [WHITE_QUEEN, WHITE_ROOK, WHITE_BISHOP, WHITE_KNIGHT],
+    [BLACK_QUEEN, BLACK_ROOK, BLACK_BISHOP, BLACK_KNIGHT],
+]
+
 SIDE_TO_PLAYER_MAP: Dict[int, int] = {
     WHITE: PLAYER_WHITE,
     BLACK: PLAYER_BLACK,
@@ -239,6 +271,14 @@ KING_MOVE_INCREMENT = [-1, -10, 1, 10, -9, -11, 11, 9]
 # kingside and black can castle queenside the 4 bit int value is going to be 1001
 WHITE_KING_CASTLING, WHITE_QUEEN_CASTLING, BLACK_KING_CASTLING, BLACK_QUEEN_CASTLING = [2**x for x in range(4)]
 
+# CastleNotationMap maps fen castling notations to castle permission bits, in the order they are written in a fen
+CASTLE_NOTATION_MAP = {
+    "K": WHITE_KING_CASTLING,
+    "Q": WHITE_QUEEN_CASTLING,
+    "k": BLACK_KING_CASTLING,
+    "q": BLACK_QUEEN_CASTLING,
+}
+
 
 def get_2d_list(num_lists, size_lists, default_val) -> List[List[int]]:
     """Generate a NON linked list of lists"""
@@ -250,18 +290,24 @@ def get_2d_list(num_lists, size_lists, default_val) -> List[List[int]]:
     return main_list
 
 
+# Seed of the zobrist keys. Since the keys are deterministic, the same position has the same key in every board
+# and every process, which allows sharing caches & books between them
+ZOBRIST_SEED = 0x736C696E6B79
+HASH_KEY_MASK = (1 << 64) - 1  # position keys are kept as unsigned 64 bit values
+
+
 class HashData:
-    def __init__(self):
+    def __init__(self, seed: int = ZOBRIST_SEED):
         # Hashkeys for each piece for each possible position for the key
-        self.pieceKeys: List[List[c_uint64]] = get_2d_list(num_lists=13, size_lists=BOARD_SQUARE_NUMBER, default_val=0)
+        self.pieceKeys: List[List[int]] = get_2d_list(num_lists=13, size_lists=BOARD_SQUARE_NUMBER, default_val=0)
 
         # SideKey the hashkey associated with the current side
-        self.sideKey: c_uint64 = 0
+        self.sideKey: int = 0
 
         # CastleKeys haskeys associated with castling rights
         self.castleKeys: List[int] = [0]*16  # castling value ranges from 0-15 -> we need 16 hashkeys
 
-        self._fill_values()  # Generate values of all hash related fields
+        self._fill_values(seed)  # Generate values of all hash related fields
 
         # CastlePerm used to simplify hashing castle permissions
         # Everytime we make a move we will take pos.castlePermissions &= CastlePerm[sq]
@@ -283,29 +329,35 @@ class HashData:
             15, 15, 15, 15, 15, 15, 15, 15, 15, 15,
             15, 15, 15, 15, 15, 15, 15, 15, 15, 15]
 
-    def _fill_values(self):
+    def _fill_values(self, seed: int):
         """initializes hashkeys for all pieces and possible positions, for castling rights, for side to move"""
+        rng = Random(seed)
 
         for piece in range(13):
             for square in range(BOARD_SQUARE_NUMBER):
-                self.pieceKeys[piece][square] = getrandbits(64)  # returns a random 64 bit number
+                self.pieceKeys[piece][square] = rng.getrandbits(64)  # returns a random 64 bit number
 
-        self.sideKey = getrandbits(64)
+        self.sideKey = rng.getrandbits(64)
         for i in range(16):
-            self.castleKeys[i] = getrandbits(64)
+            self.castleKeys[i] = rng.getrandbits(64)
 
     #  -= 1- Hashing 'macros'  -= 1-
+    # all keys are 64 bit values, so xor-ing them in & out keeps posKey within 64 bits without any masking
     def hash_piece(self, piece: int, sq: int, pos):
-        pos.posKey = c_uint64(pos.posKey.value ^ self.pieceKeys[piece][sq])
+        pos.posKey ^= self.pieceKeys[piece][sq]
 
     def hash_castle_permissions(self, pos):
-        pos.posKey = c_uint64(pos.posKey.value ^ self.castleKeys[pos.castlePermissions])
+        pos.posKey ^= self.castleKeys[pos.castlePermissions]
 
     def hash_side(self, pos):
-        pos.posKey = c_uint64(pos.posKey.value ^ self.sideKey)
+        pos.posKey ^= self.sideKey
 
     def hash_enpassant(self, pos):
-        pos.posKey = c_uint64(pos.posKey.value ^ self.pieceKeys[EMPTY][pos.enPassantSquare])
+        pos.posKey ^= self.pieceKeys[EMPTY][pos.enPassantSquare]
+
+
+# Key tables shared by all boards
+HASH_DATA = HashData()
 
 
 # Game move - information stored in the move int from type Move
@@ -340,3 +392,5 @@ MOVE_FLAG_CASTLE = 0x1000000  # move flag that denotes if move was castling
 # move flag that denotes if move was capture without saying what the capture was (checks capture & enpas squares)
 MOVE_FLAG_CAPTURE = 0x7C000
 MOVE_FLAG_PROMOTION = 0xF00000  # move flag that denotes if move was promotion without saying what the promotion was
+# bits of a move that identify it among the moves of a position: from & to square and promoted piece (as in uci)
+MOVE_UCI_KEY_MASK = 0x3FFF | MOVE_FLAG_PROMOTION
@@ -1,6 +1,3 @@
-from ctypes import c_uint64
-
-
 class Undo:
     """Structure to hold history related information allowing for a move to be undone (taken back).
     This is used to easily traverse the game tree.
@@ -12,4 +9,13 @@ class Undo:
         self.castlePermissions: int = 0
         self.enPassantSquare: int = 0
         self.fiftyMove: int = 0
-        self.posKey: c_uint64 = 0
+        self.posKey: int = 0
+
+    def copy(self) -> 'Undo':
+        undo = Undo()
+        undo.move = self.move
+        undo.castlePermissions = self.castlePermissions
+        undo.enPassantSquare = self.enPassantSquare
+        undo.fiftyMove = self.fiftyMove
+        undo.posKey = self.posKey
+        return undo
@@ -0,0 +1,200 @@
+"""Opt-in call counters and timers for the hot paths of the board core.
+
+When enabled, the hot methods of Board, MoveGenerator and their bitboard subclasses are replaced on the classes by
+wrappers that count calls and accumulate wall time. When disabled the original methods are put back, so the
+instrumentation costs nothing unless it is switched on. Times are inclusive, i.e. the time of generate_all_moves
+contains the time of the generate_all_moves_into call it makes.
+
+Usage:
+    with instrumented() as counters:
+        perft(board, 3)
+    print(counters.report())
+
+    SLINKY_INSTRUMENT=1 python -m lib.perft --depth 4   # report is printed to stderr at exit
+    SLINKY_INSTRUMENT=profile.json python main.py       # report is also written as json at exit
+
+    python -m lib.instrument --depth 3 --output profile.json
+"""
+import argparse
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+INSTRUMENT_ENV_VAR = "SLINKY_INSTRUMENT"
+
+# methods that are wrapped on the class that defines them (overrides in subclasses are counted separately)
+HOT_PATHS: Dict[str, List[str]] = {
+    "lib.board.Board": ["make_move", "take_move", "is_move_legal", "is_square_attacked", "generate_moves",
+                        "parse_fen", "get_mate_state", "is_position_draw"],
+    "lib.movegenerator.MoveGenerator": ["generate_all_moves", "generate_all_moves_into", "filter_legal_moves",
+                                        "filter_legal_moves_into", "generate_legal_moves", "generate_legal_moves_into",
+                                        "iter_moves"],
+    "lib.bitboard.BitboardBoard": ["parse_fen", "is_square_attacked", "is_move_legal"],
+    "lib.bitboard.BitboardMoveGenerator": ["generate_all_moves_into"],
+}
+
+
+class Counters:
+    """Number of calls and accumulated wall time of every instrumented method"""
+
+    def __init__(self):
+        self.started: float = time.perf_counter()
+        self.stats: Dict[str, List] = {}  # name -> [calls, seconds]
+
+    def reset(self):
+        """Zeroes all counters, i.e. to measure a single GUI frame or engine turn"""
+        for stat in self.stats.values():
+            stat[0] = 0
+            stat[1] = 0.0
+        self.started = time.perf_counter()
+
+    def to_dict(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        methods = {}
+        for name, (calls, seconds) in sorted(self.stats.items(), key=lambda item: -item[1][1]):
+            if calls:
+                methods[name] = {
+                    "calls": calls,
+                    "total": seconds,
+                    "per_call": seconds / calls,
+                    "share": seconds / elapsed if elapsed else 0.0,
+                }
+
+        return {"elapsed": elapsed, "methods": methods}
+
+    def report(self) -> str:
+        """Returns a table of the called methods sorted by total time"""
+        data = self.to_dict()
+        lines = ["{:<44} {:>10} {:>11} {:>10} {:>7}".format("method", "calls", "total ms", "us/call", "share")]
+        for name, stat in data["methods"].items():
+            lines.append("{:<44} {:>10} {:>11.2f} {:>10.2f} {:>6.1%}".format(
+                name, stat["calls"], stat["total"] * 1e3, stat["per_call"] * 1e6, stat["share"]))
+        lines.append("{} methods called in {:.3f}s".format(len(data["methods"]), data["elapsed"]))
+        return "\n".join(lines)
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+counters: Counters = Counters()
+_originals: Dict[tuple, object] = {}  # (class, method name) -> original function
+
+
+def _resolve(path: str):
+    module_name, class_name = path.rsplit(".", 1)
+    module = __import__(module_name, fromlist=[class_name])
+    return getattr(module, class_name)
+
+
+def _wrap(function, name: str):
+    stat = counters.stats.setdefault(name, [0, 0.0])
+    perf_counter = time.perf_counter
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            stat[1] += perf_counter() - start
+            stat[0] += 1
+
+    return wrapper
+
+
+def is_enabled() -> bool:
+    return bool(_originals)
+
+
+def enable() -> Counters:
+    """Wraps the hot path methods (does nothing if they are already wrapped) and returns the shared counters"""
+    if _originals:
+        return counters
+
+    for path, names in HOT_PATHS.items():
+        cls = _resolve(path)
+        for name in names:
+            function = cls.__dict__.get(name)
+            if function is None:
+                continue
+            _originals[(cls, name)] = function
+            setattr(cls, name, _wrap(function, "{}.{}".format(cls.__name__, name)))
+
+    return counters
+
+
+def disable():
+    """Puts the original methods back, the counters keep their values"""
+    for (cls, name), function in _originals.items():
+        setattr(cls, name, function)
+    _originals.clear()
+
+
+@contextmanager
+def instrumented(reset: bool = True):
+    """Counts the hot path calls made inside the with block. Instrumentation that was already enabled (i.e. by the
+    environment variable) stays enabled afterwards.
+    """
+    was_enabled = is_enabled()
+    enable()
+    if reset:
+        counters.reset()
+    try:
+        yield counters
+    finally:
+        if not was_enabled:
+            disable()
+
+
+def _report_at_exit(output: Optional[str]):
+    # written to stderr rather than logged, most entry points (i.e. lib.perft) configure no logging handler
+    sys.stderr.write("Hot path instrumentation report:\n{}\n".format(counters.report()))
+    if output:
+        counters.dump(output)
+
+
+def enable_from_environment():
+    """Enables the instrumentation if SLINKY_INSTRUMENT is set. A value ending with .json is used as the path the
+    report is written to at exit, any other non empty value (except 0) only prints the report to stderr.
+    """
+    value = os.environ.get(INSTRUMENT_ENV_VAR, "")
+    if not value or value == "0":
+        return
+
+    enable()
+    atexit.register(_report_at_exit, value if value.endswith(".json") else None)
+
+
+def main(argv=None) -> int:
+    from lib.board import Board
+    from lib.constants import START_FEN, MAILBOX_BACKEND, BITBOARD_BACKEND
+    from lib.perft import perft
+
+    parser = argparse.ArgumentParser(description="Runs perft with the hot path instrumentation enabled")
+    parser.add_argument("--fen", default=START_FEN, help="position to run perft on (default: start position)")
+    parser.add_argument("--depth", type=int, default=3, help="perft depth")
+    parser.add_argument("--backend", default=MAILBOX_BACKEND, choices=[MAILBOX_BACKEND, BITBOARD_BACKEND],
+                        help="board implementation")
+    parser.add_argument("--output", help="write the report as json to this file")
+    args = parser.parse_args(argv)
+
+    board = Board(args.backend)
+    board.parse_fen(args.fen)
+    with instrumented() as result:
+        nodes = perft(board, args.depth)
+
+    print("perft({}) = {}".format(args.depth, nodes))
+    print(result.report())
+    if args.output:
+        result.dump(args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""Streaming readers for files with one position per line (FEN or EPD).
+
+Usage:
+    for board in iter_fens("positions.epd"):
+        print(board.to_fen(), len(board.generate_moves()))
+"""
+import gzip
+from typing import Iterator, Optional
+
+from lib.board import Board
+from lib.constants import MAILBOX_BACKEND
+
+
+def iter_fen_lines(path: str) -> Iterator[str]:
+    """Lazily yields the position lines of a fen/epd file (gzip compressed if the name ends with .gz).
+    Empty lines and lines starting with # are skipped.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def iter_fens(path: str, board: Optional[Board] = None, backend: str = MAILBOX_BACKEND) -> Iterator[Board]:
+    """Lazily sets up every position of a fen/epd file on the same board and yields it.
+    Only one line is held in memory at a time. The yielded board is reused for the next position, so clone() it if
+    the position has to be kept around.
+    """
+    if board is None:
+        board = Board(backend)
+
+    for fen in iter_fen_lines(path):
+        board.parse_fen(fen)
+        yield board
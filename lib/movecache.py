@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+DEFAULT_MOVE_CACHE_SIZE = 4096  # number of positions kept in the cache
+
+
+class MoveCache:
+    """Bounded LRU cache of legal moves keyed by position key.
+    Position keys are derived from the shared zobrist tables, so one cache can be shared by several boards.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MOVE_CACHE_SIZE):
+        assert max_size > 0
+        self.max_size: int = max_size
+        self.hits: int = 0
+        self.misses: int = 0
+        self._moves: OrderedDict = OrderedDict()
+
+    def __len__(self):
+        return len(self._moves)
+
+    def get(self, key: int) -> Optional[Tuple[int, ...]]:
+        """Returns the cached moves for a position key (and marks them as recently used) or None"""
+        moves = self._moves.get(key)
+        if moves is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._moves.move_to_end(key)
+        return moves
+
+    def put(self, key: int, moves: Tuple[int, ...]):
+        """Stores moves for a position key, evicting the least recently used position if the cache is full"""
+        self._moves[key] = moves
+        self._moves.move_to_end(key)
+        if len(self._moves) > self.max_size:
+            self._moves.popitem(last=False)
+
+    def clear(self):
+        self._moves.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._moves),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,4 +1,12 @@
+from array import array
+
 from lib.constants import *
+from lib.checks import release_variant
+
+
+def new_move_buffer() -> array:
+    """Returns a zeroed move buffer large enough for the moves of any position"""
+    return array('I', bytes(4 * MAX_POSITION_MOVES))
 
 
 # get_move_int creates and returns a move int from given move information
@@ -6,6 +14,7 @@ def get_move_int(from_sq: int, to_sq: int, capture_piece: int, promotion_piece:
     return from_sq | (to_sq << 7) | (capture_piece << 14) | (promotion_piece << 20) | flag
 
 
+@release_variant
 class MoveGenerator:
     def __init__(self, board):
         self.pos = board
@@ -25,6 +34,10 @@ class MoveGenerator:
             BLACK_QUEEN: self.generate_sliding_moves,
             BLACK_KING: self.generate_non_sliding_moves,
         }
+        # one preallocated move buffer per ply, see move_buffer()
+        self.move_stack: List[array] = []
+        # buffer for the list based api, its content is copied out before returning
+        self.scratch_moves = new_move_buffer()
 
     def print_move(self, move: int) -> str:
         file_from = self.pos.conversion.FilesBoard[get_from_square(move)]
@@ -52,77 +65,84 @@ class MoveGenerator:
 
         return move_str
 
-    def add_white_pawn_capture_move(self, from_: int, to: int, cap: int, move_list: List) -> List:
+    def move_buffer(self, ply: int) -> array:
+        """Returns the preallocated move buffer of given ply. Buffers are created once and then reused, so
+        generating moves into them at every node of a search or perft does not allocate any lists.
+        """
+        while len(self.move_stack) <= ply:
+            self.move_stack.append(new_move_buffer())
+
+        return self.move_stack[ply]
+
+    def add_white_pawn_capture_move(self, from_: int, to: int, cap: int, moves: array, count: int) -> int:
         assert self.pos.is_piece_valid_or_empty(cap)
         assert self.pos.is_square_on_board(from_)
         assert self.pos.is_square_on_board(to)
 
         if self.pos.conversion.RanksBoard[from_] == RANK_7:
             # add all promotion with capture related moves
-            move_list.append(get_move_int(from_, to, cap, WHITE_QUEEN, 0))
-            move_list.append(get_move_int(from_, to, cap, WHITE_ROOK, 0))
-            move_list.append(get_move_int(from_, to, cap, WHITE_BISHOP, 0))
-            move_list.append(get_move_int(from_, to, cap, WHITE_KNIGHT, 0))
-        else:
-            # add normal capture moves without promotion
-            move_list.append(get_move_int(from_, to, cap, EMPTY, 0))
+            moves[count] = get_move_int(from_, to, cap, WHITE_QUEEN, 0)
+            moves[count + 1] = get_move_int(from_, to, cap, WHITE_ROOK, 0)
+            moves[count + 2] = get_move_int(from_, to, cap, WHITE_BISHOP, 0)
+            moves[count + 3] = get_move_int(from_, to, cap, WHITE_KNIGHT, 0)
+            return count + 4
 
-        return move_list
+        # add normal capture moves without promotion
+        moves[count] = get_move_int(from_, to, cap, EMPTY, 0)
+        return count + 1
 
-    def add_white_pawn_move(self, from_: int, to: int, move_list: List) -> List:
+    def add_white_pawn_move(self, from_: int, to: int, moves: array, count: int) -> int:
         assert self.pos.is_square_on_board(from_)
         assert self.pos.is_square_on_board(to)
 
         if self.pos.conversion.RanksBoard[from_] == RANK_7:
             # add normal promotion without capture
-            move_list.append(get_move_int(from_, to, EMPTY, WHITE_QUEEN, 0))
-            move_list.append(get_move_int(from_, to, EMPTY, WHITE_ROOK, 0))
-            move_list.append(get_move_int(from_, to, EMPTY, WHITE_BISHOP, 0))
-            move_list.append(get_move_int(from_, to, EMPTY, WHITE_KNIGHT, 0))
-        else:
-            move_list.append(get_move_int(from_, to, EMPTY, EMPTY, 0))
+            moves[count] = get_move_int(from_, to, EMPTY, WHITE_QUEEN, 0)
+            moves[count + 1] = get_move_int(from_, to, EMPTY, WHITE_ROOK, 0)
+            moves[count + 2] = get_move_int(from_, to, EMPTY, WHITE_BISHOP, 0)
+            moves[count + 3] = get_move_int(from_, to, EMPTY, WHITE_KNIGHT, 0)
+            return count + 4
 
-        return move_list
+        moves[count] = get_move_int(from_, to, EMPTY, EMPTY, 0)
+        return count + 1
 
-    def add_black_pawn_capture_move(self, from_: int, to: int, cap: int, move_list: List) -> List:
+    def add_black_pawn_capture_move(self, from_: int, to: int, cap: int, moves: array, count: int) -> int:
         assert self.pos.is_piece_valid_or_empty(cap)
         assert self.pos.is_square_on_board(from_)
         assert self.pos.is_square_on_board(to)
 
         if self.pos.conversion.RanksBoard[from_] == RANK_2:
             # add all promotion with capture related moves
-            move_list.append(get_move_int(from_, to, cap, BLACK_QUEEN, 0))
-            move_list.append(get_move_int(from_, to, cap, BLACK_ROOK, 0))
-            move_list.append(get_move_int(from_, to, cap, BLACK_BISHOP, 0))
-            move_list.append(get_move_int(from_, to, cap, BLACK_KNIGHT, 0))
-        else:
-            # add normal capture moves without promotion
-            move_list.append(get_move_int(from_, to, cap, EMPTY, 0))
+            moves[count] = get_move_int(from_, to, cap, BLACK_QUEEN, 0)
+            moves[count + 1] = get_move_int(from_, to, cap, BLACK_ROOK, 0)
+            moves[count + 2] = get_move_int(from_, to, cap, BLACK_BISHOP, 0)
+            moves[count + 3] = get_move_int(from_, to, cap, BLACK_KNIGHT, 0)
+            return count + 4
 
-        return move_list
+        # add normal capture moves without promotion
+        moves[count] = get_move_int(from_, to, cap, EMPTY, 0)
+        return count + 1
 
-    def add_black_pawn_move(self, from_: int, to: int, move_list: List) -> List:
+    def add_black_pawn_move(self, from_: int, to: int, moves: array, count: int) -> int:
         assert self.pos.is_square_on_board(from_)
         assert self.pos.is_square_on_board(to)
 
         if self.pos.conversion.RanksBoard[from_] == RANK_2:
             # add normal promotion without capture
-            move_list.append(get_move_int(from_, to, EMPTY, BLACK_QUEEN, 0))
-            move_list.append(get_move_int(from_, to, EMPTY, BLACK_ROOK, 0))
-            move_list.append(get_move_int(from_, to, EMPTY, BLACK_BISHOP, 0))
-            move_list.append(get_move_int(from_, to, EMPTY, BLACK_KNIGHT, 0))
-        else:
-            move_list.append(get_move_int(from_, to, EMPTY, EMPTY, 0))
+            moves[count] = get_move_int(from_, to, EMPTY, BLACK_QUEEN, 0)
+            moves[count + 1] = get_move_int(from_, to, EMPTY, BLACK_ROOK, 0)
+            moves[count + 2] = get_move_int(from_, to, EMPTY, BLACK_BISHOP, 0)
+            moves[count + 3] = get_move_int(from_, to, EMPTY, BLACK_KNIGHT, 0)
+            return count + 4
 
-        return move_list
+        moves[count] = get_move_int(from_, to, EMPTY, EMPTY, 0)
+        return count + 1
 
     # noinspection PyMethodMayBeStatic
-    def empty_handler(self, *_):
-        return []
-
-    def generate_pawn_moves(self, sq, _) -> List:
-        move_list = []
+    def empty_handler(self, _sq, _piece, _moves, count: int) -> int:
+        return count
 
+    def generate_pawn_moves(self, sq: int, _, moves: array, count: int) -> int:
         enemy = BLACK
         pawn_rank = RANK_2
         forward_one_sq, forward_two_sq, capture_left_sq, capture_right_sq = 10, 20, 9, 11
@@ -136,38 +156,39 @@ class MoveGenerator:
 
         # add simple pawn move forward if next sq is empty
         if self.pos.pieces[sq + forward_one_sq] == EMPTY:
-            move_list = pawn_move_handler(sq, sq + forward_one_sq, move_list)
+            count = pawn_move_handler(sq, sq + forward_one_sq, moves, count)
             # if we are on the second rank, generate a double pawn move if 4th rank sq is empty
             if self.pos.conversion.RanksBoard[sq] == pawn_rank and self.pos.pieces[sq + forward_two_sq] == EMPTY:
                 # don't forget to set the flag for PAWN START
-                move_list.append(get_move_int(sq, (sq + forward_two_sq), EMPTY, EMPTY, MOVE_FLAG_PAWN_START))
+                moves[count] = get_move_int(sq, (sq + forward_two_sq), EMPTY, EMPTY, MOVE_FLAG_PAWN_START)
+                count += 1
 
         # Capture to the left and right
         # check if the square that we are capturing on is on the lib and that it has a black piece on it
         if self.pos.is_square_on_board(sq + capture_left_sq) and (
                 PIECE_COLOR_MAP[self.pos.pieces[sq + capture_left_sq]] == enemy):
-            move_list = pawn_capture_move_handler(sq, sq + capture_left_sq,
-                                                  self.pos.pieces[sq + capture_left_sq], move_list)
+            count = pawn_capture_move_handler(sq, sq + capture_left_sq, self.pos.pieces[sq + capture_left_sq],
+                                              moves, count)
 
         # check if the square that we are capturing on is on the lib and that it has a black piece on it
         if self.pos.is_square_on_board(sq + capture_right_sq) and (
                 PIECE_COLOR_MAP[self.pos.pieces[sq + capture_right_sq]] == enemy):
-            move_list = pawn_capture_move_handler(sq, sq + capture_right_sq,
-                                                  self.pos.pieces[sq + capture_right_sq], move_list)
+            count = pawn_capture_move_handler(sq, sq + capture_right_sq, self.pos.pieces[sq + capture_right_sq],
+                                              moves, count)
 
         if self.pos.enPassantSquare != NO_SQUARE:
             # check if the sq+9 square is equal to the enpassant square that we have stored in our pos
             if sq + capture_left_sq == self.pos.enPassantSquare:
-                move_list.append(get_move_int(sq, sq + capture_left_sq, EMPTY, EMPTY, MOVE_FLAG_ENPASS))
+                moves[count] = get_move_int(sq, sq + capture_left_sq, EMPTY, EMPTY, MOVE_FLAG_ENPASS)
+                count += 1
 
             if sq + capture_right_sq == self.pos.enPassantSquare:
-                move_list.append(get_move_int(sq, sq + capture_right_sq, EMPTY, EMPTY, MOVE_FLAG_ENPASS))
-
-        return move_list
+                moves[count] = get_move_int(sq, sq + capture_right_sq, EMPTY, EMPTY, MOVE_FLAG_ENPASS)
+                count += 1
 
-    def generate_sliding_moves(self, sq, piece) -> List:
-        move_list = []
+        return count
 
+    def generate_sliding_moves(self, sq: int, piece: int, moves: array, count: int) -> int:
         for index in range(DIRECTIONS_OF_MOVEMENT[piece]):
             dir_ = PIECE_MOVEMENT_INCREMENT[piece][index]
             target_sq = sq + dir_
@@ -178,18 +199,18 @@ class MoveGenerator:
                 # BLACK ^ 1 == WHITE       WHITE ^ 1 == BLACK
                 if self.pos.pieces[target_sq] != EMPTY:
                     if PIECE_COLOR_MAP[self.pos.pieces[target_sq]] == self.pos.side ^ 1:
-                        move_list.append(get_move_int(sq, target_sq, self.pos.pieces[target_sq], EMPTY, 0))
+                        moves[count] = get_move_int(sq, target_sq, self.pos.pieces[target_sq], EMPTY, 0)
+                        count += 1
 
                     break  # if we hit a non-empty square, we break from this direction
 
-                move_list.append(get_move_int(sq, target_sq, EMPTY, EMPTY, 0))
+                moves[count] = get_move_int(sq, target_sq, EMPTY, EMPTY, 0)
+                count += 1
                 target_sq += dir_
 
-        return move_list
-
-    def generate_non_sliding_moves(self, sq, piece) -> List:
-        move_list = []
+        return count
 
+    def generate_non_sliding_moves(self, sq: int, piece: int, moves: array, count: int) -> int:
         for index in range(DIRECTIONS_OF_MOVEMENT[piece]):
             dir_ = PIECE_MOVEMENT_INCREMENT[piece][index]
             target_sq = sq + dir_
@@ -200,16 +221,16 @@ class MoveGenerator:
             # BLACK ^ 1 == WHITE       WHITE ^ 1 == BLACK
             if self.pos.pieces[target_sq] != EMPTY:
                 if PIECE_COLOR_MAP[self.pos.pieces[target_sq]] == self.pos.side ^ 1:
-                    move_list.append(get_move_int(sq, target_sq, self.pos.pieces[target_sq], EMPTY, 0))
+                    moves[count] = get_move_int(sq, target_sq, self.pos.pieces[target_sq], EMPTY, 0)
+                    count += 1
                 continue
 
-            move_list.append(get_move_int(sq, target_sq, EMPTY, EMPTY, 0))
+            moves[count] = get_move_int(sq, target_sq, EMPTY, EMPTY, 0)
+            count += 1
 
-        return move_list
-
-    def generate_castling_moves(self) -> List:
-        move_list = []
+        return count
 
+    def generate_castling_moves(self, moves: array, count: int) -> int:
         if self.pos.side == WHITE:
             # if the position allows white king castling
             # here we do not check if square G1 (final square after castling) is attacked
@@ -218,40 +239,293 @@ class MoveGenerator:
             if (self.pos.castlePermissions & WHITE_KING_CASTLING) != 0:
                 if self.pos.pieces[F1] == EMPTY and self.pos.pieces[G1] == EMPTY:
                     if not self.pos.is_square_attacked(E1, BLACK) and not self.pos.is_square_attacked(F1, BLACK):
-                        move_list.append(get_move_int(E1, G1, EMPTY, EMPTY, MOVE_FLAG_CASTLE))
+                        moves[count] = get_move_int(E1, G1, EMPTY, EMPTY, MOVE_FLAG_CASTLE)
+                        count += 1
 
             if (self.pos.castlePermissions & WHITE_QUEEN_CASTLING) != 0:
                 if self.pos.pieces[D1] == EMPTY and self.pos.pieces[C1] == EMPTY and self.pos.pieces[B1] == EMPTY:
                     if not self.pos.is_square_attacked(E1, BLACK) and not self.pos.is_square_attacked(D1, BLACK):
-                        move_list.append(get_move_int(E1, C1, EMPTY, EMPTY, MOVE_FLAG_CASTLE))
+                        moves[count] = get_move_int(E1, C1, EMPTY, EMPTY, MOVE_FLAG_CASTLE)
+                        count += 1
 
         else:
             # castling
             if (self.pos.castlePermissions & BLACK_KING_CASTLING) != 0:
                 if self.pos.pieces[F8] == EMPTY and self.pos.pieces[G8] == EMPTY:
                     if not self.pos.is_square_attacked(E8, WHITE) and not self.pos.is_square_attacked(F8, WHITE):
-                        move_list.append(get_move_int(E8, G8, EMPTY, EMPTY, MOVE_FLAG_CASTLE))
+                        moves[count] = get_move_int(E8, G8, EMPTY, EMPTY, MOVE_FLAG_CASTLE)
+                        count += 1
 
             if (self.pos.castlePermissions & BLACK_QUEEN_CASTLING) != 0:
                 if self.pos.pieces[D8] == EMPTY and self.pos.pieces[C8] == EMPTY and self.pos.pieces[B8] == EMPTY:
                     if not self.pos.is_square_attacked(E8, WHITE) and not self.pos.is_square_attacked(D8, WHITE):
-                        move_list.append(get_move_int(E8, C8, EMPTY, EMPTY, MOVE_FLAG_CASTLE))
+                        moves[count] = get_move_int(E8, C8, EMPTY, EMPTY, MOVE_FLAG_CASTLE)
+                        count += 1
 
-        return move_list
+        return count
 
-    def generate_all_moves(self) -> List:
-        move_list = []
+    def generate_all_moves_into(self, moves: array) -> int:
+        """Writes all pseudo-legal moves into moves (see move_buffer()) and returns their number"""
+        count = self.generate_castling_moves(moves, 0)
 
-        move_list.extend(self.generate_castling_moves())
+        # only visit the squares occupied by pieces of the side to move
+        for piece in SIDE_PIECES[self.pos.side]:
+            handler = self.piece_move_handler[piece]
+            for sq in self.pos.pieceList[piece]:
+                count = handler(sq, piece, moves, count)
 
-        for sq in range(BOARD_SQUARE_NUMBER):
-            piece = self.pos.pieces[sq]
+        return count
 
-            if piece == OFF_BOARD or PIECE_COLOR_MAP[piece] != self.pos.side:
+    def generate_all_moves(self) -> List:
+        count = self.generate_all_moves_into(self.scratch_moves)
+        return self.scratch_moves[:count].tolist()
+
+    def get_checkers_and_pins(self, king_sq: int):
+        """Finds all enemy pieces giving check to the king on king_sq and all pieces pinned to it.
+        Returns (checkers, check_squares, pins) where check_squares is the set of squares on which a non king move
+        must land to resolve a single check (the checker and the squares between it & the king) and pins maps each
+        pinned square to the set of squares its piece can move to without exposing the king.
+        """
+        pieces = self.pos.pieces
+        side = self.pos.side
+        enemy = side ^ 1
+
+        checkers = []
+        check_squares = set()
+        pins = {}
+
+        # pawns & knights can not be blocked, the only way to resolve their check is to capture them
+        if side == WHITE:
+            pawn_squares, enemy_pawn = (king_sq + 9, king_sq + 11), BLACK_PAWN
+        else:
+            pawn_squares, enemy_pawn = (king_sq - 9, king_sq - 11), WHITE_PAWN
+
+        for sq in pawn_squares:
+            if pieces[sq] == enemy_pawn:
+                checkers.append(sq)
+                check_squares.add(sq)
+
+        for dir_ in KNIGHT_MOVE_INCREMENT:
+            sq = king_sq + dir_
+            piece = pieces[sq]
+            if piece != OFF_BOARD and IS_PIECE_KNIGHT[piece] and PIECE_COLOR_MAP[piece] == enemy:
+                checkers.append(sq)
+                check_squares.add(sq)
+
+        # sliding pieces - walk every ray from the king, remembering the first own piece we find on the way
+        for directions, is_slider in ((ROOK_MOVE_INCREMENT, IS_PIECE_ROOK_QUEEN),
+                                      (BISHOP_MOVE_INCREMENT, IS_PIECE_BISHOP_QUEEN)):
+            for dir_ in directions:
+                ray = []
+                own_sq = None
+                sq = king_sq + dir_
+                piece = pieces[sq]
+                while piece != OFF_BOARD:
+                    ray.append(sq)
+                    if piece != EMPTY:
+                        if PIECE_COLOR_MAP[piece] == side:
+                            if own_sq is not None:
+                                break  # two own pieces on the ray -> nothing is pinned
+                            own_sq = sq
+                        else:
+                            if is_slider[piece]:
+                                if own_sq is None:
+                                    checkers.append(sq)
+                                    check_squares.update(ray)
+                                else:
+                                    pins[own_sq] = set(ray)
+                            break
+
+                    sq += dir_
+                    piece = pieces[sq]
+
+        return checkers, check_squares, pins
+
+    def filter_legal_moves(self, moves):
+        """Lazily yields the legal moves out of given pseudo-legal moves. Checkers & pinned pieces are computed once
+        per position, so most moves can be accepted or rejected with a set lookup. Only king moves (incl. castling)
+        and en passant captures, whose legality depends on more than pins & checks, go through the full
+        is_move_legal test.
+        """
+        pos = self.pos
+        king_sq = pos.kingSquare[pos.side]
+        checkers, check_squares, pins = self.get_checkers_and_pins(king_sq)
+        double_check = len(checkers) > 1
+
+        for move_ in moves:
+            from_ = move_ & 0x7f
+
+            if from_ == king_sq or move_ & MOVE_FLAG_ENPASS != 0:
+                if pos.is_move_legal(move_):
+                    yield move_
                 continue
 
-            handler = self.piece_move_handler[piece]
-            moves = handler(sq, piece)
-            move_list.extend(moves)
+            if double_check:
+                continue  # only the king can move out of a double check
 
-        return move_list
+            to = (move_ >> 7) & 0x7f
+            if checkers and to not in check_squares:
+                continue
+
+            if from_ in pins and to not in pins[from_]:
+                continue
+
+            yield move_
+
+    def filter_legal_moves_into(self, moves: array, count: int) -> int:
+        """In place version of filter_legal_moves(): moves the legal moves out of the first count pseudo-legal
+        moves of the buffer to its front and returns their number
+        """
+        pos = self.pos
+        king_sq = pos.kingSquare[pos.side]
+        checkers, check_squares, pins = self.get_checkers_and_pins(king_sq)
+        double_check = len(checkers) > 1
+
+        legal = 0
+        for index in range(count):
+            move_ = moves[index]
+            from_ = move_ & 0x7f
+
+            if from_ == king_sq or move_ & MOVE_FLAG_ENPASS != 0:
+                if not pos.is_move_legal(move_):
+                    continue
+
+            else:
+                if double_check:
+                    continue  # only the king can move out of a double check
+
+                to = (move_ >> 7) & 0x7f
+                if checkers and to not in check_squares:
+                    continue
+
+                if from_ in pins and to not in pins[from_]:
+                    continue
+
+            moves[legal] = move_
+            legal += 1
+
+        return legal
+
+    def generate_legal_moves_into(self, moves: array) -> int:
+        """Writes only the legal moves into moves (see move_buffer()) and returns their number"""
+        return self.filter_legal_moves_into(moves, self.generate_all_moves_into(moves))
+
+    def generate_legal_moves(self) -> List:
+        """Generates only legal moves, see filter_legal_moves()"""
+        count = self.generate_legal_moves_into(self.scratch_moves)
+        return self.scratch_moves[:count].tolist()
+
+    def iter_moves(self, captures_only: bool = False):
+        """Lazily yields pseudo-legal moves in stages: castling, then captures & promotions, then quiet moves.
+        Nothing is generated for a stage until the previous one is exhausted, so consumers that stop early
+        (i.e. after the first legal move or after the captures) don't pay for the rest.
+        NOTE: moves can be made while iterating, as long as they are taken back before the next move is requested.
+        """
+        if not captures_only:
+            castling_moves = array('I', bytes(8))  # at most 2 castling moves
+            yield from castling_moves[:self.generate_castling_moves(castling_moves, 0)]
+
+        yield from self.iter_captures()
+
+        if not captures_only:
+            yield from self.iter_quiet_moves()
+
+    def iter_captures(self):
+        """Lazily yields all captures (incl. en passant) and promotions of the side to move"""
+        pos = self.pos
+        pieces = pos.pieces
+        enemy = pos.side ^ 1
+
+        for piece in SIDE_PIECES[pos.side]:
+            # iterate over a copy since make/take of a yielded move can reorder the piece list
+            squares = tuple(pos.pieceList[piece])
+
+            if IS_PIECE_PAWN[piece]:
+                for sq in squares:
+                    yield from self.iter_pawn_captures(sq)
+
+            elif IS_PIECE_SLIDING[piece]:
+                for sq in squares:
+                    for index in range(DIRECTIONS_OF_MOVEMENT[piece]):
+                        dir_ = PIECE_MOVEMENT_INCREMENT[piece][index]
+                        target_sq = sq + dir_
+                        while pieces[target_sq] == EMPTY:
+                            target_sq += dir_
+
+                        target = pieces[target_sq]
+                        if target != OFF_BOARD and PIECE_COLOR_MAP[target] == enemy:
+                            yield get_move_int(sq, target_sq, target, EMPTY, 0)
+
+            else:
+                for sq in squares:
+                    for index in range(DIRECTIONS_OF_MOVEMENT[piece]):
+                        target_sq = sq + PIECE_MOVEMENT_INCREMENT[piece][index]
+                        target = pieces[target_sq]
+                        if target != OFF_BOARD and target != EMPTY and PIECE_COLOR_MAP[target] == enemy:
+                            yield get_move_int(sq, target_sq, target, EMPTY, 0)
+
+    def iter_pawn_captures(self, sq: int):
+        """Lazily yields captures, en passant captures and promotions of the pawn on sq"""
+        pos = self.pos
+        pieces = pos.pieces
+
+        if pos.side == WHITE:
+            enemy, promotion_rank = BLACK, RANK_7
+            forward_one_sq, capture_left_sq, capture_right_sq = 10, 9, 11
+        else:
+            enemy, promotion_rank = WHITE, RANK_2
+            forward_one_sq, capture_left_sq, capture_right_sq = -10, -9, -11
+
+        promotions = PROMOTION_PIECES[pos.side] if pos.conversion.RanksBoard[sq] == promotion_rank else (EMPTY,)
+
+        for to in (sq + capture_left_sq, sq + capture_right_sq):
+            target = pieces[to]
+            if target != OFF_BOARD and PIECE_COLOR_MAP[target] == enemy:
+                for promoted in promotions:
+                    yield get_move_int(sq, to, target, promoted, 0)
+            elif to == pos.enPassantSquare and to != NO_SQUARE:
+                yield get_move_int(sq, to, EMPTY, EMPTY, MOVE_FLAG_ENPASS)
+
+        # promotions without a capture are as forcing as captures, so they are part of this stage too
+        if promotions[0] != EMPTY and pieces[sq + forward_one_sq] == EMPTY:
+            for promoted in promotions:
+                yield get_move_int(sq, sq + forward_one_sq, EMPTY, promoted, 0)
+
+    def iter_quiet_moves(self):
+        """Lazily yields all non capturing moves of the side to move, except for promotions and castling"""
+        pos = self.pos
+        pieces = pos.pieces
+
+        if pos.side == WHITE:
+            pawn_rank, promotion_rank, forward_one_sq, forward_two_sq = RANK_2, RANK_7, 10, 20
+        else:
+            pawn_rank, promotion_rank, forward_one_sq, forward_two_sq = RANK_7, RANK_2, -10, -20
+
+        for piece in SIDE_PIECES[pos.side]:
+            squares = tuple(pos.pieceList[piece])
+
+            if IS_PIECE_PAWN[piece]:
+                for sq in squares:
+                    rank = pos.conversion.RanksBoard[sq]
+                    if rank == promotion_rank or pieces[sq + forward_one_sq] != EMPTY:
+                        continue
+
+                    yield get_move_int(sq, sq + forward_one_sq, EMPTY, EMPTY, 0)
+                    if rank == pawn_rank and pieces[sq + forward_two_sq] == EMPTY:
+                        yield get_move_int(sq, sq + forward_two_sq, EMPTY, EMPTY, MOVE_FLAG_PAWN_START)
+
+            elif IS_PIECE_SLIDING[piece]:
+                for sq in squares:
+                    for index in range(DIRECTIONS_OF_MOVEMENT[piece]):
+                        dir_ = PIECE_MOVEMENT_INCREMENT[piece][index]
+                        target_sq = sq + dir_
+                        while pieces[target_sq] == EMPTY:
+                            yield get_move_int(sq, target_sq, EMPTY, EMPTY, 0)
+                            target_sq += dir_
+
+            else:
+                for sq in squares:
+                    for index in range(DIRECTIONS_OF_MOVEMENT[piece]):
+                        target_sq = sq + PIECE_MOVEMENT_INCREMENT[piece][index]
+                        if pieces[target_sq] == EMPTY:
+                            yield get_move_int(sq, target_sq, EMPTY, EMPTY, 0)
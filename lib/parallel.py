@@ -0,0 +1,113 @@
+"""Runs perft and per-position jobs on several cores with a process pool.
+
+The board is pure python, so threads do not help (GIL). Instead, work is split into independent tasks that are
+sent to worker processes in a compact form: perft sends one board snapshot per root move, position jobs send
+chunks of fen strings. Every worker rebuilds its own board from that and only the (small) results travel back.
+
+Usage:
+    from lib.parallel import parallel_perft, map_positions
+
+    nodes = parallel_perft(START_FEN, 5, workers=8)
+    move_counts = map_positions(fens, "legal_moves", workers=8)
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Union
+
+from lib.board import Board
+from lib.constants import MAILBOX_BACKEND
+from lib.perft import perft
+
+
+def count_legal_moves(board: Board) -> int:
+    return len(board.generate_moves())
+
+
+def classify_position(board: Board) -> int:
+    """Returns one of the GAME_* states of the position"""
+    return board.game_state()
+
+
+# Jobs that can be referred to by name in map_positions
+POSITION_JOBS: Dict[str, Callable[[Board], object]] = {
+    "legal_moves": count_legal_moves,
+    "game_state": classify_position,
+}
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def _perft_task(snapshot: tuple, move: int, depth: int, backend: str) -> int:
+    board = Board.from_snapshot(snapshot, backend)
+    board.make_move(move)
+    return perft(board, depth)
+
+
+def _position_task(job: Callable[[Board], object], fens: List[str], backend: str) -> list:
+    board = Board(backend)
+    results = []
+    for fen in fens:
+        board.parse_fen(fen)
+        results.append(job(board))
+    return results
+
+
+def parallel_divide(fen: str, depth: int, workers: Optional[int] = None,
+                    backend: str = MAILBOX_BACKEND) -> Dict[str, int]:
+    """Same as perft.divide() but every root move is counted in a separate task of a process pool"""
+    assert depth > 0
+
+    board = Board(backend)
+    board.parse_fen(fen)
+    moves = board.generate_moves()
+    if workers is None:
+        workers = default_workers()
+
+    if workers <= 1 or depth == 1:
+        counts = [_perft_task(board.snapshot(), move_, depth - 1, backend) for move_ in moves]
+    else:
+        snapshot = board.snapshot()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            counts = list(executor.map(_perft_task, [snapshot] * len(moves), moves, [depth - 1] * len(moves),
+                                       [backend] * len(moves)))
+
+    return {board.moveGenerator.print_move(move_): nodes for move_, nodes in zip(moves, counts)}
+
+
+def parallel_perft(fen: str, depth: int, workers: Optional[int] = None, backend: str = MAILBOX_BACKEND) -> int:
+    """Counts the leaf nodes of the legal move tree of fen up to given depth using a pool of worker processes"""
+    if depth == 0:
+        return 1
+
+    return sum(parallel_divide(fen, depth, workers, backend).values())
+
+
+def map_positions(fens: List[str], job: Union[str, Callable[[Board], object]], workers: Optional[int] = None,
+                  chunk_size: Optional[int] = None, backend: str = MAILBOX_BACKEND) -> list:
+    """Applies job to the position of every fen and returns the results in the same order.
+    job is either the name of one of POSITION_JOBS or a module level function taking a board (it has to be
+    picklable). The fens are sent to the workers in chunks so every worker parses many positions on one board.
+    """
+    if isinstance(job, str):
+        job = POSITION_JOBS[job]
+
+    fens = list(fens)
+    if workers is None:
+        workers = default_workers()
+
+    if workers <= 1 or len(fens) <= 1:
+        return _position_task(job, fens, backend)
+
+    if chunk_size is None:
+        # a few chunks per worker keeps all of them busy without paying the ipc cost for every single position
+        chunk_size = max(1, len(fens) // (workers * 4))
+
+    chunks = [fens[index:index + chunk_size] for index in range(0, len(fens), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_results in executor.map(_position_task, [job] * len(chunks), chunks, [backend] * len(chunks)):
+            results.extend(chunk_results)
+
+    return results
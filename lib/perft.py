@@ -0,0 +1,212 @@
+"""Perft (performance test) driver for the move generator.
+
+Perft walks the legal move tree of a position to a fixed depth and counts the leaf nodes. Comparing those
+counts against known reference values is the standard way of proving that the move generator, make_move and
+take_move are correct, and timing the walk gives a throughput figure (nodes per second) for the whole pipeline.
+
+Usage:
+    python -m lib.perft --depth 3
+    python -m lib.perft --fen "<fen>" --depth 4 --divide
+    python -m lib.perft --suite --output perft.json
+    python -m lib.perft --suite --backend bitboard
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+from lib.board import Board
+from lib.constants import START_FEN, MAILBOX_BACKEND, BITBOARD_BACKEND
+
+
+# Reference positions with known node counts, indexed by depth - 1
+# Most of them come from https://www.chessprogramming.org/Perft_Results
+PERFT_POSITIONS: List[Dict] = [
+    {
+        "name": "start position",
+        "fen": START_FEN,
+        "nodes": [20, 400, 8902, 197281, 4865609],
+    },
+    {
+        "name": "kiwipete",
+        "fen": "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        "nodes": [48, 2039, 97862, 4085603],
+    },
+    {
+        "name": "kiwipete (black to move)",
+        "fen": "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b KQkq - 0 1",
+        "nodes": [43],
+    },
+    {
+        "name": "start position (black to move)",
+        "fen": "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR b KQkq - 0 1",
+        "nodes": [20, 400, 8902, 197281],
+    },
+    {
+        "name": "endgame with en passant and checks",
+        "fen": "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        "nodes": [14, 191, 2812, 43238, 674624],
+    },
+    {
+        "name": "promotions and castling",
+        "fen": "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        "nodes": [6, 264, 9467, 422333],
+    },
+    {
+        "name": "promotion with discovered checks",
+        "fen": "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        "nodes": [44, 1486, 62379, 2103487],
+    },
+    {
+        "name": "symmetrical middlegame",
+        "fen": "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        "nodes": [46, 2079, 89890, 3894594],
+    },
+    {
+        "name": "maximum number of legal moves",
+        "fen": "R6R/3Q4/1Q4Q1/4Q3/2Q4Q/Q4Q2/pp1Q4/kBNN1KB1 w - - 0 1",
+        "nodes": [218],
+    },
+]
+
+
+def perft(board: Board, depth: int, ply: int = 0) -> int:
+    """Counts the leaf nodes of the legal move tree of the current position up to given depth.
+    Unless a move cache is set, moves are generated into the preallocated buffer of each ply, so the walk does not
+    allocate move lists.
+    """
+    if depth == 0:
+        return 1
+
+    if board.moveCache is not None:
+        moves = board.generate_moves()
+        count = len(moves)
+    else:
+        moves = board.moveGenerator.move_buffer(ply)
+        count = board.moveGenerator.generate_legal_moves_into(moves)
+
+    nodes = 0
+    for index in range(count):
+        board.make_move(moves[index])
+        nodes += perft(board, depth - 1, ply + 1)
+        board.take_move()
+
+    return nodes
+
+
+def divide(board: Board, depth: int) -> Dict[str, int]:
+    """Runs perft for every root move separately and returns the node count for each move (in uci notation).
+    Comparing the divide output to the one of a reference engine quickly pinpoints a faulty move.
+    """
+    assert depth > 0
+
+    result = {}
+    for move_ in list(board.generate_moves()):
+        board.make_move(move_)
+        result[board.moveGenerator.print_move(move_)] = perft(board, depth - 1)
+        board.take_move()
+
+    return result
+
+
+def run_perft(fen: str, depth: int, divide_: bool = False, expected: Optional[int] = None,
+              backend: str = MAILBOX_BACKEND) -> Dict:
+    """Runs perft for a given fen and returns a report with node count, elapsed time and nodes per second"""
+    board = Board(backend)
+    board.parse_fen(fen)
+
+    start = time.perf_counter()
+    if divide_:
+        moves = divide(board, depth)
+        nodes = sum(moves.values())
+    else:
+        moves = None
+        nodes = perft(board, depth)
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "fen": fen,
+        "depth": depth,
+        "backend": backend,
+        "nodes": nodes,
+        "seconds": elapsed,
+        "nps": nodes / elapsed if elapsed > 0 else 0.0,
+    }
+
+    if moves is not None:
+        report["divide"] = moves
+
+    if expected is not None:
+        report["expected"] = expected
+        report["passed"] = nodes == expected
+
+    return report
+
+
+def run_suite(max_depth: int, positions: List[Dict] = None, backend: str = MAILBOX_BACKEND) -> List[Dict]:
+    """Runs perft over the reference positions for every depth (up to max_depth) with a known node count"""
+    if positions is None:
+        positions = PERFT_POSITIONS
+
+    reports = []
+    for position in positions:
+        for depth, expected in enumerate(position["nodes"][:max_depth], start=1):
+            report = run_perft(position["fen"], depth, expected=expected, backend=backend)
+            report["name"] = position["name"]
+            reports.append(report)
+
+    return reports
+
+
+def _print_report(report: Dict):
+    for move_str, nodes in sorted(report.get("divide", {}).items()):
+        print("{}: {}".format(move_str, nodes))
+
+    status = ""
+    if "passed" in report:
+        status = " OK" if report["passed"] else " FAILED (expected {})".format(report["expected"])
+
+    print("{} depth {}: {} nodes in {:.3f}s ({:.0f} nps){}".format(
+        report.get("name", report["fen"]), report["depth"], report["nodes"], report["seconds"], report["nps"],
+        status))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Counts move tree leaf nodes and measures move generator speed")
+    parser.add_argument("--fen", default=START_FEN, help="position to run perft for (default: start position)")
+    parser.add_argument("--depth", type=int, default=3, help="search depth (max depth when running the suite)")
+    parser.add_argument("--divide", action="store_true", help="report node counts per root move")
+    parser.add_argument("--suite", action="store_true", help="run all reference positions with known counts")
+    parser.add_argument("--backend", default=MAILBOX_BACKEND, choices=[MAILBOX_BACKEND, BITBOARD_BACKEND],
+                        help="board implementation to run perft with")
+    parser.add_argument("--output", help="write results as json to this file")
+    args = parser.parse_args(argv)
+
+    if args.suite:
+        reports = run_suite(args.depth, backend=args.backend)
+    else:
+        reports = [run_perft(args.fen, args.depth, divide_=args.divide, backend=args.backend)]
+
+    for report in reports:
+        _print_report(report)
+
+    total_nodes = sum(report["nodes"] for report in reports)
+    total_seconds = sum(report["seconds"] for report in reports)
+    summary = {
+        "nodes": total_nodes,
+        "seconds": total_seconds,
+        "nps": total_nodes / total_seconds if total_seconds > 0 else 0.0,
+        "passed": all(report.get("passed", True) for report in reports),
+    }
+    print("Total: {} nodes in {:.3f}s ({:.0f} nps)".format(summary["nodes"], summary["seconds"], summary["nps"]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": reports, "summary": summary}, f, indent=2)
+
+    return 0 if summary["passed"] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
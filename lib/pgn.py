@@ -0,0 +1,254 @@
+"""Streaming PGN reader and game replay.
+
+Games are read lazily one at a time, so arbitrarily large databases can be processed in constant memory. SAN moves
+are resolved to the move ints of the legal moves of the position and replayed with make_move on one reused board.
+
+Usage:
+    for game in iter_games("games.pgn"):
+        replayed = replay_game(game, board)
+        print(game.headers.get("White"), len(replayed.moves), replayed.keys[-1])
+
+    python -m lib.pgn games.pgn --fens --output replay.json
+"""
+import argparse
+import gzip
+import json
+import re
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from lib.board import Board
+from lib.constants import *
+
+HEADER_RE = re.compile(r'^\[(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+MOVETEXT_TOKEN_RE = re.compile(r'\{[^}]*\}?|;[^\n]*|\(|\)|\$\d+|1-0|0-1|1/2-1/2|\*|\d+\.+|[^\s{}();$.]+')
+SAN_RE = re.compile(r'^([NBRQK])?([a-h])?([1-8])?(x)?([a-h][1-8])(?:=?([NBRQnbrq]))?$')
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+# SAN piece letters to the piece types of each side
+SAN_PIECES: Dict[str, List[int]] = {
+    "": [WHITE_PAWN, BLACK_PAWN],
+    "N": [WHITE_KNIGHT, BLACK_KNIGHT],
+    "B": [WHITE_BISHOP, BLACK_BISHOP],
+    "R": [WHITE_ROOK, BLACK_ROOK],
+    "Q": [WHITE_QUEEN, BLACK_QUEEN],
+    "K": [WHITE_KING, BLACK_KING],
+}
+
+
+class PgnGame:
+    """Tag pairs, SAN moves (main line only) and result of one game"""
+
+    def __init__(self, headers: Dict[str, str], moves: List[str], result: str):
+        self.headers = headers
+        self.moves = moves
+        self.result = result
+
+    def start_fen(self) -> str:
+        return self.headers.get("FEN", START_FEN)
+
+
+class ReplayedGame:
+    """Move ints and position keys (optionally also fens) of every position of a replayed game.
+    keys[0] / fens[0] belong to the start position, keys[i] / fens[i] to the position after moves[i - 1].
+    """
+
+    def __init__(self, game: PgnGame):
+        self.game = game
+        self.moves: List[int] = []
+        self.keys: List[int] = []
+        self.fens: List[str] = []
+        self.error: Optional[str] = None
+
+
+def _open(path: str):
+    opener = gzip.open if path.endswith(".gz") else open
+    return opener(path, "rt", encoding="utf-8", errors="replace")
+
+
+def parse_movetext(movetext: str):
+    """Returns the SAN moves of the main line and the result of a game's movetext. Comments, variations, move
+    numbers and NAGs are skipped.
+    """
+    moves = []
+    result = "*"
+    depth = 0
+    for token in MOVETEXT_TOKEN_RE.findall(movetext):
+        first = token[0]
+        if first == "(":
+            depth += 1
+        elif first == ")":
+            depth = max(0, depth - 1)
+        elif depth or first in "{;$" or token[-1] == ".":
+            continue  # inside a variation, comment, NAG or move number
+        elif token in RESULTS:
+            result = token
+        else:
+            moves.append(token)
+
+    return moves, result
+
+
+def iter_games(source) -> Iterator[PgnGame]:
+    """Lazily yields the games of a pgn file (path, gzip compressed if it ends with .gz) or of an iterable of lines.
+    Only the lines of the current game are kept in memory.
+    """
+    if isinstance(source, str):
+        with _open(source) as f:
+            yield from iter_games(f)
+        return
+
+    headers = {}
+    movetext = []
+    for line in source:
+        if line.startswith("%"):
+            continue  # escaped line
+
+        match = HEADER_RE.match(line) if line.startswith("[") else None
+        if match:
+            if movetext:
+                yield PgnGame(headers, *parse_movetext("".join(movetext)))
+                headers, movetext = {}, []
+
+            headers[match.group(1)] = match.group(2).replace('\\"', '"').replace("\\\\", "\\")
+        elif line.strip() or movetext:
+            movetext.append(line if line.endswith("\n") else line + "\n")
+
+    if headers or movetext:
+        yield PgnGame(headers, *parse_movetext("".join(movetext)))
+
+
+def move_from_san(board: Board, san: str) -> int:
+    """Returns the legal move int for a move in standard algebraic notation (i.e. 'Nbd7', 'exd8=Q+', 'O-O').
+    Raises ValueError if the move is illegal or ambiguous.
+    """
+    san = san.rstrip("+#!?")
+    side = board.side
+
+    if san in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        king_sq = board.kingSquare[side]
+        to = king_sq + (2 if len(san) == 3 else -2)
+        for move_ in board.generate_moves():
+            if move_ & MOVE_FLAG_CASTLE and get_to_square(move_) == to:
+                return move_
+        raise ValueError("Illegal castling {!r} in position {}".format(san, board.to_fen()))
+
+    match = SAN_RE.match(san)
+    if match is None:
+        raise ValueError("Invalid SAN move {!r}".format(san))
+
+    piece_char, from_file, from_rank, _, to_str, promotion = match.groups()
+    piece = SAN_PIECES[piece_char or ""][side]
+    to = SQUARE_NOTATION_MAP[to_str]
+    promoted = PROMOTION_NOTATION_MAP[side][promotion.lower()] if promotion else EMPTY
+    file = FILE_NOTATION_MAP[from_file] if from_file else None
+    rank = int(from_rank) - 1 if from_rank else None
+
+    # only the pseudo-legal moves matching the SAN have to be tested for legality
+    candidates = []
+    for move_ in board.moveGenerator.generate_all_moves():
+        from_ = get_from_square(move_)
+        if (get_to_square(move_) != to or board.pieces[from_] != piece or get_promoted_bits(move_) != promoted or
+                move_ & MOVE_FLAG_CASTLE):
+            continue
+
+        if file is not None and board.conversion.FilesBoard[from_] != file:
+            continue
+
+        if rank is not None and board.conversion.RanksBoard[from_] != rank:
+            continue
+
+        candidates.append(move_)
+
+    legal = list(board.moveGenerator.filter_legal_moves(candidates)) if candidates else []
+    if len(legal) > 1:
+        raise ValueError("Ambiguous SAN move {!r} in position {}".format(san, board.to_fen()))
+
+    if not legal:
+        raise ValueError("Illegal SAN move {!r} in position {}".format(san, board.to_fen()))
+
+    return legal[0]
+
+
+def replay_game(game: PgnGame, board: Optional[Board] = None, fens: bool = False) -> ReplayedGame:
+    """Plays the moves of a game on board (reused, or a new one) and records the move ints and position keys
+    (and fens if requested). Replay stops at the first illegal move, which is stored in the error attribute.
+    """
+    if board is None:
+        board = Board()
+
+    replayed = ReplayedGame(game)
+    board.parse_fen(game.start_fen())
+    replayed.keys.append(board.posKey)
+    if fens:
+        replayed.fens.append(board.to_fen())
+
+    for san in game.moves:
+        try:
+            move_ = move_from_san(board, san)
+        except ValueError as e:
+            replayed.error = str(e)
+            break
+
+        board.make_move(move_)
+        replayed.moves.append(move_)
+        replayed.keys.append(board.posKey)
+        if fens:
+            replayed.fens.append(board.to_fen())
+
+    return replayed
+
+
+def replay_games(games: Iterable[PgnGame], board: Optional[Board] = None,
+                 fens: bool = False) -> Iterator[ReplayedGame]:
+    """Lazily replays games one after the other on the same board"""
+    if board is None:
+        board = Board()
+
+    for game in games:
+        yield replay_game(game, board, fens)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replays all games of a pgn file and measures replay speed")
+    parser.add_argument("pgn", help="pgn file (may be gzip compressed)")
+    parser.add_argument("--fens", action="store_true", help="also generate the fen of every position")
+    parser.add_argument("--backend", default=MAILBOX_BACKEND, choices=[MAILBOX_BACKEND, BITBOARD_BACKEND],
+                        help="board implementation to replay the games with")
+    parser.add_argument("--output", help="write the key (and fen) sequence of every game as json lines to this file")
+    args = parser.parse_args(argv)
+
+    output = open(args.output, "w") if args.output else None
+    games = plies = errors = 0
+    start = time.perf_counter()
+    try:
+        for replayed in replay_games(iter_games(args.pgn), Board(args.backend), args.fens):
+            games += 1
+            plies += len(replayed.moves)
+            if replayed.error is not None:
+                errors += 1
+                print("game {}: {}".format(games, replayed.error), file=sys.stderr)
+
+            if output is not None:
+                record = {"headers": replayed.game.headers, "result": replayed.game.result,
+                          "keys": ["{:016x}".format(key) for key in replayed.keys]}
+                if args.fens:
+                    record["fens"] = replayed.fens
+                if replayed.error is not None:
+                    record["error"] = replayed.error
+                output.write(json.dumps(record) + "\n")
+    finally:
+        if output is not None:
+            output.close()
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print("{} games, {} plies ({} games with errors) in {:.3f}s: {:.1f} games/s, {:.0f} plies/s".format(
+        games, plies, errors, elapsed, games / elapsed, plies / elapsed))
+
+    return 0 if errors == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
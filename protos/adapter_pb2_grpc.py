@@ -1,46 +1,102 @@
 # Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
 import grpc
 
 from . import adapter_pb2 as adapter__pb2
 
 
 class AdapterStub(object):
-  # missing associated documentation comment in .proto file
-  pass
+    """Missing associated documentation comment in .proto file."""
 
-  def __init__(self, channel):
-    """Constructor.
+    def __init__(self, channel):
+        """Constructor.
 
-    Args:
-      channel: A grpc.Channel.
-    """
-    self.ExecuteEngineCommand = channel.unary_unary(
-        '/Adapter/ExecuteEngineCommand',
-        request_serializer=adapter__pb2.Request.SerializeToString,
-        response_deserializer=adapter__pb2.Response.FromString,
-        )
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.ExecuteEngineCommand = channel.unary_unary(
+                '/Adapter/ExecuteEngineCommand',
+                request_serializer=adapter__pb2.Request.SerializeToString,
+                response_deserializer=adapter__pb2.Response.FromString,
+                )
+        self.EngineSession = channel.stream_stream(
+                '/Adapter/EngineSession',
+                request_serializer=adapter__pb2.Request.SerializeToString,
+                response_deserializer=adapter__pb2.Response.FromString,
+                )
 
 
 class AdapterServicer(object):
-  # missing associated documentation comment in .proto file
-  pass
+    """Missing associated documentation comment in .proto file."""
 
-  def ExecuteEngineCommand(self, request, context):
-    """
-    """
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
+    def ExecuteEngineCommand(self, request, context):
+        """
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def EngineSession(self, request_iterator, context):
+        """Long lived session with the engine: every request is written to the engine as soon as it arrives (timeout is
+        not used) and every line the engine prints is sent back as its own response as soon as it is produced.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
 
 
 def add_AdapterServicer_to_server(servicer, server):
-  rpc_method_handlers = {
-      'ExecuteEngineCommand': grpc.unary_unary_rpc_method_handler(
-          servicer.ExecuteEngineCommand,
-          request_deserializer=adapter__pb2.Request.FromString,
-          response_serializer=adapter__pb2.Response.SerializeToString,
-      ),
-  }
-  generic_handler = grpc.method_handlers_generic_handler(
-      'Adapter', rpc_method_handlers)
-  server.add_generic_rpc_handlers((generic_handler,))
+    rpc_method_handlers = {
+            'ExecuteEngineCommand': grpc.unary_unary_rpc_method_handler(
+                    servicer.ExecuteEngineCommand,
+                    request_deserializer=adapter__pb2.Request.FromString,
+                    response_serializer=adapter__pb2.Response.SerializeToString,
+            ),
+            'EngineSession': grpc.stream_stream_rpc_method_handler(
+                    servicer.EngineSession,
+                    request_deserializer=adapter__pb2.Request.FromString,
+                    response_serializer=adapter__pb2.Response.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'Adapter', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+
+
+ # This class is part of an EXPERIMENTAL API.
+class Adapter(object):
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def ExecuteEngineCommand(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/Adapter/ExecuteEngineCommand',
+            adapter__pb2.Request.SerializeToString,
+            adapter__pb2.Response.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def EngineSession(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/Adapter/EngineSession',
+            adapter__pb2.Request.SerializeToString,
+            adapter__pb2.Response.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -0,0 +1,107 @@
+"""Scripted adapter and server fixtures shared by the tests of the engine session, client and pool"""
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+
+try:
+    import grpc
+    import grpc.aio
+    import protos.adapter_pb2
+    import protos.adapter_pb2_grpc
+except (ImportError, AttributeError):
+    grpc = None
+
+
+class ScriptedAdapter(protos.adapter_pb2_grpc.AdapterServicer if grpc else object):
+    """Async adapter answering like an engine, one response per output line. Searches take search_time seconds if
+    given, else their movetime (forever for 'go infinite'), unless stopped. They play the moves in turn.
+    """
+
+    def __init__(self, name: str = 'Scripted', moves=('e7e5',), search_time=None, stop_delay: float = 0.0,
+                 silent: bool = False):
+        self.name = name
+        self.moves = moves
+        self.searchTime = search_time
+        self.stopDelay = stop_delay  # seconds a search runs on after stop
+        self.silent = silent  # never answers isready
+        self.commands = []  # every command received, over all sessions
+        self.searches = 0
+
+    async def EngineSession(self, request_iterator, context):
+        stop = asyncio.Event()
+        search = None
+        writing = asyncio.Lock()  # the search task and this loop both write, a stream takes one write at a time
+
+        async def write(*lines):
+            async with writing:
+                for line in lines:
+                    await context.write(protos.adapter_pb2.Response(text=line))
+
+        async def run_search(duration, move):
+            try:
+                await asyncio.wait_for(stop.wait(), duration)
+            except asyncio.TimeoutError:
+                pass
+            await write(f'info depth 1 pv {move}', f'bestmove {move} ponder g1f3')
+
+        try:
+            while True:
+                request = await context.read()
+                if request is grpc.aio.EOF:
+                    break
+
+                command = request.text.strip()
+                self.commands.append(command)
+                if command == 'uci':
+                    await write(f'id name {self.name}', 'id author Test', 'uciok')
+                elif command == 'isready' and not self.silent:
+                    await write('readyok')
+                elif command.startswith('go'):
+                    stop.clear()
+                    parts = command.split()
+                    duration = int(parts[2]) / 1000 if 'movetime' in parts else None
+                    if self.searchTime is not None:
+                        duration = self.searchTime
+                    search = asyncio.ensure_future(run_search(duration, self.moves[self.searches % len(self.moves)]))
+                    self.searches += 1
+                elif command == 'stop':
+                    asyncio.get_event_loop().call_later(self.stopDelay, stop.set)
+
+            if search is not None:
+                await search  # the client closed its side, the bestmove still goes out
+        finally:
+            if search is not None:
+                search.cancel()
+
+
+@asynccontextmanager
+async def serve(*servicers):
+    """Starts one grpc.aio server per servicer, yields their targets and the servers"""
+    servers = []
+    targets = []
+    try:
+        for servicer in servicers:
+            server = grpc.aio.server()
+            protos.adapter_pb2_grpc.add_AdapterServicer_to_server(servicer, server)
+            targets.append(f'localhost:{server.add_insecure_port("localhost:0")}')
+            await server.start()
+            servers.append(server)
+        yield targets, servers
+    finally:
+        await asyncio.gather(*(server.stop(None) for server in servers))
+
+
+@contextmanager
+def serve_in_thread(*servicers):
+    """serve() on an event loop of its own thread, for the tests of blocking clients"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name='fake-adapter', daemon=True)
+    thread.start()
+    servers = serve(*servicers)
+    try:
+        yield asyncio.run_coroutine_threadsafe(servers.__aenter__(), loop).result(5)
+    finally:
+        asyncio.run_coroutine_threadsafe(servers.__aexit__(None, None, None), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
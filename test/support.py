@@ -0,0 +1,16 @@
+"""Shared setup of the test modules"""
+from lib import checks
+
+_was_debug = False
+
+
+def setUpModule():
+    """Test modules of the board core import this (with tearDownModule) to run their tests with the asserts enabled,
+    see lib/checks.py
+    """
+    global _was_debug
+    _was_debug = checks.set_debug(True)
+
+
+def tearDownModule():
+    checks.set_debug(_was_debug)
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import sys
+import unittest
+
+from lib.board import Board
+from lib.constants import START_FEN
+
+try:
+    import grpc
+    import grpc.aio
+    import protos.adapter_pb2
+    import protos.adapter_pb2_grpc
+    from engine.adapter import FakeEngine, SubprocessEngine, start_server
+    from engine.client import EngineClient
+except (ImportError, AttributeError):
+    grpc = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@unittest.skipIf(grpc is None, "grpcio with grpc.aio and protobuf are needed for the adapter")
+class TestAdapter(unittest.TestCase):
+    def run_with_adapter(self, test, engine_factory):
+        async def main():
+            server, servicer, port = await start_server(engine_factory)
+            try:
+                await test(f'localhost:{port}')
+            finally:
+                await servicer.close()
+                await server.stop(None)
+
+        asyncio.run(main())
+
+    def assert_legal(self, fen, move_str, moves=()):
+        board = Board()
+        board.parse_fen(fen)
+        for played in moves:
+            board.push_uci(played)
+        self.assertIn(move_str, [board.moveGenerator.print_move(move_) for move_ in board.generate_moves()])
+
+    def check_unary_commands(self, engine_factory):
+        async def test(target):
+            async with grpc.aio.insecure_channel(target) as channel:
+                stub = protos.adapter_pb2_grpc.AdapterStub(channel)
+
+                async def execute(text, timeout=5):
+                    response = await stub.ExecuteEngineCommand(protos.adapter_pb2.Request(text=text, timeout=timeout))
+                    return response.text.splitlines()
+
+                self.assertEqual((await execute('uci\n'))[-1], 'uciok')
+                self.assertEqual(await execute('isready\n'), ['readyok'])
+                self.assertEqual(await execute('position startpos moves e2e4\n'), [])
+                lines = await execute('go movetime 10\n')
+                self.assertTrue(lines[-1].startswith('bestmove '))
+                self.assert_legal(START_FEN, lines[-1].split()[1], ['e2e4'])
+
+        self.run_with_adapter(test, engine_factory)
+
+    def test_fake_engine(self):
+        self.check_unary_commands(lambda: FakeEngine(seed=1))
+
+    def test_subprocess_engine(self):
+        self.check_unary_commands(
+            lambda: SubprocessEngine([sys.executable, '-m', 'engine.adapter', '--uci', '--seed', '1'], cwd=ROOT))
+
+    def test_unary_timeout(self):
+        async def test(target):
+            async with grpc.aio.insecure_channel(target) as channel:
+                stub = protos.adapter_pb2_grpc.AdapterStub(channel)
+                request = protos.adapter_pb2.Request(text='go infinite\n', timeout=1)
+                self.assertEqual((await stub.ExecuteEngineCommand(request)).text, '')
+
+        self.run_with_adapter(test, FakeEngine)
+
+    def test_session_with_position_deltas(self):
+        engines = []
+
+        def engine_factory():
+            engines.append(FakeEngine(latency=0.001, search_time=0.01, seed=1))
+            return engines[-1]
+
+        board = Board()
+        board.parse_fen(START_FEN)
+
+        async def test(target):
+            async with EngineClient(target) as engine:
+                await engine.uci()
+                self.assertTrue(engine.position.incremental)
+                for _ in range(6):
+                    await engine.update_position(board)
+                    result = await engine.go(movetime=10)
+                    self.assertEqual(result.info[-1].split()[-1], result.move)
+                    board.push_uci(result.move)
+
+                # the adapter expanded the deltas, the engine followed the game
+                await engine.update_position(board)
+                await engine.isready()
+                self.assertEqual(engines[0].board.to_fen(), board.to_fen())
+
+        self.run_with_adapter(test, engine_factory)
+        self.assertEqual(len(engines), 1)
+
+    def test_invalid_delta(self):
+        async def test(target):
+            async with EngineClient(target) as engine:
+                await engine.uci()
+                await engine.send('position delta e2e5')
+                self.assertTrue((await engine._read_line()).startswith('info string'))
+
+        self.run_with_adapter(test, FakeEngine)
+
+    def test_concurrent_session_output(self):
+        # the engine's answers and the adapter's own info strings are written to the stream at the same time
+        async def test(target):
+            async with EngineClient(target) as engine:
+                await engine.send(*['uci', 'position delta e2e5'] * 20)
+                lines = [await asyncio.wait_for(engine._read_line(), 5) for _ in range(20 * 5)]
+                self.assertEqual(lines.count('uciok'), 20)
+                self.assertEqual(len([line for line in lines if line.startswith('info string Illegal')]), 20)
+
+        self.run_with_adapter(test, FakeEngine)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from lib.attacks import AttackMap
+from lib.board import Board
+from lib.constants import BITBOARD_BACKEND, WHITE, BLACK
+from lib.perft import PERFT_POSITIONS, perft
+
+
+class TestAttackMap(unittest.TestCase):
+    def walk_compare(self, board, depth):
+        """Checks the incremental attack counts against freshly built ones for every node up to given depth"""
+        self.assertEqual(board.attackMap.counts, AttackMap(board).counts)
+        if depth == 0:
+            return
+
+        for move_ in list(board.generate_moves()):
+            board.make_move(move_)
+            self.walk_compare(board, depth - 1)
+            board.take_move()
+
+        self.assertEqual(board.attackMap.counts, AttackMap(board).counts)
+
+    def test_incremental_matches_rebuild(self):
+        for backend in (Board().backend, BITBOARD_BACKEND):
+            for position in PERFT_POSITIONS[1:3] + PERFT_POSITIONS[4:7]:
+                with self.subTest(backend=backend, name=position["name"]):
+                    board = Board(backend)
+                    board.set_attack_maps(True)
+                    board.parse_fen(position["fen"])
+                    self.walk_compare(board, 2)
+
+    def test_matches_ray_walk(self):
+        board = Board()
+        board.parse_fen(PERFT_POSITIONS[1]["fen"])
+        board.set_attack_maps(True)
+        with_maps = [board.is_square_attacked(sq, side) for side in (WHITE, BLACK)
+                     for sq in board.conversion.Sq64ToSq120]
+
+        board.set_attack_maps(False)
+        self.assertIsNone(board.attackMap)
+        without_maps = [board.is_square_attacked(sq, side) for side in (WHITE, BLACK)
+                        for sq in board.conversion.Sq64ToSq120]
+
+        self.assertEqual(with_maps, without_maps)
+
+    def test_perft_with_attack_maps(self):
+        board = Board()
+        board.set_attack_maps(True)
+        for position in PERFT_POSITIONS:
+            board.parse_fen(position["fen"])
+            for depth, expected in enumerate(position["nodes"][:2], start=1):
+                with self.subTest(name=position["name"], depth=depth):
+                    self.assertEqual(perft(board, depth), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
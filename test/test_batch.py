@@ -0,0 +1,76 @@
+import unittest
+
+from lib.board import Board
+from lib.constants import START_FEN, WHITE, BLACK, NO_SQUARE
+from lib.perft import PERFT_POSITIONS
+
+try:
+    import numpy as np
+    from benchmarks.batch import random_boards
+    from lib.batch import BoardBatch
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestBoardBatch(unittest.TestCase):
+    def setUp(self):
+        self.boards = random_boards(40, seed=1)
+        self.batch = BoardBatch.from_boards(self.boards)
+
+    def test_from_fens(self):
+        fens = [position["fen"] for position in PERFT_POSITIONS]
+        batch = BoardBatch.from_fens(fens)
+
+        self.assertEqual(len(batch), len(fens))
+        board = Board()
+        for index, fen in enumerate(fens):
+            board.parse_fen(fen)
+            self.assertEqual(batch.pieces[index].tolist(), board.pieces)
+            self.assertEqual(batch.side[index], board.side)
+
+    def test_piece_counts(self):
+        counts = self.batch.piece_counts()
+        for index, board in enumerate(self.boards):
+            self.assertEqual(counts[index].tolist(), board.pieceNumber)
+
+    def test_king_squares(self):
+        for side in (WHITE, BLACK):
+            self.assertEqual(self.batch.king_squares(side).tolist(), [board.kingSquare[side] for board in self.boards])
+
+        empty = BoardBatch.from_fens(["8/8/8/8/8/8/8/K7 w - - 0 1"])
+        self.assertEqual(empty.king_squares(BLACK).tolist(), [NO_SQUARE])
+
+    def test_is_position_draw(self):
+        fens = [START_FEN, "8/8/3k4/8/8/3KB3/8/8 w - - 0 1", "8/8/3k4/8/8/2NKB3/8/8 w - - 0 1",
+                "8/8/3kn3/8/8/3KB3/8/8 w - - 0 1", "8/8/3k4/8/8/3KR3/8/8 w - - 0 1"]
+        board = Board()
+        expected = []
+        for fen in fens:
+            board.parse_fen(fen)
+            expected.append(board.is_position_draw())
+
+        self.assertEqual(BoardBatch.from_fens(fens).is_position_draw().tolist(), expected)
+        self.assertEqual(self.batch.is_position_draw().tolist(), [board.is_position_draw() for board in self.boards])
+
+    def test_is_square_attacked(self):
+        for sq in self.boards[0].conversion.Sq64ToSq120:
+            for side in (WHITE, BLACK):
+                expected = [board.is_square_attacked(sq, side) for board in self.boards]
+                self.assertEqual(self.batch.is_square_attacked(sq, side).tolist(), expected)
+
+        sides = np.array([board.side for board in self.boards])
+        squares = np.array([board.kingSquare[board.side] for board in self.boards])
+        self.assertEqual(self.batch.is_square_attacked(squares, sides ^ 1).tolist(), self.batch.in_check().tolist())
+
+    def test_in_check(self):
+        expected = [board.is_square_attacked(board.kingSquare[board.side], board.side ^ 1) for board in self.boards]
+        self.assertEqual(self.batch.in_check().tolist(), expected)
+
+        fens = [START_FEN, "3k4/3Q4/3K4/8/8/8/8/8 b - - 0 1", "4k3/8/8/8/8/8/8/r3K3 w - - 0 1",
+                "4k3/8/8/8/8/8/3p4/4K3 w - - 0 1", "4k3/8/5N2/8/8/8/8/4K3 b - - 0 1", "4k3/8/8/8/B7/8/8/4K3 b - - 0 1"]
+        self.assertEqual(BoardBatch.from_fens(fens).in_check().tolist(), [False, True, True, True, True, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from lib.board import Board
+from lib.bitboard import BitboardBoard, SQ120_TO_SQ64
+from lib.constants import BITBOARD_BACKEND, PIECE_COLOR_MAP, EMPTY, OFF_BOARD, BOTH
+from lib.perft import PERFT_POSITIONS, perft
+
+# the board core is tested with its asserts, see lib/checks.py
+from support import setUpModule, tearDownModule  # noqa: F401
+
+
+class TestBitboardBoard(unittest.TestCase):
+    def assert_bitboards_match_pieces(self, board):
+        for sq, piece in enumerate(board.pieces):
+            if piece == OFF_BOARD:
+                continue
+
+            bit = 1 << SQ120_TO_SQ64[sq]
+            if piece == EMPTY:
+                self.assertFalse(board.occupancy[BOTH] & bit)
+            else:
+                self.assertTrue(board.bitboards[piece] & bit)
+                self.assertTrue(board.occupancy[PIECE_COLOR_MAP[piece]] & bit)
+
+    def test_backend_selection(self):
+        self.assertIsInstance(Board(BITBOARD_BACKEND), BitboardBoard)
+        self.assertNotIsInstance(Board(), BitboardBoard)
+
+        with self.assertRaises(ValueError):
+            Board("unknown")
+
+    def test_reference_positions(self):
+        board = Board(BITBOARD_BACKEND)
+        for position in PERFT_POSITIONS:
+            board.parse_fen(position["fen"])
+            for depth, expected in enumerate(position["nodes"][:2], start=1):
+                with self.subTest(name=position["name"], depth=depth):
+                    self.assertEqual(perft(board, depth), expected)
+
+    def test_same_moves_as_mailbox(self):
+        for position in PERFT_POSITIONS:
+            mailbox, bitboard = Board(), Board(BITBOARD_BACKEND)
+            mailbox.parse_fen(position["fen"])
+            bitboard.parse_fen(position["fen"])
+
+            with self.subTest(name=position["name"]):
+                self.assertEqual(sorted(mailbox.generate_moves()), sorted(bitboard.generate_moves()))
+                self.assertEqual(sorted(mailbox.moveGenerator.generate_all_moves()),
+                                 sorted(bitboard.moveGenerator.generate_all_moves()))
+
+    def test_make_take_keeps_bitboards(self):
+        board = Board(BITBOARD_BACKEND)
+        board.parse_fen(PERFT_POSITIONS[5]["fen"])  # position with promotions, castling and en passant
+
+        for move_ in list(board.generate_moves()):
+            board.make_move(move_)
+            self.assert_bitboards_match_pieces(board)
+            board.take_move()
+            self.assert_bitboards_match_pieces(board)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,284 @@
+import copy
+import pickle
+import unittest
+from lib.attacks import AttackMap
+from lib.board import Board
+from lib.constants import START_FEN, BITBOARD_BACKEND, EMPTY, OFF_BOARD, PIECE_RANGE, HASH_KEY_MASK, HashData, \
+    DRAW, WIN, GAME_ONGOING, GAME_CHECKMATE, GAME_STALEMATE, GAME_DRAW_MATERIAL, WHITE, BLACK, WHITE_KING, BLACK_KING, \
+    NO_MOVE
+from lib.perft import PERFT_POSITIONS
+
+# the board core is tested with its asserts, see lib/checks.py
+from support import setUpModule, tearDownModule  # noqa: F401
+
+
+class TestBoard(unittest.TestCase):
+    def assert_piece_lists_match_pieces(self, board):
+        for piece in PIECE_RANGE:
+            if piece == EMPTY:
+                continue
+
+            squares = [sq for sq, board_piece in enumerate(board.pieces) if board_piece == piece]
+            self.assertEqual(sorted(board.pieceList[piece]), squares)
+            self.assertEqual(board.pieceNumber[piece], len(squares))
+
+    def walk_make_take(self, board, depth):
+        """Makes & takes back every move up to given depth checking that the piece lists are always in sync"""
+        if depth == 0:
+            return
+
+        for move_ in list(board.generate_moves()):
+            before = list(board.pieces)
+            board.make_move(move_)
+            self.assert_piece_lists_match_pieces(board)
+            self.walk_make_take(board, depth - 1)
+            board.take_move()
+            self.assert_piece_lists_match_pieces(board)
+            self.assertEqual(board.pieces, before)
+            self.assertEqual(board.posKey, board.__hash__())
+
+    def test_piece_lists_after_parse_fen(self):
+        board = Board()
+        board.parse_fen(START_FEN)
+
+        self.assert_piece_lists_match_pieces(board)
+        self.assertEqual(len([sq for piece_list in board.pieceList for sq in piece_list]), 32)
+        self.assertNotIn(OFF_BOARD, board.pieceList[EMPTY])
+
+        # parsing a new position must not keep pieces of the previous one
+        board.parse_fen(PERFT_POSITIONS[4]["fen"])
+        self.assert_piece_lists_match_pieces(board)
+
+    def test_make_take_round_trip(self):
+        for backend in (Board().backend, BITBOARD_BACKEND):
+            # kiwipete & a position with promotions, captures, castling and en passant
+            for fen in (PERFT_POSITIONS[1]["fen"], PERFT_POSITIONS[5]["fen"]):
+                with self.subTest(backend=backend, fen=fen):
+                    board = Board(backend)
+                    board.parse_fen(fen)
+                    self.walk_make_take(board, 2)
+
+    def test_position_keys_are_shared_and_stable(self):
+        first, second = Board(), Board(BITBOARD_BACKEND)
+        first.parse_fen(START_FEN)
+        second.parse_fen(START_FEN)
+
+        self.assertIs(first.hashData, second.hashData)
+        self.assertEqual(first.posKey, second.posKey)
+        # keys are derived from a fixed seed, so they must not change between runs or processes
+        self.assertEqual(first.posKey, 0x1750d1a46c3003a7)
+
+    def test_incremental_key_matches_full_hash(self):
+        board = Board()
+        board.parse_fen(PERFT_POSITIONS[1]["fen"])
+        for move_ in list(board.generate_moves()):
+            board.make_move(move_)
+            self.assertEqual(board.posKey, board.__hash__())
+            self.assertTrue(0 <= board.posKey <= HASH_KEY_MASK)
+            board.take_move()
+
+    def test_hash_data_seed(self):
+        self.assertEqual(HashData(seed=7).pieceKeys, HashData(seed=7).pieceKeys)
+        self.assertNotEqual(HashData(seed=7).sideKey, HashData(seed=8).sideKey)
+
+    def make_moves(self, board, moves):
+        for move_str in moves:
+            self.assertTrue(board.make_move(board.parse_move(move_str)))
+
+    def test_clone_is_independent(self):
+        for backend in (Board().backend, BITBOARD_BACKEND):
+            with self.subTest(backend=backend):
+                board = Board(backend)
+                board.parse_fen(START_FEN)
+                board.set_attack_maps(True)
+                self.make_moves(board, ["e2e4", "e7e5", "g1f3"])
+
+                clone = board.clone()
+                self.assertIs(type(clone), type(board))
+                self.assertEqual(clone, board)
+                self.assertIs(clone.hashData, board.hashData)
+                self.assertIs(clone.moveGenerator.pos, clone)
+
+                self.make_moves(clone, ["b8c6"])
+                self.assertNotEqual(clone, board)
+                self.assert_piece_lists_match_pieces(board)
+                self.assertEqual(board.attackMap.counts, AttackMap(board).counts)
+
+                # the clone keeps the history, so moves made before cloning can be taken back
+                for _ in range(4):
+                    clone.take_move()
+                original = Board(backend)
+                original.parse_fen(START_FEN)
+                self.assertEqual(clone, original)
+                self.assertEqual(copy.copy(board), board)
+
+    def test_snapshot_round_trip(self):
+        for backend in (Board().backend, BITBOARD_BACKEND):
+            with self.subTest(backend=backend):
+                board = Board(backend)
+                board.parse_fen(PERFT_POSITIONS[1]["fen"])
+                self.make_moves(board, ["e1g1", "h3g2"])
+
+                snapshot = pickle.loads(pickle.dumps(board.snapshot()))
+                restored = Board.from_snapshot(snapshot, backend)
+
+                self.assertIs(type(restored), type(board))
+                self.assertEqual(restored, board)
+                self.assertEqual(sorted(restored.generate_moves()), sorted(board.generate_moves()))
+                self.assert_piece_lists_match_pieces(restored)
+
+                restored.take_move()
+                restored.take_move()
+                self.assertEqual(restored.posKey, restored.__hash__())
+
+                board.restore(snapshot)
+                self.assertEqual(board.snapshot(), snapshot)
+
+    def test_repetition_count(self):
+        board = Board()
+        board.parse_fen(START_FEN)
+        shuffle = ["g1f3", "g8f6", "f3g1", "f6g8"]
+
+        self.assertEqual(board.get_threefold_repetition_count(), 0)
+        self.assertFalse(board.is_repetition())
+
+        self.make_moves(board, shuffle)
+        self.assertEqual(board.get_threefold_repetition_count(), 1)
+        self.assertTrue(board.is_repetition())
+        self.assertIsNone(board.get_result(board.playerJustMoved))
+
+        self.make_moves(board, shuffle)
+        self.assertEqual(board.get_threefold_repetition_count(), 2)
+        self.assertEqual(board.get_result(board.playerJustMoved), DRAW)
+
+        # taking moves back removes the positions from the index
+        for _ in range(4):
+            board.take_move()
+        self.assertEqual(board.get_threefold_repetition_count(), 1)
+        for _ in range(4):
+            board.take_move()
+        self.assertEqual(board.positionCounts, {})
+
+        # restored snapshots & clones keep the index
+        self.make_moves(board, shuffle)
+        self.assertEqual(Board.from_snapshot(board.snapshot()).get_threefold_repetition_count(), 1)
+        self.assertEqual(board.clone().get_threefold_repetition_count(), 1)
+
+        board.parse_fen(START_FEN)
+        self.assertEqual(board.get_threefold_repetition_count(), 0)
+
+    def test_game_state(self):
+        board = Board()
+        board.parse_fen(START_FEN)
+        self.assertEqual(board.game_state(), GAME_ONGOING)
+        self.assertTrue(board.has_legal_move())
+
+        self.make_moves(board, ["f2f3", "e7e5", "g2g4", "d8h4"])  # fool's mate
+        self.assertEqual(board.game_state(), GAME_CHECKMATE)
+        self.assertFalse(board.has_legal_move())
+        self.assertEqual(board.get_result(board.playerJustMoved), WIN)
+
+        board.take_move()
+        self.assertEqual(board.game_state(), GAME_ONGOING)
+
+        board.parse_fen("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+        self.assertEqual(board.game_state(), GAME_STALEMATE)
+        self.assertEqual(board.get_result(board.playerJustMoved), DRAW)
+
+        board.parse_fen("7k/8/6K1/8/8/8/8/6N1 b - - 0 1")
+        self.assertEqual(board.game_state(), GAME_DRAW_MATERIAL)
+
+    def test_parse_fen_sets_up_position_in_one_pass(self):
+        for backend in (Board().backend, BITBOARD_BACKEND):
+            for position in PERFT_POSITIONS:
+                with self.subTest(backend=backend, name=position["name"]):
+                    board = Board(backend)
+                    board.parse_fen(position["fen"])
+
+                    self.assert_piece_lists_match_pieces(board)
+                    self.assertEqual(board.posKey, board.__hash__())
+                    for side, king in ((WHITE, WHITE_KING), (BLACK, BLACK_KING)):
+                        self.assertEqual(board.kingSquare[side], board.pieceList[king][0])
+
+    def test_parse_fen_options(self):
+        board = Board()
+        board.parse_fen("3k4/8/8/3K4/8/8/1Q6/8 w --")
+        self.assertEqual((board.castlePermissions, board.fiftyMove), (0, 0))
+        self.assertEqual(board.to_fen(), "3k4/8/8/3K4/8/8/1Q6/8 w - - 0 1")
+
+        board.parse_fen("rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w Kq d6 0 3 bm exd6; id \"ep\";")
+        self.assertEqual(board.to_fen(), "rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w Kq d6 0 3")
+
+        for fen in ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNX w KQkq - 0 1", START_FEN.replace(" w ", " x "),
+                    START_FEN.replace("KQkq", "KQkz"), START_FEN.replace(" - ", " e9 "), "8/8/8/8",
+                    "rnbqkbnr/pppppppp/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",  # 7 ranks
+                    "rnbqkbn/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",  # short rank
+                    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBN w KQkq - 0 1",  # short last rank
+                    "rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",  # 9 files
+                    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR/8 w KQkq - 0 1"):  # 9 ranks
+            with self.subTest(fen=fen):
+                self.assertRaises(ValueError, board.parse_fen, fen)
+
+    def test_to_fen(self):
+        board = Board()
+        for position in PERFT_POSITIONS:
+            with self.subTest(name=position["name"]):
+                board.parse_fen(position["fen"])
+                self.assertEqual(board.to_fen(), position["fen"])
+
+        board.parse_fen(START_FEN)
+        for move_str in ("e2e4", "c7c5", "g1f3"):
+            board.make_move(board.parse_move(move_str))
+        self.assertEqual(board.to_fen(), "rnbqkbnr/pp1ppppp/8/2p5/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2")
+
+        board.take_move()
+        self.assertEqual(board.to_fen(), "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq c6 0 2")
+        self.assertEqual(Board.from_snapshot(board.snapshot()).to_fen(), board.to_fen())
+
+    def test_move_from_uci(self):
+        board = Board()
+        for position in PERFT_POSITIONS:
+            board.parse_fen(position["fen"])
+            for move_ in board.generate_moves():
+                move_str = board.moveGenerator.print_move(move_)
+                with self.subTest(name=position["name"], move=move_str):
+                    self.assertEqual(board.move_from_uci(move_str), move_)
+                    self.assertEqual(board.parse_move(move_str), move_)
+
+        board.parse_fen(PERFT_POSITIONS[5]["fen"])  # white can promote on b8 (with & without capture)
+        for move_str in ("b7b8", "b7a8k", "b7a8x", "e2e4", "z9a1", "a1", ""):
+            with self.subTest(move=move_str):
+                self.assertEqual(board.move_from_uci(move_str), NO_MOVE)
+
+    def test_push_uci(self):
+        board = Board()
+        board.parse_fen(START_FEN)
+        moves = [board.push_uci(move_str) for move_str in ("e2e4", "e7e5", "g1f3", "b8c6", "f1c4", "g8f6", "e1g1")]
+
+        self.assertEqual(board.histPly, 7)
+        self.assertEqual([undo.move for undo in board.history[:board.histPly]], moves)
+        self.assertEqual(board.to_fen(), "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQ1RK1 b kq - 5 4")
+        self.assertRaises(ValueError, board.push_uci, "e1g1")
+        self.assertEqual(board.histPly, 7)
+
+    def test_move_index_is_built_once_per_position(self):
+        board = Board()
+        board.parse_fen(START_FEN)
+        index = board.get_move_index()
+
+        self.assertEqual(len(index), 20)
+        self.assertIs(board.get_move_index(), index)
+        board.push_uci("e2e4")
+        self.assertIsNot(board.get_move_index(), index)
+
+    def test_mate_state_is_remembered_per_position(self):
+        board = Board()
+        board.parse_fen(START_FEN)
+        board.get_mate_state()
+
+        board.moveGenerator = None  # no move generation must happen for an already seen position
+        self.assertEqual(board.game_state(), GAME_ONGOING)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+
+from lib.board import Board
+from lib.book import OpeningBook, build_book, BOOK_ENTRY
+from lib.constants import START_FEN, NO_MOVE
+from lib.pgn import iter_games, move_from_san
+from lib.polyglot import polyglot_key, encode_move, decode_move
+
+PGN = """[Result "1-0"]
+
+1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 1-0
+
+[Result "1/2-1/2"]
+
+1. e4 e5 2. Nf3 Nf6 1/2-1/2
+
+[Result "0-1"]
+
+1. d4 d5 2. c4 e6 0-1
+
+[Result "1-0"]
+
+1. e4 c5 2. Nf3 d6 3. d4 cxd4 4. Nxd4 Nf6 5. Nc3 a6 6. Be2 e5 7. Nb3 Be7 8. O-O O-O 1-0
+"""
+
+
+class TestBook(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "book.bin")
+        self.board = Board()
+        self.board.parse_fen(START_FEN)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_polyglot_keys(self):
+        # reference keys from the polyglot book format specification
+        positions = [
+            ([], 0x463b96181691fc9c),
+            (["e2e4"], 0x823c9b50fd114196),
+            (["e2e4", "d7d5"], 0x0756b94461c50fb0),
+            (["e2e4", "d7d5", "e4e5"], 0x662fafb965db29d4),
+            (["e2e4", "d7d5", "e4e5", "f7f5"], 0x22a48b5a8e47ff78),
+            (["e2e4", "d7d5", "e4e5", "f7f5", "e1e2"], 0x652a607ca3f242c1),
+            (["e2e4", "d7d5", "e4e5", "f7f5", "e1e2", "e8f7"], 0x00fdd303c946bdd9),
+            (["a2a4", "b7b5", "h2h4", "b5b4", "c2c4"], 0x3c8123ea7b067637),
+            (["a2a4", "b7b5", "h2h4", "b5b4", "c2c4", "b4c3", "a1a3"], 0x5c3f9b829b279560),
+        ]
+        for moves, key in positions:
+            with self.subTest(moves=moves):
+                self.board.parse_fen(START_FEN)
+                for move_str in moves:
+                    self.board.push_uci(move_str)
+                self.assertEqual(polyglot_key(self.board), key)
+
+    def test_move_encoding(self):
+        self.assertEqual(encode_move("e2e4"), 0x031C)
+        self.assertEqual(decode_move(encode_move("a7a8q"), self.board), "a7a8q")
+
+        self.board.parse_fen("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+        self.assertEqual(decode_move(encode_move("e1g1", is_castle=True), self.board), "e1g1")
+        self.assertEqual(decode_move(encode_move("e1c1", is_castle=True), self.board), "e1c1")
+        self.assertEqual(decode_move(encode_move("e1h1"), self.board), "e1g1")
+
+    def test_build_and_probe(self):
+        entries = build_book(iter_games(io.StringIO(PGN)), self.path, max_plies=6)
+
+        self.assertEqual(os.path.getsize(self.path), entries * BOOK_ENTRY.size)
+        with OpeningBook(self.path) as book:
+            self.assertEqual(len(book), entries)
+            keys = [BOOK_ENTRY.unpack_from(book.data, index * BOOK_ENTRY.size)[0] for index in range(len(book))]
+            self.assertEqual(keys, sorted(keys))
+
+            # e4 was played in 3 games (2 wins, 1 draw), d4 once (loss)
+            moves = {self.board.moveGenerator.print_move(move_): weight for move_, weight in book.get_moves(self.board)}
+            self.assertEqual(moves, {"e2e4": 5, "d2d4": 0})
+            self.assertEqual(book.choose_move(self.board), self.board.move_from_uci("e2e4"))
+            self.assertEqual(book.choose_move(self.board, random.Random(1)), self.board.move_from_uci("e2e4"))
+
+            self.board.push_uci("e2e4")
+            moves = {self.board.moveGenerator.print_move(move_): weight for move_, weight in book.get_moves(self.board)}
+            self.assertEqual(moves, {"e7e5": 1, "c7c5": 0})
+
+            self.board.parse_fen("8/8/8/8/8/8/8/K6k w - - 0 1")
+            self.assertEqual(book.choose_move(self.board), NO_MOVE)
+
+    def test_castling_in_book(self):
+        build_book(iter_games(io.StringIO(PGN)), self.path, max_plies=20, min_games=1)
+        game = list(iter_games(io.StringIO(PGN)))[-1]
+        for san in game.moves[:14]:
+            self.board.make_move(move_from_san(self.board, san))
+
+        with OpeningBook(self.path) as book:
+            self.assertEqual([self.board.moveGenerator.print_move(move_) for move_, _ in book.get_moves(self.board)],
+                             ["e1g1"])
+
+    def test_min_games_and_empty_book(self):
+        self.assertEqual(build_book(iter_games(io.StringIO(PGN)), self.path, max_plies=2, min_games=4), 0)
+        with OpeningBook(self.path) as book:
+            self.assertEqual(len(book), 0)
+            self.assertEqual(book.choose_move(self.board), NO_MOVE)
+
+    def test_invalid_book_size(self):
+        with open(self.path, "wb") as f:
+            f.write(b"\0" * 10)
+        self.assertRaises(ValueError, OpeningBook, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import dis
+import unittest
+from unittest import mock
+from lib import checks
+from lib.bitboard import BitboardBoard, BitboardMoveGenerator
+from lib.board import Board
+from lib.constants import START_FEN, BITBOARD_BACKEND, MAILBOX_BACKEND
+from lib.movegenerator import MoveGenerator
+from lib.perft import PERFT_POSITIONS, perft
+
+HOT_METHODS = [Board.make_move, Board.take_move, Board.is_move_legal, Board.is_square_attacked, Board.clear_piece,
+               Board.add_piece, Board.move_piece, MoveGenerator.add_white_pawn_move,
+               MoveGenerator.add_black_pawn_capture_move, BitboardBoard.is_square_attacked,
+               BitboardBoard.is_move_legal]
+
+
+def has_asserts(function) -> bool:
+    return any(instruction.opname == "LOAD_ASSERTION_ERROR" or instruction.argval == "AssertionError"
+               for instruction in dis.get_instructions(function))
+
+
+class TestChecks(unittest.TestCase):
+    def setUp(self):
+        self.was_debug = checks.set_debug(False)
+
+    def tearDown(self):
+        checks.set_debug(self.was_debug)
+
+    @unittest.skipIf(not __debug__, "asserts are stripped by python -O anyway")
+    def test_release_code_has_no_asserts(self):
+        for function in HOT_METHODS:
+            with self.subTest(method=function.__qualname__):
+                self.assertFalse(has_asserts(function))
+                with checks.debug_checks():
+                    self.assertTrue(has_asserts(function))
+
+    @unittest.skipIf(not __debug__, "asserts are stripped by python -O anyway")
+    def test_debug_mode_validates(self):
+        for backend in (MAILBOX_BACKEND, BITBOARD_BACKEND):
+            board = Board(backend)
+            board.parse_fen(START_FEN)
+            with checks.debug_checks():
+                self.assertTrue(checks.is_debug())
+                self.assertRaises(AssertionError, board.clear_piece, 0)  # off board square
+            self.assertFalse(checks.is_debug())
+
+    def test_modes_agree(self):
+        for backend in (MAILBOX_BACKEND, BITBOARD_BACKEND):
+            board = Board(backend)
+            for position in PERFT_POSITIONS:
+                board.parse_fen(position["fen"])
+                for depth, expected in enumerate(position["nodes"][:2], start=1):
+                    for debug in (False, True):
+                        with self.subTest(backend=backend, name=position["name"], depth=depth, debug=debug):
+                            with checks.debug_checks(debug):
+                                self.assertEqual(perft(board, depth), expected)
+
+    def test_super_calls_in_release_mode(self):
+        # BitboardBoard methods call the Board implementation with super(), their closures have to be kept
+        board = Board(BITBOARD_BACKEND)
+        board.parse_fen(START_FEN)
+        self.assertIsInstance(board, BitboardBoard)
+        self.assertIsInstance(board.moveGenerator, BitboardMoveGenerator)
+        self.assertEqual(perft(board, 3), 8902)
+
+    @unittest.skipIf(not __debug__, "asserts are stripped by python -O anyway")
+    def test_without_source(self):
+        # .pyc only installs and frozen apps have no source to recompile, the classes keep their checked code
+        class Checked:
+            def check(self, value):
+                assert value
+
+        with mock.patch.object(checks.inspect, "getsourcelines", side_effect=OSError("could not get source code")):
+            self.assertIs(checks.release_variant(Checked), Checked)
+        self.assertRaises(AssertionError, Checked().check, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
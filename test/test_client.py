@@ -0,0 +1,118 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from fake_adapter import ScriptedAdapter, serve
+
+try:
+    import grpc
+    import grpc.aio
+    from engine import client as engine_client
+    from engine.client import EngineClient, EngineError, position_command
+except (ImportError, AttributeError):
+    grpc = None
+
+
+@unittest.skipIf(grpc is None, "grpcio with grpc.aio and protobuf are needed for the engine client")
+class TestEngineClient(unittest.TestCase):
+    def run_with_server(self, test, adapter=None):
+        adapter = adapter or ScriptedAdapter()
+
+        async def main():
+            async with serve(adapter) as ((target,), _):
+                await test(target)
+
+        asyncio.run(main())
+        return adapter
+
+    def test_position_command(self):
+        self.assertEqual(position_command(), 'position startpos')
+        self.assertEqual(position_command('8/8/8/8/8/8/8/K1k5 w - - 0 1', ['a1a2']),
+                         'position fen 8/8/8/8/8/8/8/K1k5 w - - 0 1 moves a1a2')
+
+    def test_conversation(self):
+        async def test(target):
+            async with EngineClient(target) as engine:
+                self.assertEqual(await engine.uci(), {'name': 'Scripted', 'author': 'Test'})
+                await engine.isready()
+                await engine.set_position(moves=['e2e4'])
+                info = []
+                result = await engine.go(movetime=10, on_info=info.append)
+                self.assertEqual((result.move, result.ponder), ('e7e5', 'g1f3'))
+                self.assertEqual(result.info, ['info depth 1 pv e7e5'])
+                self.assertEqual(info, result.info)
+
+        adapter = self.run_with_server(test)
+        self.assertEqual(adapter.commands, ['uci', 'isready', 'position startpos moves e2e4', 'go movetime 10'])
+
+    def test_stop(self):
+        async def test(target):
+            async with EngineClient(target) as engine:
+                search = asyncio.ensure_future(engine.go())  # infinite
+                await asyncio.sleep(0.05)
+                self.assertFalse(search.done())
+                await engine.stop()
+                self.assertEqual((await asyncio.wait_for(search, 5)).move, 'e7e5')
+
+        self.assertEqual(self.run_with_server(test).commands, ['go infinite', 'stop'])
+
+    def test_cancel_stops_search(self):
+        async def test(target):
+            async with EngineClient(target) as engine:
+                search = asyncio.ensure_future(engine.go())
+                await asyncio.sleep(0.05)
+                search.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await search
+
+                # the bestmove of the stopped search was consumed, the session is usable again
+                await engine.isready()
+
+        self.assertEqual(self.run_with_server(test).commands, ['go infinite', 'stop', 'isready'])
+
+    def test_timeouts(self):
+        async def test(target):
+            async with EngineClient(target, timeout=0.1) as engine:
+                with self.assertRaises(EngineError):
+                    await engine.isready()
+                with self.assertRaises(EngineError):
+                    await engine.go(movetime=10000, timeout=0.1)
+
+        self.run_with_server(test, ScriptedAdapter(silent=True))
+
+    def test_late_bestmove_after_stop(self):
+        stop_timeout = mock.patch.object(engine_client, 'STOP_TIMEOUT', 0.1)
+        stop_timeout.start()
+        self.addCleanup(stop_timeout.stop)
+
+        async def test(target):
+            async with EngineClient(target) as engine:
+                with self.assertRaises(EngineError):
+                    await engine.go(timeout=0.1)
+                await asyncio.sleep(0.3)  # the bestmove of the abandoned search arrives after the stop timed out
+
+                info = []
+                result = await engine.go(movetime=10, on_info=info.append)
+                self.assertEqual(result.move, 'd7d5')
+                self.assertEqual(info, ['info depth 1 pv d7d5'])
+                await engine.isready()
+
+        adapter = self.run_with_server(test, ScriptedAdapter(stop_delay=0.2, moves=('e7e5', 'd7d5')))
+        self.assertEqual(adapter.commands, ['go infinite', 'stop', 'go movetime 10', 'isready'])
+
+    def test_many_concurrent_sessions(self):
+        async def play(target):
+            async with EngineClient(target) as engine:
+                await engine.uci()
+                await engine.set_position()
+                return (await engine.go(movetime=50)).move
+
+        async def test(target):
+            moves = await asyncio.gather(*(play(target) for _ in range(100)))
+            self.assertEqual(set(moves), {'e7e5'})
+
+        self.run_with_server(test)
+
+
+if __name__ == '__main__':
+    unittest.main()
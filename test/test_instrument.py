@@ -0,0 +1,88 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from lib import instrument
+from lib.board import Board
+from lib.constants import START_FEN, BITBOARD_BACKEND
+from lib.movegenerator import MoveGenerator
+from lib.perft import perft
+
+
+class TestInstrument(unittest.TestCase):
+    def setUp(self):
+        self.was_enabled = instrument.is_enabled()
+        instrument.disable()
+
+    def tearDown(self):
+        if self.was_enabled:
+            instrument.enable()
+
+    def test_disabled_by_default(self):
+        original = Board.__dict__["make_move"]
+        with instrument.instrumented():
+            self.assertIsNot(Board.__dict__["make_move"], original)
+
+        # the original methods are restored, so there is no overhead when disabled
+        self.assertIs(Board.__dict__["make_move"], original)
+        self.assertFalse(hasattr(MoveGenerator.generate_all_moves_into, "__wrapped__"))
+        self.assertFalse(instrument.is_enabled())
+
+    def test_counts_calls(self):
+        board = Board()
+        board.parse_fen(START_FEN)
+        with instrument.instrumented() as counters:
+            self.assertEqual(perft(board, 2), 400)
+
+        stats = counters.to_dict()["methods"]
+        self.assertEqual(stats["Board.make_move"]["calls"], 20 + 400)
+        self.assertEqual(stats["Board.take_move"]["calls"], 20 + 400)
+        self.assertEqual(stats["MoveGenerator.generate_all_moves_into"]["calls"], 21)
+        self.assertGreater(stats["Board.make_move"]["total"], 0)
+        self.assertEqual(list(stats), sorted(stats, key=lambda name: -stats[name]["total"]))
+        self.assertIn("Board.make_move", counters.report())
+
+        # counters of a new block start from zero
+        with instrument.instrumented() as counters:
+            board.generate_moves()
+        self.assertNotIn("Board.make_move", counters.to_dict()["methods"])
+
+    def test_bitboard_overrides(self):
+        board = Board(BITBOARD_BACKEND)
+        board.parse_fen(START_FEN)
+        with instrument.instrumented() as counters:
+            board.generate_moves()
+
+        stats = counters.to_dict()["methods"]
+        self.assertEqual(stats["BitboardMoveGenerator.generate_all_moves_into"]["calls"], 1)
+        self.assertNotIn("MoveGenerator.generate_all_moves_into", stats)
+
+    def test_dump(self):
+        board = Board()
+        board.parse_fen(START_FEN)
+        with instrument.instrumented() as counters:
+            board.generate_moves()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.json")
+            counters.dump(path)
+            with open(path) as f:
+                data = json.load(f)
+
+        self.assertEqual(data["methods"]["Board.generate_moves"]["calls"], 1)
+
+    def test_report_at_exit(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        environment = dict(os.environ, SLINKY_INSTRUMENT="1")
+        process = subprocess.run([sys.executable, "-m", "lib.perft", "--depth", "2"], cwd=root, env=environment,
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+
+        self.assertIn("Hot path instrumentation report:", process.stderr)
+        self.assertIn("Board.make_move", process.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
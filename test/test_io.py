@@ -0,0 +1,44 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from lib.io import iter_fens, iter_fen_lines
+from lib.perft import PERFT_POSITIONS
+
+
+class TestIo(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.fens = [position["fen"] for position in PERFT_POSITIONS]
+        self.lines = ["# reference positions", ""] + ["{} ;".format(self.fens[0])] + self.fens[1:]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, opener=open):
+        path = os.path.join(self.directory.name, name)
+        with opener(path, "wt") as f:
+            f.write("\n".join(self.lines) + "\n")
+        return path
+
+    def test_iter_fens_reuses_board(self):
+        path = self.write("positions.epd")
+
+        self.assertEqual(len(list(iter_fen_lines(path))), len(self.fens))
+        boards = set()
+        fens = []
+        for board in iter_fens(path):
+            boards.add(id(board))
+            fens.append(board.to_fen())
+
+        self.assertEqual(fens, self.fens)
+        self.assertEqual(len(boards), 1)
+
+    def test_iter_fens_gzip(self):
+        path = self.write("positions.epd.gz", gzip.open)
+        self.assertEqual([board.to_fen() for board in iter_fens(path)], self.fens)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from lib.board import Board
+from lib.constants import START_FEN, BITBOARD_BACKEND
+from lib.movecache import MoveCache
+from lib.perft import PERFT_POSITIONS, perft
+
+
+class TestMoveCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = MoveCache(max_size=2)
+        cache.put(1, (10,))
+        cache.put(2, (20,))
+        self.assertEqual(cache.get(1), (10,))  # 1 is now the most recently used key
+
+        cache.put(3, (30,))
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(1), (10,))
+        self.assertEqual(cache.get(3), (30,))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()["hits"], 3)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_board_uses_cache(self):
+        board = Board()
+        board.parse_fen(START_FEN)
+        cache = MoveCache(max_size=16)
+        board.set_move_cache(cache)
+
+        moves = board.generate_moves()
+        self.assertEqual(cache.misses, 1)
+
+        moves.clear()  # callers get their own copy of the cached moves
+        self.assertEqual(len(board.generate_moves()), 20)
+        self.assertEqual(cache.hits, 1)
+
+        # a different board reaching the same position reuses the cached moves
+        other = Board(BITBOARD_BACKEND)
+        other.parse_fen(START_FEN)
+        other.set_move_cache(cache)
+        self.assertEqual(len(other.generate_moves()), 20)
+        self.assertEqual(cache.hits, 2)
+
+    def test_perft_with_small_cache(self):
+        board = Board()
+        board.set_move_cache(MoveCache(max_size=64))
+        for position in PERFT_POSITIONS:
+            board.parse_fen(position["fen"])
+            for depth, expected in enumerate(position["nodes"][:2], start=1):
+                with self.subTest(name=position["name"], depth=depth):
+                    self.assertEqual(perft(board, depth), expected)
+
+        self.assertLessEqual(len(board.moveCache), 64)
+        self.assertGreater(board.moveCache.hits, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
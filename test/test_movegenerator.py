@@ -1,6 +1,11 @@
 import unittest
-from lib.constants import START_FEN, BLACK, WHITE
+from lib.constants import START_FEN, BLACK, WHITE, E1, E8, D2, MOVE_FLAG_CAPTURE, MOVE_FLAG_PROMOTION, \
+    MOVE_FLAG_CASTLE
 from lib.board import Board
+from lib.perft import PERFT_POSITIONS
+
+# the board core is tested with its asserts, see lib/checks.py
+from support import setUpModule, tearDownModule  # noqa: F401
 
 
 class TestMoveGenerator(unittest.TestCase):
@@ -46,6 +51,90 @@ class TestMoveGenerator(unittest.TestCase):
 
         self.assertEqual(len(moves), 43)
 
+    def test_legal_moves_match_pseudo_legal_filter(self):
+        board = Board()
+        for position in PERFT_POSITIONS:
+            board.parse_fen(position["fen"])
+            for move_ in list(board.generate_moves()):
+                board.make_move(move_)
+                expected = [move for move in board.moveGenerator.generate_all_moves() if board.is_move_legal(move)]
+                with self.subTest(fen=position["fen"], move=board.moveGenerator.print_move(move_)):
+                    self.assertEqual(sorted(board.generate_moves()), sorted(expected))
+                board.take_move()
+
+    def test_checkers_and_pins(self):
+        board = Board()
+        # white king on e1 in check from the rook on e8, the knight on d2 is pinned by the bishop on b4
+        board.parse_fen("4r1k1/8/8/8/1b6/8/3N4/4K3 w - - 0 1")
+        checkers, check_squares, pins = board.moveGenerator.get_checkers_and_pins(E1)
+
+        self.assertEqual(checkers, [E8])
+        self.assertEqual(len(check_squares), 7)  # e2-e8
+        self.assertEqual(list(pins), [D2])
+
+    def test_double_check_only_king_moves(self):
+        board = Board()
+        board.parse_fen("4k3/8/8/8/8/5n2/8/r3K2R w K - 0 1")
+        moves = board.generate_moves()
+
+        self.assertTrue(moves)
+        self.assertTrue(all(move & 0x7f == E1 for move in moves))
+
+    def check_staged_moves(self, board, depth):
+        staged = list(board.iter_moves())
+        self.assertEqual(sorted(staged), sorted(board.generate_moves()))
+
+        # castling, then captures & promotions, then quiet moves
+        castling = [bool(move & MOVE_FLAG_CASTLE) for move in staged]
+        self.assertEqual(castling, sorted(castling, reverse=True))
+        forcing = [bool(move & (MOVE_FLAG_CAPTURE | MOVE_FLAG_PROMOTION)) for move in staged
+                   if not move & MOVE_FLAG_CASTLE]
+        self.assertEqual(forcing, sorted(forcing, reverse=True))
+        self.assertEqual(sorted(board.iter_moves(captures_only=True)),
+                         sorted(move for move in staged if move & (MOVE_FLAG_CAPTURE | MOVE_FLAG_PROMOTION)))
+
+        if depth > 1:
+            # moves made (and taken back) while iterating must not disturb the iteration
+            for move_ in board.iter_moves():
+                board.make_move(move_)
+                self.check_staged_moves(board, depth - 1)
+                board.take_move()
+
+    def test_staged_moves(self):
+        board = Board()
+        fens = [position["fen"] for position in PERFT_POSITIONS]
+        fens.append("1n5k/P6P/8/8/8/8/6p1/K4N2 b - - 0 1")  # promotions on the edge files
+        for fen in fens:
+            with self.subTest(fen=fen):
+                board.parse_fen(fen)
+                self.check_staged_moves(board, 2)
+
+    def test_staged_moves_stop_early(self):
+        board = Board()
+        board.parse_fen(PERFT_POSITIONS[1]["fen"])
+        first = next(board.iter_moves())
+
+        self.assertIn(first, board.generate_moves())
+        self.assertEqual(board.histPly, 0)
+
+    def test_move_buffers(self):
+        board = Board()
+        generator = board.moveGenerator
+        buffer = generator.move_buffer(1)
+
+        self.assertIs(generator.move_buffer(1), buffer)
+        self.assertIsNot(generator.move_buffer(0), buffer)
+        for position in PERFT_POSITIONS:
+            with self.subTest(name=position["name"]):
+                board.parse_fen(position["fen"])
+                count = generator.generate_all_moves_into(buffer)
+                self.assertEqual(buffer[:count].tolist(), generator.generate_all_moves())
+
+                count = generator.generate_legal_moves_into(buffer)
+                self.assertEqual(count, position["nodes"][0])
+                self.assertEqual(buffer[:count].tolist(), list(generator.filter_legal_moves(
+                    generator.generate_all_moves())))
+
 
 if __name__ == '__main__':
     unittest.main()
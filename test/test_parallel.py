@@ -0,0 +1,34 @@
+import unittest
+
+from lib.board import Board
+from lib.constants import START_FEN, GAME_ONGOING, GAME_CHECKMATE, GAME_STALEMATE
+from lib.parallel import parallel_perft, parallel_divide, map_positions
+from lib.perft import PERFT_POSITIONS, divide
+
+
+class TestParallel(unittest.TestCase):
+    def test_parallel_perft(self):
+        self.assertEqual(parallel_perft(START_FEN, 3, workers=2), 8902)
+        self.assertEqual(parallel_perft(PERFT_POSITIONS[1]["fen"], 2, workers=2), 2039)
+
+    def test_parallel_divide_matches_divide(self):
+        board = Board()
+        board.parse_fen(PERFT_POSITIONS[4]["fen"])
+        self.assertEqual(parallel_divide(PERFT_POSITIONS[4]["fen"], 3, workers=2), divide(board, 3))
+
+    def test_map_positions_keeps_order(self):
+        fens = [position["fen"] for position in PERFT_POSITIONS] * 3
+        expected = [position["nodes"][0] for position in PERFT_POSITIONS] * 3
+        self.assertEqual(map_positions(fens, "legal_moves", workers=2, chunk_size=4), expected)
+        self.assertEqual(map_positions(fens, "legal_moves", workers=1), expected)
+
+    def test_map_positions_game_state(self):
+        fens = [START_FEN,
+                "3k4/3Q4/3K4/8/8/8/8/8 b - - 0 1",
+                "k7/2Q5/1K6/8/8/8/8/8 b - - 0 1"]
+        self.assertEqual(map_positions(fens, "game_state", workers=2, chunk_size=1),
+                         [GAME_ONGOING, GAME_CHECKMATE, GAME_STALEMATE])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from lib.board import Board
+from lib.constants import START_FEN
+from lib.perft import PERFT_POSITIONS, perft, divide, run_perft
+
+
+class TestPerft(unittest.TestCase):
+    def test_reference_positions(self):
+        board = Board()
+        for position in PERFT_POSITIONS:
+            board.parse_fen(position["fen"])
+            for depth, expected in enumerate(position["nodes"][:2], start=1):
+                with self.subTest(name=position["name"], depth=depth):
+                    self.assertEqual(perft(board, depth), expected)
+
+    def test_start_fen_depth_3(self):
+        board = Board()
+        board.parse_fen(START_FEN)
+
+        self.assertEqual(perft(board, 3), 8902)
+
+    def test_divide_sums_to_perft(self):
+        board = Board()
+        board.parse_fen(START_FEN)
+        result = divide(board, 2)
+
+        self.assertEqual(len(result), 20)
+        self.assertEqual(result["e2e4"], 20)
+        self.assertEqual(sum(result.values()), 400)
+
+    def test_perft_restores_position(self):
+        board = Board()
+        board.parse_fen(PERFT_POSITIONS[1]["fen"])
+        key = board.posKey
+
+        perft(board, 2)
+
+        self.assertEqual(board.posKey, key)
+        self.assertEqual(board.histPly, 0)
+
+    def test_run_perft_report(self):
+        report = run_perft(START_FEN, 2, expected=400)
+
+        self.assertEqual(report["nodes"], 400)
+        self.assertTrue(report["passed"])
+        self.assertIn("nps", report)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import io
+import unittest
+
+from lib.board import Board
+from lib.pgn import iter_games, move_from_san, parse_movetext, replay_game, replay_games
+
+PGN = """[Event "Paris"]
+[White "Paul Morphy"]
+[Black "Duke Karl / Count Isouard"]
+[Result "1-0"]
+
+1.e4 e5 2.Nf3 d6 3.d4 Bg4 {This is a weak move
+already.} 4.dxe5 Bxf3 5.Qxf3 dxe5 6.Bc4 Nf6 7.Qb3 Qe7 8.Nc3 c6 9.Bg5 (9. Qxb7 Qb4+) 9...b5 $1
+10.Nxb5 cxb5 11.Bxb5+ Nbd7 12.O-O-O Rd8 13.Rxd7 Rxd7 14.Rd1 Qe6 15.Bxd7+ Nxd7 16.Qb8+ Nxb8 17.Rd8# 1-0
+
+[Event "Promotions"]
+[SetUp "1"]
+[FEN "8/P6k/8/8/8/8/1p5K/8 w - - 0 1"]
+
+1. a8=Q b1=N 2. Qb7+ Kh6 ; rest of line comment
+3. Qxb1 *
+
+[Event "En passant and castling"]
+
+1. e4 Nf6 2. e5 d5 3. exd6 e6 4. Nf3 Bxd6 5. Bc4 0-0 6. O-O 1/2-1/2
+"""
+
+
+class TestPgn(unittest.TestCase):
+    def test_parse_movetext(self):
+        moves, result = parse_movetext(
+            "1.e4 {a {comment} e5 (1... c5 2. Nf3 (2. c3)) 2. Nf3! $2 Nc6 ; eol\n 3... a6 0-1")
+        self.assertEqual(moves, ["e4", "e5", "Nf3!", "Nc6", "a6"])
+        self.assertEqual(result, "0-1")
+
+    def test_iter_games(self):
+        games = list(iter_games(io.StringIO(PGN)))
+
+        self.assertEqual([game.headers["Event"] for game in games], ["Paris", "Promotions", "En passant and castling"])
+        self.assertEqual([game.result for game in games], ["1-0", "*", "1/2-1/2"])
+        self.assertEqual([len(game.moves) for game in games], [33, 5, 11])
+        self.assertEqual(games[0].headers["Black"], "Duke Karl / Count Isouard")
+        self.assertEqual(games[1].start_fen(), "8/P6k/8/8/8/8/1p5K/8 w - - 0 1")
+
+    def test_replay_games(self):
+        board = Board()
+        replayed = list(replay_games(iter_games(io.StringIO(PGN)), board, fens=True))
+
+        self.assertEqual([game.error for game in replayed], [None, None, None])
+        self.assertEqual(replayed[0].fens[-1], "1n1Rkb1r/p4ppp/4q3/4p1B1/4P3/8/PPP2PPP/2K5 b k - 1 17")
+        self.assertEqual(replayed[1].fens[-1], "8/8/7k/8/8/8/7K/1Q6 b - - 0 3")
+        self.assertEqual(replayed[2].fens[-1], "rnbq1rk1/ppp2ppp/3bpn2/8/2B5/5N2/PPPP1PPP/RNBQ1RK1 b - - 3 6")
+
+        for game in replayed:
+            self.assertEqual(len(game.keys), len(game.moves) + 1)
+            self.assertEqual(len(game.fens), len(game.keys))
+            for fen, key in zip(game.fens, game.keys):
+                board.parse_fen(fen)
+                self.assertEqual(board.posKey, key)
+
+    def test_replay_stops_at_illegal_move(self):
+        game = next(iter_games(io.StringIO("1. e4 e5 2. Ke3 Nc6 *")))
+        replayed = replay_game(game)
+
+        self.assertEqual(len(replayed.moves), 2)
+        self.assertIn("Ke3", replayed.error)
+
+    def test_move_from_san(self):
+        board = Board()
+        board.parse_fen("R7/8/3k3n/8/8/8/8/R3K2R w K - 0 1")
+        self.assertRaises(ValueError, move_from_san, board, "Ra4")  # ambiguous
+        self.assertEqual(board.moveGenerator.print_move(move_from_san(board, "R1a4")), "a1a4")
+        self.assertEqual(board.moveGenerator.print_move(move_from_san(board, "R8a4")), "a8a4")
+        self.assertEqual(board.moveGenerator.print_move(move_from_san(board, "Rhxh6+")), "h1h6")
+        self.assertEqual(board.moveGenerator.print_move(move_from_san(board, "O-O")), "e1g1")
+        self.assertRaises(ValueError, move_from_san, board, "O-O-O")
+        self.assertRaises(ValueError, move_from_san, board, "Qd1")
+        self.assertRaises(ValueError, move_from_san, board, "xyz")
+
+
+if __name__ == '__main__':
+    unittest.main()
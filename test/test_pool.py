@@ -0,0 +1,90 @@
+import asyncio
+import time
+import unittest
+
+from fake_adapter import ScriptedAdapter, serve
+from lib.board import Board
+from lib.constants import START_FEN
+
+try:
+    import grpc
+    import grpc.aio
+    from engine.client import EngineError
+    from engine.pool import EnginePool
+except (ImportError, AttributeError):
+    grpc = None
+
+SEARCH_TIME = 0.1  # seconds every search of the adapters takes
+
+
+@unittest.skipIf(grpc is None, "grpcio with grpc.aio and protobuf are needed for the engine pool")
+class TestEnginePool(unittest.TestCase):
+    def run_with_servers(self, test, count: int):
+        adapters = [ScriptedAdapter(f'Engine {i}', search_time=SEARCH_TIME) for i in range(count)]
+
+        async def main():
+            async with serve(*adapters) as (endpoints, servers):
+                await test(endpoints, servers)
+
+        asyncio.run(main())
+        return adapters
+
+    def test_least_loaded_dispatch(self):
+        board = Board()
+        board.parse_fen(START_FEN)
+
+        async def test(endpoints, _):
+            async with EnginePool(endpoints) as pool:
+                start = time.perf_counter()
+                results = await asyncio.gather(*(pool.search(board, movetime=100) for _ in range(9)))
+                elapsed = time.perf_counter() - start
+
+                self.assertEqual({result.move for result in results}, {'e7e5'})
+                # 9 searches on 3 engines take 3 rounds, not 9
+                self.assertLess(elapsed, 6 * SEARCH_TIME)
+                self.assertEqual([stat["completed"] for stat in pool.stats()], [3, 3, 3])
+                self.assertEqual([stat["load"] for stat in pool.stats()], [0, 0, 0])
+
+        adapters = self.run_with_servers(test, 3)
+        self.assertEqual([adapter.searches for adapter in adapters], [3, 3, 3])
+
+    def test_unreachable_endpoint(self):
+        board = Board()
+        board.parse_fen(START_FEN)
+
+        async def test(endpoints, _):
+            async with EnginePool(endpoints + ['localhost:1'], health_interval=0, timeout=0.5) as pool:
+                self.assertEqual([stat["healthy"] for stat in pool.stats()], [True, True, False])
+                await asyncio.gather(*(pool.search(board, movetime=100) for _ in range(4)))
+                self.assertEqual([stat["completed"] for stat in pool.stats()], [2, 2, 0])
+
+        self.run_with_servers(test, 2)
+
+    def test_health_check(self):
+        async def test(endpoints, servers):
+            async with EnginePool(endpoints, sessions_per_endpoint=2, health_interval=0.05, timeout=0.5) as pool:
+                self.assertEqual(len(pool.stats()), 4)
+                self.assertEqual(len(pool.channels), 2)  # sessions of an endpoint share its channel
+                self.assertEqual({stat["name"] for stat in pool.stats()}, {'Engine 0', 'Engine 1'})
+
+                await servers[1].stop(None)
+                await asyncio.sleep(1.0)
+                self.assertEqual([stat["healthy"] for stat in pool.stats()], [True, True, False, False])
+
+                async with pool.acquire() as engine:
+                    await engine.isready()
+
+        self.run_with_servers(test, 2)
+
+    def test_no_healthy_engine(self):
+        async def test():
+            async with EnginePool(['localhost:1'], health_interval=0, timeout=0.2) as pool:
+                with self.assertRaises(EngineError):
+                    async with pool.acquire():
+                        pass
+
+        asyncio.run(test())
+
+
+if __name__ == '__main__':
+    unittest.main()
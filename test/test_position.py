@@ -0,0 +1,85 @@
+import unittest
+from engine.position import ADAPTER_DELTA_OPTION, PositionTracker, apply_position_command, full_position_command
+from lib.board import Board
+from lib.constants import START_FEN
+
+
+def play(board, *moves):
+    for move_str in moves:
+        board.push_uci(move_str)
+
+
+class TestPositionTracker(unittest.TestCase):
+    def setUp(self):
+        self.board = Board()
+        self.board.parse_fen(START_FEN)
+        self.engine_board = Board()
+
+    def assert_engine_follows(self, command):
+        apply_position_command(self.engine_board, command)
+        self.assertEqual(self.engine_board.posKey, self.board.posKey)
+        self.assertEqual(self.engine_board.to_fen(), self.board.to_fen())
+
+    def test_full_command_starts_after_last_irreversible_move(self):
+        self.assertEqual(full_position_command(self.board), "position fen " + START_FEN)
+
+        play(self.board, "e2e4", "e7e5", "g1f3", "b8c6")
+        self.assertEqual(full_position_command(self.board),
+                         "position fen rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e6 0 2 moves g1f3 b8c6")
+
+        play(self.board, "f3e5", "c6e5")
+        self.assertEqual(full_position_command(self.board),
+                         "position fen r1bqkbnr/pppp1ppp/8/4n3/4P3/8/PPPP1PPP/RNBQKB1R w KQkq - 0 4")
+
+    def test_plain_engine(self):
+        tracker = PositionTracker()
+        self.assert_engine_follows(tracker.command(self.board))
+        self.assertIsNone(tracker.command(self.board))  # nothing changed
+
+        play(self.board, "e2e4", "e7e5")
+        command = tracker.command(self.board)
+        self.assertTrue(command.startswith("position fen "))
+        self.assert_engine_follows(command)
+
+    def test_delta(self):
+        tracker = PositionTracker()
+        tracker.parse_uci_line("id name Test")
+        self.assertFalse(tracker.incremental)
+        tracker.parse_uci_line(ADAPTER_DELTA_OPTION)
+        self.assertTrue(tracker.incremental)
+
+        self.assert_engine_follows(tracker.command(self.board))
+        play(self.board, "g1f3", "g8f6")
+        self.assertEqual(tracker.command(self.board), "position delta g1f3 g8f6")
+        self.assert_engine_follows("position delta g1f3 g8f6")
+
+        play(self.board, "f3g1")
+        self.assertEqual(tracker.command(self.board), "position delta f3g1")
+        self.assert_engine_follows("position delta f3g1")
+
+        # a take back does not continue the known position -> full command
+        self.board.take_move()
+        self.board.take_move()
+        command = tracker.command(self.board)
+        self.assertTrue(command.startswith("position fen "))
+        self.assert_engine_follows(command)
+
+        # neither does a new game
+        self.board.parse_fen("8/8/8/8/8/8/k7/7K w - - 0 1")
+        command = tracker.command(self.board)
+        self.assertEqual(command, "position fen 8/8/8/8/8/8/k7/7K w - - 0 1")
+        self.assert_engine_follows(command)
+
+        tracker.reset()
+        self.assertTrue(tracker.command(self.board).startswith("position fen "))
+
+    def test_apply_position_command(self):
+        apply_position_command(self.engine_board, "position startpos moves e2e4 c7c5")
+        self.assertEqual(self.engine_board.to_fen(), "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq c6 0 2")
+        self.assertRaises(ValueError, apply_position_command, self.engine_board, "position delta e2e4")
+        self.assertRaises(ValueError, apply_position_command, self.engine_board, "go movetime 10")
+        self.assertRaises(ValueError, apply_position_command, self.engine_board, "position somewhere")
+
+
+if __name__ == '__main__':
+    unittest.main()
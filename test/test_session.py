@@ -0,0 +1,86 @@
+import queue
+import threading
+import unittest
+from contextlib import ExitStack
+
+from fake_adapter import ScriptedAdapter, serve_in_thread
+
+try:
+    import grpc
+    import grpc.aio
+    import protos.adapter_pb2_grpc
+    from engine.session import EngineSession
+except (ImportError, AttributeError):
+    grpc = None
+
+
+@unittest.skipIf(grpc is None, "grpcio with grpc.aio and protobuf are needed for the engine session and its adapter")
+class TestEngineSession(unittest.TestCase):
+    def setUp(self):
+        self.adapter = ScriptedAdapter()
+        stack = ExitStack()
+        self.addCleanup(stack.close)
+        (target,), _ = stack.enter_context(serve_in_thread(self.adapter))
+        channel = stack.enter_context(grpc.insecure_channel(target))
+        self.stub = protos.adapter_pb2_grpc.AdapterStub(channel)
+
+    def test_pipelined_commands(self):
+        lines = queue.Queue()
+        session = EngineSession(self.stub, on_line=lines.put)
+        session.send('uci')
+        session.send('position startpos moves e2e4\n', 'go movetime 100')
+
+        received = [lines.get(timeout=5) for _ in range(5)]
+        session.close()
+
+        self.assertEqual(received, ['id name Scripted', 'id author Test', 'uciok',
+                                    'info depth 1 pv e7e5', 'bestmove e7e5 ponder g1f3'])
+        self.assertEqual(self.adapter.commands, ['uci', 'position startpos moves e2e4', 'go movetime 100'])
+        self.assertRaises(RuntimeError, session.send, 'isready')
+
+    def test_error_callback(self):
+        errors = []
+        failed = threading.Event()
+
+        def on_error(error):
+            errors.append(error)
+            failed.set()
+
+        with grpc.insecure_channel('localhost:1') as channel:  # nothing listens there
+            session = EngineSession(protos.adapter_pb2_grpc.AdapterStub(channel), on_line=lambda _: None,
+                                    on_error=on_error)
+            session.send('isready')
+            self.assertTrue(failed.wait(5))
+            self.assertEqual(errors[0].code(), grpc.StatusCode.UNAVAILABLE)
+            session.close()
+
+    def test_unimplemented(self):
+        # adapters without the rpc (the Go adapter before it was regenerated) fail the stream with UNIMPLEMENTED
+        errors = queue.Queue()
+        with serve_in_thread(protos.adapter_pb2_grpc.AdapterServicer()) as ((target,), _):
+            with grpc.insecure_channel(target) as channel:
+                session = EngineSession(protos.adapter_pb2_grpc.AdapterStub(channel), on_line=lambda _: None,
+                                        on_error=errors.put)
+                session.send('uci')
+                self.assertEqual(errors.get(timeout=5).code(), grpc.StatusCode.UNIMPLEMENTED)
+                session.close()
+
+    def test_failing_callback(self):
+        lines = queue.Queue()
+
+        def on_line(line):
+            if line.startswith('bestmove'):
+                raise ValueError(line)
+            lines.put(line)
+
+        session = EngineSession(self.stub, on_line=on_line)
+        session.send('go movetime 10')
+        self.assertEqual(lines.get(timeout=5), 'info depth 1 pv e7e5')
+        # the reader survives the callback raising on the bestmove line
+        session.send('isready')
+        self.assertEqual(lines.get(timeout=5), 'readyok')
+        session.close()
+
+
+if __name__ == '__main__':
+    unittest.main()